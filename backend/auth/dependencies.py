@@ -1,7 +1,9 @@
 from fastapi import Depends, HTTPException, status, Cookie
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
+from .revocation import is_token_revoked
+from .user_cache import load_user
 from .utils import verify_token
 from models.user import User
 from schemas.auth import TokenData
@@ -10,13 +12,13 @@ from schemas.auth import TokenData
 security = HTTPBearer()
 
 def get_db():
-    """Database dependency - will be implemented when we create the database connection."""
+    """Database dependency (AsyncSession) - implemented in the main.py file."""
     # This will be implemented in the main.py file
     pass
 
-def get_current_user(
+async def get_current_user(
     access_token: Optional[str] = Cookie(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """Get the current authenticated user from httpOnly cookie."""
     if not access_token:
@@ -28,9 +30,17 @@ def get_current_user(
     
     try:
         token_data = verify_token(access_token, "access")
-        user = db.query(User).filter(User.email == token_data["email"]).first()
+        # Bloom filter em memória: só tokens possivelmente revogados vão ao SQLite
+        if is_token_revoked(token_data):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        # Cache por user_id (auth/user_cache.py); o email do token ainda precisa bater
+        user = await load_user(db, token_data["user_id"])
         
-        if user is None:
+        if user is None or user.email != token_data["email"]:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found",
@@ -53,9 +63,9 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-def get_current_user_from_cookie(
+async def get_current_user_from_cookie(
     access_token: Optional[str] = Cookie(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Optional[User]:
     """Get the current user from cookie (for optional authentication)."""
     if not access_token:
@@ -63,12 +73,16 @@ def get_current_user_from_cookie(
     
     try:
         token_data = verify_token(access_token, "access")
-        user = db.query(User).filter(User.email == token_data["email"]).first()
-        return user if user and user.is_active else None
+        if is_token_revoked(token_data):
+            return None
+        user = await load_user(db, token_data["user_id"])
+        if user is None or user.email != token_data["email"]:
+            return None
+        return user if user.is_active else None
     except HTTPException:
         return None
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Get the current active user."""
     if not current_user.is_active:
         raise HTTPException(
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+
+# ============================================================================
+# EXECUTOR LIMITADO PARA TRABALHO BLOQUEANTE (BCRYPT)
+# ============================================================================
+
+class BoundedExecutor:
+    """
+    Pool de threads dedicado para chamadas bloqueantes de rotas async.
+
+    - `max_workers` threads executam as chamadas (bcrypt solta o GIL, então
+      threads bastam e o event loop segue atendendo os outros requests)
+    - no máximo `max_pending` chamadas entre fila e execução; as demais
+      esperam uma vaga por até `queue_timeout` segundos e depois recebem 503
+    - o tempo de fila (pedido → início na thread) e o de execução entram
+      nas métricas
+    - semáforo e pool são criados sob demanda: o semáforo é por event loop
+      (o objeto vive no módulo e atende testes/reload com loops novos) e o
+      pool volta a subir depois de um `shutdown()`
+
+    Example:
+        hasher = BoundedExecutor("password-hash", max_workers=2, max_pending=32)
+        ok = await hasher.run(verify_password, plain, hashed)
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int, queue_timeout: float = 10):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.queue_ms_total = 0.0
+        self.queue_ms_max = 0.0
+        self.run_ms_total = 0.0
+
+    def _loop_slots(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        """Semáforo de vagas do event loop atual (criado no primeiro uso)."""
+        with self._lock:
+            slots = self._slots.get(loop)
+            if slots is None:
+                slots = self._slots[loop] = asyncio.Semaphore(self.max_pending)
+            return slots
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+            return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Executa `fn(*args)` numa thread do pool e aguarda sem bloquear o loop."""
+        requested_at = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        slots = self._loop_slots(loop)
+        try:
+            await asyncio.wait_for(slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please try again",
+                headers={"Retry-After": "1"},
+            )
+
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+        started_at = [requested_at]
+
+        def call():
+            started_at[0] = time.perf_counter()
+            return fn(*args)
+
+        try:
+            result = await loop.run_in_executor(self._pool(), call)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            finished_at = time.perf_counter()
+            slots.release()
+            queue_ms = (started_at[0] - requested_at) * 1000
+            with self._lock:
+                self.in_flight -= 1
+                self.queue_ms_total += queue_ms
+                self.queue_ms_max = max(self.queue_ms_max, queue_ms)
+                self.run_ms_total += (finished_at - started_at[0]) * 1000
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            done = self.completed + self.failed
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "in_flight": self.in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_queue_ms": round(self.queue_ms_total / done, 3) if done else None,
+                "max_queue_ms": round(self.queue_ms_max, 3),
+                "avg_run_ms": round(self.run_ms_total / done, 3) if done else None,
+            }
@@ -0,0 +1,220 @@
+import hashlib
+import math
+import os
+import sqlite3
+import struct
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+
+# ============================================================================
+# REVOGAÇÃO DE TOKENS (JTI): BLOOM FILTER + TABELA SQLITE
+# ============================================================================
+
+class BloomFilter:
+    """
+    Conjunto aproximado de tamanho fixo: sem falsos negativos, falsos
+    positivos em ~`error_rate` enquanto tiver até `capacity` itens.
+
+    `capacity=1_000_000, error_rate=0.001` ocupa ~1.8 MB (10 hashes por item).
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        # 32 bits por índice bastam até ~4 bilhões de bits (~300M itens); o
+        # blake2b entrega no máximo 64 bytes, o que limita o número de hashes
+        index_format = "I" if self.num_bits <= 2 ** 32 else "Q"
+        max_hashes = 64 // struct.calcsize(index_format)
+        self.num_hashes = min(max_hashes, max(1, round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.items = 0
+        index_struct = struct.Struct(f"<{self.num_hashes}{index_format}")
+        self._unpack = index_struct.unpack
+        self._unpack_size = index_struct.size
+
+    def _positions(self, item: str):
+        # k índices independentes fatiados de um único blake2b (desempacotados em C)
+        return [value % self.num_bits for value in self._unpack(
+            hashlib.blake2b(item.encode("utf-8"), digest_size=self._unpack_size).digest()
+        )]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.items += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits, num_bits = self.bits, self.num_bits
+        for value in self._unpack(hashlib.blake2b(item.encode("utf-8"), digest_size=self._unpack_size).digest()):
+            position = value % num_bits
+            # Não-membros param no primeiro bit zerado (~metade dos bits está zerada)
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class RevocationStore:
+    """
+    Tokens revogados por `jti`, compartilhados entre workers num arquivo SQLite.
+
+    - a tabela `revoked_tokens` é a fonte da verdade (uma linha por jti, até
+      o `exp` do token)
+    - cada processo mantém um Bloom filter com os jtis revogados: um token
+      que não está no filtro (quase todos) é aceito sem tocar no banco; só os
+      positivos (revogados + falsos positivos) consultam a tabela
+    - `sync()` puxa para o filtro as revogações feitas por outros workers
+      (seq incremental); `purge()` remove as expiradas e reconstrói o filtro
+      quando uma parte grande dele ficou obsoleta
+
+    Entre dois `sync()` outro worker ainda pode aceitar um token revogado;
+    o worker que revogou enxerga a revogação na hora.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS revoked_tokens (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            jti TEXT NOT NULL UNIQUE,
+            expires_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ix_revoked_tokens_expires_at ON revoked_tokens(expires_at);
+    """
+
+    def __init__(self, path: str, capacity: int = 1_000_000, error_rate: float = 0.001, timer=time.time):
+        # time.time (não monotonic): expires_at é o `exp` do JWT
+        self.path = path
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.timer = timer
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._last_seq = 0
+        self._stale = 0
+        self.checks = 0
+        self.db_lookups = 0
+        self.revoked_hits = 0
+        self.revocations = 0
+        self.purged = 0
+        self.rebuilds = 0
+        self._conn().executescript(self.SCHEMA)
+        self.sync()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def revoke(self, jti: str, expires_at: float) -> bool:
+        """
+        Revoga `jti` até `expires_at` (o exp do token).
+
+        Retorna False se ele já estava revogado: na rotação do refresh token
+        só o primeiro request com o token antigo ganha.
+        """
+        inserted = self._conn().execute(
+            "INSERT OR IGNORE INTO revoked_tokens (jti, expires_at) VALUES (?, ?)", (jti, expires_at)
+        ).rowcount == 1
+        with self._lock:
+            # Já gravado no banco antes de entrar no filtro: rebuild/sync não perdem
+            self._bloom.add(jti)
+            if inserted:
+                self.revocations += 1
+        return inserted
+
+    def is_revoked(self, jti: str) -> bool:
+        self.checks += 1
+        if jti not in self._bloom:
+            return False
+        self.db_lookups += 1
+        revoked = self._conn().execute("SELECT 1 FROM revoked_tokens WHERE jti = ?", (jti,)).fetchone() is not None
+        if revoked:
+            self.revoked_hits += 1
+        return revoked
+
+    def _add_since(self, bloom: BloomFilter, seq: int) -> int:
+        rows = self._conn().execute("SELECT seq, jti FROM revoked_tokens WHERE seq > ? ORDER BY seq", (seq,))
+        for seq, jti in rows:
+            bloom.add(jti)
+        return seq
+
+    def sync(self):
+        """Adiciona ao filtro as revogações gravadas desde o último sync (outros workers)."""
+        with self._lock:
+            self._last_seq = self._add_since(self._bloom, self._last_seq)
+
+    def purge(self) -> int:
+        """Remove jtis expirados; reconstrói o filtro se >= 1/4 dele ficou obsoleto."""
+        removed = self._conn().execute("DELETE FROM revoked_tokens WHERE expires_at <= ?", (self.timer(),)).rowcount
+        self.purged += removed
+        self._stale += removed
+        if self._stale and self._stale * 4 >= self._bloom.items:
+            self.rebuild()
+        return removed
+
+    def rebuild(self):
+        """Novo filtro só com as linhas atuais (fora do lock; só a troca é protegida)."""
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        seq = self._add_since(bloom, 0)
+        with self._lock:
+            # Revogações gravadas durante a leitura acima
+            self._last_seq = self._add_since(bloom, seq)
+            self._bloom = bloom
+            self._stale = 0
+            self.rebuilds += 1
+
+    def stats(self) -> Dict[str, Any]:
+        bloom = self._bloom
+        return {
+            "path": self.path,
+            "bloom_items": bloom.items,
+            "bloom_capacity": bloom.capacity,
+            "bloom_bytes": len(bloom.bits),
+            "bloom_hashes": bloom.num_hashes,
+            "checks": self.checks,
+            "db_lookups": self.db_lookups,
+            "revoked_hits": self.revoked_hits,
+            "false_positives": self.db_lookups - self.revoked_hits,
+            "revocations": self.revocations,
+            "purged": self.purged,
+            "rebuilds": self.rebuilds,
+        }
+
+
+# Arquivo compartilhado pelos workers (mesma convenção de cache.db / ratelimit.db)
+_DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "revoked_tokens.db")
+AUTH_REVOCATION_DB_PATH = os.getenv("AUTH_REVOCATION_DB_PATH", _DEFAULT_PATH)
+AUTH_REVOCATION_BLOOM_CAPACITY = int(os.getenv("AUTH_REVOCATION_BLOOM_CAPACITY", "1000000"))
+AUTH_REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("AUTH_REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+AUTH_REVOCATION_SYNC_SECONDS = float(os.getenv("AUTH_REVOCATION_SYNC_SECONDS", "1"))
+AUTH_REVOCATION_PURGE_SECONDS = float(os.getenv("AUTH_REVOCATION_PURGE_SECONDS", "3600"))
+
+revocation_store = RevocationStore(
+    AUTH_REVOCATION_DB_PATH, AUTH_REVOCATION_BLOOM_CAPACITY, AUTH_REVOCATION_BLOOM_ERROR_RATE
+)
+
+
+def revoke_token(token_data: Dict[str, Any]) -> bool:
+    """Revoga o token já verificado (saída de verify_token). Tokens sem jti são ignorados."""
+    if not token_data.get("jti"):
+        return False
+    return revocation_store.revoke(token_data["jti"], token_data["exp"])
+
+
+async def revoke_token_async(token_data: Dict[str, Any]) -> bool:
+    """revoke_token numa thread: o INSERT pode esperar o lock de escrita de outro worker (até 5 s)."""
+    return await run_in_threadpool(revoke_token, token_data)
+
+
+def is_token_revoked(token_data: Dict[str, Any]) -> bool:
+    # Tokens emitidos antes do jti não podem ser revogados (expiram sozinhos)
+    jti: Optional[str] = token_data.get("jti")
+    return bool(jti) and revocation_store.is_revoked(jti)
@@ -0,0 +1,101 @@
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from cache import defer_invalidation, get_cache
+from models.user import User
+
+
+# ============================================================================
+# CACHE DO USUÁRIO AUTENTICADO (GET_CURRENT_USER)
+# ============================================================================
+
+# TTL curto: é só rede de segurança; qualquer UPDATE/DELETE de User via ORM
+# invalida a entrada no commit. 0 desliga o cache.
+AUTH_USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60"))
+user_cache = get_cache().namespace("auth_user", ttl=AUTH_USER_CACHE_TTL_SECONDS)
+
+# Hash de senha não vai para o cache (pode ser o backend sqlite em disco)
+_CACHED_COLUMNS = [column.key for column in inspect(User).column_attrs if column.key != "hashed_password"]
+_DATETIME_COLUMNS = {"created_at", "updated_at"}
+
+# Chave em Session.info com os usuários a invalidar quando a transação commitar
+_DIRTY_USERS_KEY = "cache_dirty_users"
+
+
+def user_tag(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def invalidate_user(user_id: int) -> int:
+    """Remove o usuário do cache (para escritas fora do ORM)."""
+    return get_cache().invalidate_tag(user_tag(user_id))
+
+
+def _snapshot(user: User) -> Dict[str, Any]:
+    """Colunas do usuário em formato JSON-serializável."""
+    data = {key: getattr(user, key) for key in _CACHED_COLUMNS}
+    for key in _DATETIME_COLUMNS:
+        if data[key] is not None:
+            data[key] = data[key].isoformat()
+    return data
+
+
+def _restore(data: Dict[str, Any]) -> User:
+    values = dict(data)
+    for key in _DATETIME_COLUMNS:
+        if values[key] is not None:
+            values[key] = datetime.fromisoformat(values[key])
+    user = User(**values)
+    # Como se tivesse vindo de uma query: sem histórico de alterações
+    make_transient_to_detached(user)
+    return user
+
+
+async def load_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    """
+    Usuário `user_id` anexado à sessão do request.
+
+    No HIT o registro vem do cache e entra na sessão com merge(load=False),
+    sem SELECT: alterações + commit na rota continuam gerando o UPDATE.
+    """
+    if AUTH_USER_CACHE_TTL_SECONDS <= 0:
+        return await db.get(User, user_id)
+
+    key = str(user_id)
+    found, data = user_cache.lookup(key)
+    if found:
+        return await db.merge(_restore(data), load=False)
+
+    tags = [user_tag(user_id)]
+    versions = user_cache.versions(key, tags)
+    user = (await db.execute(select(User).where(User.id == user_id))).scalars().first()
+    if user is not None:
+        # Rejeitado se um commit invalidou o usuário durante a leitura
+        user_cache.set(key, _snapshot(user), tags=tags, versions=versions)
+    return user
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_user_dirty(mapper, connection, target: User):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_DIRTY_USERS_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session):
+    for user_id in session.info.pop(_DIRTY_USERS_KEY, ()):
+        defer_invalidation(invalidate_user, user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_invalidation(session: Session, previous_transaction):
+    # Rollback de SAVEPOINT não desfaz a transação externa
+    if not previous_transaction.nested:
+        session.info.pop(_DIRTY_USERS_KEY, None)
@@ -1,13 +1,22 @@
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Any, Dict, Optional, Tuple, Union
 from jose import JWTError, jwt
 from fastapi import HTTPException, status
 from pydantic import BaseModel
 import os
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from cachetools import TLRUCache
 from passlib.context import CryptContext
 import bcrypt
 from dotenv import load_dotenv
 
+from .executor import BoundedExecutor
+
 load_dotenv()
 
 # JWT Configuration
@@ -16,6 +25,185 @@ ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 
+# bcrypt custa ~100-300ms de CPU por chamada: roda fora do event loop, num
+# pool próprio com limite de chamadas pendentes (ver auth/executor.py)
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+AUTH_HASH_MAX_PENDING = int(os.getenv("AUTH_HASH_MAX_PENDING", str(AUTH_HASH_WORKERS * 16)))
+AUTH_HASH_QUEUE_TIMEOUT_SECONDS = float(os.getenv("AUTH_HASH_QUEUE_TIMEOUT_SECONDS", "10"))
+password_executor = BoundedExecutor(
+    "password-hash", AUTH_HASH_WORKERS, AUTH_HASH_MAX_PENDING, AUTH_HASH_QUEUE_TIMEOUT_SECONDS
+)
+
+# Tokens já verificados: sha256(token) -> claims, cada entrada vale até o
+# `exp` do próprio token. LRU limitado a AUTH_TOKEN_CACHE_SIZE (0 desliga).
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "4096"))
+
+class _TokenCache:
+    """LRU de claims já verificados (assinatura + exp) por hash do token."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = TLRUCache(maxsize=max(maxsize, 1), ttu=lambda _key, claims, _now: claims["exp"], timer=time.time)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        if self.maxsize <= 0:
+            return None
+        with self._lock:
+            claims = self._entries.get(self._key(token))
+            if claims is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return claims
+
+    def set(self, token: str, claims: Dict[str, Any]):
+        # Sem exp numérico não há como saber até quando o token vale
+        if self.maxsize <= 0 or not isinstance(claims.get("exp"), (int, float)):
+            return
+        with self._lock:
+            self._entries[self._key(token)] = claims
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+token_cache = _TokenCache(AUTH_TOKEN_CACHE_SIZE)
+
+# Custo do bcrypt: calibrado na subida do servidor para que uma verificação
+# leve ~AUTH_BCRYPT_TARGET_MS neste hardware (ver calibrate_bcrypt_rounds).
+# O primeiro worker calibra e grava o custo em AUTH_BCRYPT_CALIBRATION_PATH;
+# os outros reutilizam por AUTH_BCRYPT_CALIBRATION_TTL_HOURS.
+# AUTH_BCRYPT_ROUNDS fixa o custo e pula a calibração.
+AUTH_BCRYPT_TARGET_MS = float(os.getenv("AUTH_BCRYPT_TARGET_MS", "250"))
+AUTH_BCRYPT_MIN_ROUNDS = int(os.getenv("AUTH_BCRYPT_MIN_ROUNDS", "10"))
+AUTH_BCRYPT_MAX_ROUNDS = int(os.getenv("AUTH_BCRYPT_MAX_ROUNDS", "16"))
+AUTH_BCRYPT_ROUNDS = int(os.getenv("AUTH_BCRYPT_ROUNDS", "0"))
+AUTH_BCRYPT_CALIBRATION_TTL_HOURS = float(os.getenv("AUTH_BCRYPT_CALIBRATION_TTL_HOURS", "24"))
+_DEFAULT_CALIBRATION_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bcrypt_calibration.db")
+AUTH_BCRYPT_CALIBRATION_PATH = os.getenv("AUTH_BCRYPT_CALIBRATION_PATH", _DEFAULT_CALIBRATION_PATH)
+
+_bcrypt_lock = threading.Lock()
+_bcrypt_state: Dict[str, Any] = {
+    # Antes da calibração (CLIs, scripts): custo fixo ou o default do bcrypt
+    "rounds": AUTH_BCRYPT_ROUNDS or 12,
+    "source": "env" if AUTH_BCRYPT_ROUNDS else "default",
+    "target_ms": AUTH_BCRYPT_TARGET_MS,
+    "measured_ms": None,
+    "calibrated_at": None,
+    "calibration_ms": None,
+    "rehashed_cost": 0,
+    "rehashed_legacy": 0,
+}
+
+def _time_checkpw(rounds: int, samples: int) -> float:
+    """Menor tempo (ms) de um bcrypt.checkpw com `rounds`."""
+    password = b"calibration-password"
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+    best = math.inf
+    for _ in range(samples):
+        t0 = time.perf_counter()
+        bcrypt.checkpw(password, hashed)
+        best = min(best, (time.perf_counter() - t0) * 1000)
+    return best
+
+def _measure_bcrypt_rounds() -> Tuple[int, float]:
+    """(custo mais próximo de AUTH_BCRYPT_TARGET_MS, ms medidos nesse custo)."""
+    base_ms = _time_checkpw(AUTH_BCRYPT_MIN_ROUNDS, samples=3)
+    rounds = AUTH_BCRYPT_MIN_ROUNDS + round(math.log2(AUTH_BCRYPT_TARGET_MS / base_ms))
+    rounds = max(AUTH_BCRYPT_MIN_ROUNDS, min(AUTH_BCRYPT_MAX_ROUNDS, rounds))
+    measured_ms = base_ms if rounds == AUTH_BCRYPT_MIN_ROUNDS else _time_checkpw(rounds, samples=1)
+    return rounds, measured_ms
+
+def _shared_bcrypt_rounds(path: str) -> Tuple[int, float, float, str]:
+    """
+    Custo compartilhado entre os workers: (rounds, ms, calibrado em, origem).
+
+    A calibração roda dentro de BEGIN IMMEDIATE: workers que sobem juntos
+    esperam o primeiro e leem o mesmo custo, em vez de cada um arredondar
+    a própria medição (perto da fronteira, custos diferentes).
+    """
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+    try:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS bcrypt_calibration ("
+            "id INTEGER PRIMARY KEY CHECK (id = 1), rounds INTEGER NOT NULL, "
+            "measured_ms REAL NOT NULL, calibrated_at REAL NOT NULL)"
+        )
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT rounds, measured_ms, calibrated_at FROM bcrypt_calibration").fetchone()
+            if row and row[2] > time.time() - AUTH_BCRYPT_CALIBRATION_TTL_HOURS * 3600:
+                conn.execute("COMMIT")
+                return (*row, "shared")
+            rounds, measured_ms = _measure_bcrypt_rounds()
+            calibrated_at = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO bcrypt_calibration (id, rounds, measured_ms, calibrated_at) VALUES (1, ?, ?, ?)",
+                (rounds, measured_ms, calibrated_at),
+            )
+            conn.execute("COMMIT")
+            return rounds, measured_ms, calibrated_at, "calibrated"
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+def calibrate_bcrypt_rounds(shared_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Escolhe o custo do bcrypt mais próximo de AUTH_BCRYPT_TARGET_MS.
+
+    Mede o custo mínimo e extrapola (cada round a mais dobra o tempo), depois
+    confirma com uma medição no custo escolhido. Com `shared_path`, reutiliza
+    o custo que outro worker já gravou (ver _shared_bcrypt_rounds); se o
+    arquivo não estiver acessível, calibra só para este processo.
+    Bloqueante: rodar no pool de hashing durante o startup.
+    """
+    if AUTH_BCRYPT_ROUNDS:
+        return bcrypt_stats()
+    started_at = time.perf_counter()
+    shared = None
+    if shared_path:
+        try:
+            shared = _shared_bcrypt_rounds(shared_path)
+        except sqlite3.Error as e:
+            print(f"⚠️ Shared bcrypt calibration unavailable ({shared_path}): {str(e)}")
+    if shared is None:
+        rounds, measured_ms = _measure_bcrypt_rounds()
+        shared = (rounds, measured_ms, time.time(), "calibrated")
+    rounds, measured_ms, calibrated_at, source = shared
+    with _bcrypt_lock:
+        _bcrypt_state.update(
+            rounds=rounds,
+            source=source,
+            measured_ms=round(measured_ms, 1),
+            calibrated_at=datetime.utcfromtimestamp(calibrated_at).isoformat(),
+            calibration_ms=round((time.perf_counter() - started_at) * 1000, 1),
+        )
+    return bcrypt_stats()
+
+def bcrypt_stats() -> Dict[str, Any]:
+    with _bcrypt_lock:
+        return dict(_bcrypt_state)
+
 # Password hashing
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
@@ -24,16 +212,47 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
     except (ValueError, TypeError) as e:
         # Fallback para SHA256 (compatibilidade com dados existentes)
-        # TODO: Remover após migração completa para bcrypt (ver P0-002)
-        import hashlib
+        # Regravado como bcrypt no próximo login (ver password_needs_rehash)
         return hashlib.sha256(plain_password.encode()).hexdigest() == hashed_password
 
 def get_password_hash(password: str) -> str:
     """Hash a password."""
-    # Usar bcrypt para novos hashes
-    salt = bcrypt.gensalt()
+    # Usar bcrypt para novos hashes, com o custo calibrado
+    salt = bcrypt.gensalt(bcrypt_stats()["rounds"])
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Hash SHA256 legado ou bcrypt com custo diferente do calibrado.
+
+    Os workers da máquina dividem o mesmo custo (AUTH_BCRYPT_CALIBRATION_PATH),
+    então a senha não fica alternando entre custos a cada login.
+    """
+    parts = hashed_password.split("$")
+    if len(parts) != 4 or not parts[2].isdigit():
+        return True
+    return int(parts[2]) != bcrypt_stats()["rounds"]
+
+def rehash_password(plain_password: str, hashed_password: str) -> str:
+    """Novo hash (custo atual) de uma senha já verificada contra `hashed_password`."""
+    new_hash = get_password_hash(plain_password)
+    field = "rehashed_cost" if hashed_password.startswith("$2") else "rehashed_legacy"
+    with _bcrypt_lock:
+        _bcrypt_state[field] += 1
+    return new_hash
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password no pool de hashing (não bloqueia o event loop)."""
+    return await password_executor.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash no pool de hashing (não bloqueia o event loop)."""
+    return await password_executor.run(get_password_hash, password)
+
+async def rehash_password_async(plain_password: str, hashed_password: str) -> str:
+    """rehash_password no pool de hashing (não bloqueia o event loop)."""
+    return await password_executor.run(rehash_password, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create an access token."""
     to_encode = data.copy()
@@ -42,7 +261,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire, "type": "access"})
+    # jti: identifica o token na revogação (auth/revocation.py)
+    to_encode.update({"exp": expire, "type": "access", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -50,14 +270,17 @@ def create_refresh_token(data: dict):
     """Create a refresh token."""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 def verify_token(token: str, token_type: str = "access") -> dict:
     """Verify and decode a JWT token."""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_cache.get(token)
+        if payload is None:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            token_cache.set(token, payload)
         email: str = payload.get("sub")
         user_id: int = payload.get("user_id")
         token_type_from_payload: str = payload.get("type")
@@ -76,7 +299,7 @@ def verify_token(token: str, token_type: str = "access") -> dict:
                 headers={"WWW-Authenticate": "Bearer"},
             )
             
-        return {"email": email, "user_id": user_id}
+        return {"email": email, "user_id": user_id, "jti": payload.get("jti"), "exp": payload.get("exp")}
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
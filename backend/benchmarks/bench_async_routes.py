@@ -0,0 +1,144 @@
+"""
+Benchmark: rotas síncronas no threadpool vs. rotas async com AsyncSession.
+
+Mesma consulta de GET /api/v1/appointments/ (COUNT + página ordenada) em
+dois modelos, sob `--concurrency` clientes simultâneos:
+
+- threadpool: `def` + Session síncrona (como as rotas eram antes), cada
+  request ocupa uma thread do threadpool do Starlette (40 por padrão)
+- async:      a rota real do main.py (`async def` + AsyncSession/aiosqlite),
+  o event loop espera o banco sem ocupar thread de request
+
+Os requests passam pelo ASGI em processo (httpx.ASGITransport), sem rede.
+
+Uso:
+    cd backend
+    python benchmarks/bench_async_routes.py --rows 50000 --concurrency 64 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import httpx
+from fastapi import Depends, FastAPI, Query
+from sqlalchemy.orm import Session
+
+from bench_mega_stats import TENANT, populate
+
+
+def sync_app(session_factory) -> FastAPI:
+    """App com a versão síncrona da listagem (threadpool)."""
+    from models.appointment import Appointment
+    from schemas.appointment import AppointmentPaginatedResponse
+
+    app = FastAPI()
+
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @app.get("/api/v1/appointments/", response_model=AppointmentPaginatedResponse)
+    def list_appointments(
+        tenantId: str = Query(...),
+        page: int = Query(1, ge=1),
+        page_size: int = Query(50, ge=1, le=100),
+        db: Session = Depends(get_db),
+    ):
+        query = db.query(Appointment).filter(Appointment.tenant_id == tenantId)
+        total = query.count()
+        appointments = (
+            query
+            .order_by(Appointment.starts_at)
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+            .all()
+        )
+        return AppointmentPaginatedResponse(
+            data=appointments,
+            total=total,
+            page=page,
+            page_size=page_size,
+            total_pages=(total + page_size - 1) // page_size,
+        )
+
+    return app
+
+
+async def run(app, concurrency: int, requests: int, pages: int):
+    latencies = []
+    counter = iter(range(requests))
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for i in counter:
+                params = {"tenantId": TENANT, "page": i % pages + 1, "page_size": 50}
+                t0 = time.perf_counter()
+                r = await client.get("/api/v1/appointments/", params=params)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                assert r.status_code == 200, r.text
+
+        # Aquecimento (pools e caches do SQLite)
+        await client.get("/api/v1/appointments/", params={"tenantId": TENANT})
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+
+    q = statistics.quantiles(latencies, n=100)
+    return {"rps": len(latencies) / elapsed, "p50": q[49], "p99": q[98]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--pages", type=int, default=20, help="páginas distintas consultadas")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        populate(db_path, args.rows, noise_tenants=0)
+        # O populate não preenche timestamps; o response model exige
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE appointments SET created_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP")
+        conn.commit()
+        conn.close()
+        print(f"[OK] {args.rows} appointments")
+
+        # main.py monta os engines (sync e async) a partir do ambiente
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+        os.environ["STATS_PREWARM_ENABLED"] = "false"
+        import main
+
+        results = {}
+        results["threadpool"] = asyncio.run(run(
+            sync_app(main.ReadSessionLocal or main.SessionLocal), args.concurrency, args.requests, args.pages
+        ))
+        print("[OK] threadpool")
+        results["async"] = asyncio.run(run(main.app, args.concurrency, args.requests, args.pages))
+        print("[OK] async")
+        main.engine.dispose()
+
+    print("=" * 58)
+    print(f"GET /appointments (COUNT + página de 50), {args.concurrency} clientes, {args.requests} requests")
+    print(f"{'modelo':<14}{'req/s':>12}{'p50 (ms)':>12}{'p99 (ms)':>12}")
+    for label, r in results.items():
+        print(f"{label:<14}{r['rps']:>12.1f}{r['p50']:>12.1f}{r['p99']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
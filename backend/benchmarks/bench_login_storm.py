@@ -0,0 +1,98 @@
+"""
+Benchmark: latência de um endpoint barato durante uma rajada de logins.
+
+`--logins` verificações bcrypt concorrentes (o trabalho do POST /auth/login)
+enquanto um cliente faz GETs sequenciais num endpoint trivial (/health).
+Compara bcrypt direto na rota async (o loop trava a cada verificação) com o
+pool de hashing (auth.utils.verify_password_async).
+
+Uso:
+    cd backend
+    python benchmarks/bench_login_storm.py --logins 40
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+from fastapi import FastAPI
+
+from auth.utils import get_password_hash, password_executor, verify_password, verify_password_async
+
+PASSWORD = "Senha123!"
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    hashed = get_password_hash(PASSWORD)
+
+    @app.post("/login-inline")
+    async def login_inline():
+        return {"ok": verify_password(PASSWORD, hashed)}
+
+    @app.post("/login-executor")
+    async def login_executor():
+        return {"ok": await verify_password_async(PASSWORD, hashed)}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return app
+
+
+async def run(app: FastAPI, login_path: str, logins: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        health_ms = []
+        storm_done = asyncio.Event()
+
+        async def prober():
+            while not storm_done.is_set():
+                t0 = time.perf_counter()
+                await client.get("/health")
+                health_ms.append((time.perf_counter() - t0) * 1000)
+                await asyncio.sleep(0.005)
+
+        async def storm():
+            t0 = time.perf_counter()
+            results = await asyncio.gather(*(client.post(login_path) for _ in range(logins)))
+            storm_done.set()
+            assert all(r.json()["ok"] for r in results)
+            return time.perf_counter() - t0
+
+        probe = asyncio.create_task(prober())
+        elapsed = await storm()
+        await probe
+
+    q = statistics.quantiles(health_ms, n=100) if len(health_ms) > 1 else health_ms * 99
+    return {"storm_s": elapsed, "probes": len(health_ms), "p50": q[49], "max": max(health_ms)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40)
+    args = parser.parse_args()
+
+    app = build_app()
+    results = {
+        "inline": asyncio.run(run(app, "/login-inline", args.logins)),
+        "executor": asyncio.run(run(app, "/login-executor", args.logins)),
+    }
+    print("=" * 68)
+    print(f"{args.logins} logins concorrentes, GET /health em paralelo")
+    print(f"{'bcrypt':<10}{'rajada (s)':>12}{'GETs /health':>14}{'p50 (ms)':>12}{'max (ms)':>12}")
+    for label, r in results.items():
+        print(f"{label:<10}{r['storm_s']:>12.2f}{r['probes']:>14}{r['p50']:>12.1f}{r['max']:>12.1f}")
+    print(f"pool: {password_executor.stats()}")
+    password_executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark: mega_stats com 4 queries (uma por janela) vs. varredura única.
+
+Cria um banco SQLite temporário com N appointments para um tenant
+(default: 1.000.000) e mede as duas estratégias de agregação.
+
+Uso:
+    cd backend
+    python benchmarks/bench_mega_stats.py --rows 1000000 --repeat 5
+"""
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, func, case
+from sqlalchemy.orm import sessionmaker
+
+import models  # noqa: F401 - registra todas as tabelas no metadata
+from models.user import Base
+from models.appointment import Appointment
+from routes.appointments import _count_buckets, _stats_windows
+
+TENANT = "bench-tenant"
+STATUSES = ["pending", "confirmed", "cancelled"]
+
+
+def _count_bucket_legacy(db, tenant_id, start_local, end_local):
+    """Caminho anterior: 1 query por janela (P1-002)."""
+    UTC = ZoneInfo("UTC")
+    result = db.query(
+        func.sum(case((Appointment.status == "confirmed", 1), else_=0)).label("confirmed"),
+        func.sum(case((Appointment.status == "pending", 1), else_=0)).label("pending"),
+    ).filter(
+        Appointment.tenant_id == tenant_id,
+        Appointment.starts_at >= start_local.astimezone(UTC),
+        Appointment.starts_at < end_local.astimezone(UTC),
+        Appointment.status.in_(["confirmed", "pending"]),
+    ).first()
+    return {"confirmed": result.confirmed or 0, "pending": result.pending or 0}
+
+
+def populate(db_path: Path, rows: int, noise_tenants: int):
+    """Insere appointments espalhados em ±1 ano ao redor de hoje."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO patients (id, tenant_id, name, cpf, phone, address) "
+        "VALUES (1, ?, 'Paciente Bench', '12345678901', '81999999999', 'Rua Bench 1')",
+        (TENANT,),
+    )
+    now = datetime.utcnow()
+    rng = random.Random(42)
+    tenants = [TENANT] + [f"noise-{i}" for i in range(noise_tenants)]
+
+    def generate():
+        for _ in range(rows):
+            starts_at = now + timedelta(minutes=rng.randint(-525_600, 525_600))
+            yield (
+                rng.choice(tenants) if noise_tenants else TENANT,
+                1,
+                starts_at.strftime("%Y-%m-%d %H:%M:%S.000000"),
+                30,
+                rng.choice(STATUSES),
+            )
+
+    conn.executemany(
+        "INSERT INTO appointments (tenant_id, patient_id, starts_at, duration_min, status) "
+        "VALUES (?, ?, ?, ?, ?)",
+        generate(),
+    )
+    conn.commit()
+    conn.close()
+
+
+def timed(fn, repeat: int):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return result, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--noise-tenants", type=int, default=0, help="Outros tenants no mesmo banco")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tz", default="America/Recife")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        print(f"[SETUP] Populando {args.rows:,} appointments em {db_path} ...")
+        t0 = time.perf_counter()
+        populate(db_path, args.rows, args.noise_tenants)
+        print(f"[SETUP] Concluído em {time.perf_counter() - t0:.1f}s")
+
+        engine = create_engine(f"sqlite:///{db_path}")
+        db = sessionmaker(bind=engine)()
+        windows = _stats_windows(datetime.now(ZoneInfo(args.tz)))
+
+        legacy, legacy_ms = timed(
+            lambda: {name: _count_bucket_legacy(db, TENANT, s, e) for name, (s, e) in windows.items()},
+            args.repeat,
+        )
+        single, single_ms = timed(lambda: _count_buckets(db, TENANT, windows), args.repeat)
+        db.close()
+        engine.dispose()
+
+    assert legacy == single, f"Resultados divergentes:\n{legacy}\n{single}"
+
+    print("=" * 60)
+    print(f"{'estratégia':<20}{'mediana (ms)':>15}{'mín (ms)':>12}{'máx (ms)':>12}")
+    for label, samples in (("4 queries", legacy_ms), ("varredura única", single_ms)):
+        print(f"{label:<20}{statistics.median(samples):>15.1f}{min(samples):>12.1f}{max(samples):>12.1f}")
+    print(f"Speedup (mediana): {statistics.median(legacy_ms) / statistics.median(single_ms):.2f}x")
+    print(f"Resultado: {single}")
+
+
+if __name__ == "__main__":
+    main()
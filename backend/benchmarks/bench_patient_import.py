@@ -0,0 +1,114 @@
+"""
+Benchmark: importação em lote de pacientes vs. um POST /v1/patients por paciente.
+
+Gera um CSV com `--rows` pacientes (alguns inválidos/duplicados) e mede:
+
+- por paciente: o que create_patient faz hoje (SELECT do CPF, INSERT, commit
+  e o SELECT de verificação), só nos primeiros `--single-rows` e extrapolado
+- importador:   PatientImporter (validação, SELECT ... IN e INSERT em lote por chunk)
+
+Os dois bancos têm o índice FTS5 (triggers) de models/patient.py.
+
+Uso:
+    cd backend
+    python benchmarks/bench_patient_import.py --rows 100000 --chunk-size 1000
+"""
+import argparse
+import csv
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+import models  # noqa: F401 - registra todas as tabelas no metadata
+from models.patient import Patient
+from models.user import Base
+from utils.patient_import import PatientImporter, read_records
+
+TENANT = "bench-tenant"
+FIRST = ["João", "Maria", "José", "Ana", "Antônio", "Francisca", "Carlos", "Conceição", "Paulo", "Luíza"]
+LAST = ["Silva", "Santos", "Oliveira", "Souza", "Ferreira", "Araújo", "Cavalcanti", "Albuquerque"]
+
+
+def write_csv(path: Path, rows: int):
+    rng = random.Random(42)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "cpf", "phone", "email", "address", "notes"])
+        for i in range(rows):
+            cpf = f"{10**10 + i:011d}"
+            if i % 1000 == 999:
+                cpf = f"{10**10 + i - 1:011d}"  # duplicado no arquivo
+            name = f"{rng.choice(FIRST)} {rng.choice(LAST)} {rng.choice(LAST)}"
+            writer.writerow([name, cpf, "(81) 99999-0000", f"p{i}@exemplo.com.br", "Rua Bench, 100", ""])
+
+
+def new_engine(path: Path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def single_inserts(engine, csv_path: Path, limit: int) -> float:
+    """Segundos para `limit` pacientes no fluxo de create_patient."""
+    importer = PatientImporter(TENANT, chunk_size=1)
+    t0 = time.perf_counter()
+    with open(csv_path, "rb") as stream, Session(engine) as db:
+        for count, [(_, values)] in enumerate(importer.chunks(read_records(stream, "csv")), 1):
+            exists = db.query(Patient).filter(Patient.cpf == values["cpf"], Patient.tenant_id == TENANT).first()
+            if exists is None:
+                # values já vem validado pelo PatientBase, com name_key
+                patient = Patient(**values)
+                db.add(patient)
+                db.commit()
+                db.execute(select(Patient).where(Patient.id == patient.id)).scalars().first()
+            if count >= limit:
+                break
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--single-rows", type=int, default=2_000, help="pacientes medidos no fluxo por paciente")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "pacientes.csv"
+        write_csv(csv_path, args.rows)
+
+        engine = new_engine(Path(tmp) / "single.db")
+        single_s = single_inserts(engine, csv_path, args.single_rows)
+        engine.dispose()
+
+        engine = new_engine(Path(tmp) / "bulk.db")
+        importer = PatientImporter(TENANT, chunk_size=args.chunk_size)
+        with open(csv_path, "rb") as stream:
+            for chunk in importer.chunks(read_records(stream, "csv")):
+                with Session(engine) as db:
+                    importer.insert_chunk(db, chunk)
+                    db.commit()
+        report = importer.report()
+        engine.dispose()
+
+    single_rate = args.single_rows / single_s
+    bulk_rate = report["created"] / (report["elapsed_ms"] / 1000)
+    print("=" * 60)
+    print(f"{args.rows} linhas no CSV, chunks de {args.chunk_size}")
+    print(f"{'modo':<14}{'pacientes/s':>14}{f'{args.rows} linhas (s)':>22}")
+    print(f"{'por paciente':<14}{single_rate:>14.0f}{args.rows / single_rate:>21.1f}*")
+    print(f"{'importador':<14}{bulk_rate:>14.0f}{report['elapsed_ms'] / 1000:>22.1f}")
+    print(f"importador: {report['created']} criados, {report['failed']} rejeitados  "
+          f"(* extrapolado de {args.single_rows} pacientes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark: busca de pacientes com LIKE '%termo%' vs. índice FTS5.
+
+Popula `--rows` pacientes num tenant (mais ruído em outros tenants) e roda,
+para cada termo digitado, o mesmo par de consultas de GET /v1/patients
+(COUNT + página de 50):
+
+- like: `name ILIKE '%termo%' OR cpf LIKE '%dígitos%'`, ordenado por nome
+- fts:  COUNT com `id IN (MATCH '"termo"*')`, página ordenada por relevância
+
+Uso:
+    cd backend
+    python benchmarks/bench_patient_search.py --rows 100000 --repeat 20
+"""
+import argparse
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+import models  # noqa: F401 - registra todas as tabelas no metadata
+from models.patient import Patient
+from models.user import Base
+from utils.patient_search import build_match_query, matching_ids, ranked_hits
+from utils.text import normalize_name
+
+TENANT = "bench-tenant"
+FIRST = ["João", "Maria", "José", "Ana", "Antônio", "Francisca", "Carlos", "Conceição", "Paulo", "Luíza",
+         "Pedro", "Raimunda", "Lucas", "Sebastião", "Juliana", "Marcos", "Gabriela", "Tiago", "Beatriz", "Renato"]
+LAST = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+        "Ribeiro", "Carvalho", "Araújo", "Barbosa", "Cavalcanti", "Albuquerque", "Nascimento", "Moura"]
+TERMS = ["ma", "mari", "maria", "maria silva", "conceição sil", "albuq", "123", "(81) 9123", "zzz"]
+
+
+def populate(db_path: Path, rows: int, noise: int):
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    rng = random.Random(42)
+
+    def generate():
+        for i in range(rows + noise):
+            name = f"{rng.choice(FIRST)} {rng.choice(LAST)} {rng.choice(LAST)}"
+            yield (
+                TENANT if i < rows else f"noise-{i % 10}",
+                name,
+                normalize_name(name),
+                f"{rng.randrange(10**10, 10**11):011d}",
+                f"(81) 9{rng.randrange(10**7, 10**8)}",
+                f"{name.split()[0].lower()}{i}@exemplo.com.br",
+                "Rua Bench 1",
+            )
+
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO patients (tenant_id, name, name_key, cpf, phone, email, address) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        generate(),
+    )
+    conn.commit()
+    conn.close()
+
+
+def like_query(term: str):
+    """(consulta filtrada, consulta da página ordenada)"""
+    query = select(Patient).where(Patient.tenant_id == TENANT)
+    digits = re.sub(r"\D", "", term)
+    search_filter = Patient.name.ilike(f"%{term}%")
+    if digits:
+        search_filter = search_filter | Patient.cpf.like(f"%{digits}%")
+    query = query.where(search_filter)
+    return query, query.order_by(Patient.name)
+
+
+def fts_query(term: str):
+    """(consulta filtrada, consulta da página ordenada)"""
+    query = select(Patient).where(Patient.tenant_id == TENANT)
+    match_query = build_match_query(term)
+    hits = ranked_hits(match_query)
+    return (
+        query.where(Patient.id.in_(matching_ids(match_query))),
+        query.join(hits, hits.c.rowid == Patient.id).order_by(hits.c.rank, Patient.name),
+    )
+
+
+def run(db: Session, build, term: str, repeat: int):
+    """(ms por busca, total encontrado)"""
+    query, page = build(term)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        total = db.execute(select(func.count()).select_from(query.subquery())).scalar_one()
+        db.execute(page.limit(50)).scalars().all()
+    return (time.perf_counter() - t0) / repeat * 1000, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="pacientes do tenant medido")
+    parser.add_argument("--noise", type=int, default=100_000, help="pacientes de outros tenants")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        t0 = time.perf_counter()
+        populate(db_path, args.rows, args.noise)
+        print(f"[OK] {args.rows} + {args.noise} pacientes (com triggers do FTS) em {time.perf_counter() - t0:.1f}s")
+
+        engine = create_engine(f"sqlite:///{db_path}")
+        with Session(engine) as db:
+            results = [(term, run(db, like_query, term, args.repeat), run(db, fts_query, term, args.repeat))
+                       for term in TERMS]
+        engine.dispose()
+
+    print("=" * 70)
+    print(f"COUNT + página de 50, tenant com {args.rows} pacientes, {args.repeat} repetições")
+    print(f"{'termo':<16}{'like (ms)':>12}{'achados':>10}{'fts (ms)':>12}{'achados':>10}{'ganho':>10}")
+    for term, (like_ms, like_total), (fts_ms, fts_total) in results:
+        print(f"{term:<16}{like_ms:>12.2f}{like_total:>10}{fts_ms:>12.2f}{fts_total:>10}{like_ms / fts_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
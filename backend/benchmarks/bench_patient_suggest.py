@@ -0,0 +1,106 @@
+"""
+Benchmark: autocomplete de pacientes pelo índice de prefixos em memória.
+
+Monta o TenantSuggestIndex de um tenant com `--rows` pacientes e mede, para
+cada tecla digitada de alguns nomes/CPFs:
+
+- suggest:  TenantSuggestIndex.search (o que GET /v1/patients/suggest faz por request)
+- fts:      o mesmo termo em GET /v1/patients (COUNT + página de 10 pelo FTS5)
+
+Também mede a montagem do índice, add/remove incrementais e a memória.
+
+Uso:
+    cd backend
+    python benchmarks/bench_patient_suggest.py --rows 100000 --repeat 200
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from bench_patient_search import TENANT, fts_query, populate
+from models.patient import Patient
+from utils.patient_suggest import TenantSuggestIndex
+
+WORDS = ["maria", "conceição", "albuquerque", "joão silva", "123456"]
+
+
+def keystrokes(word: str) -> list:
+    return [word[:i] for i in range(1, len(word) + 1)]
+
+
+def timed_us(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="pacientes do tenant medido")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--fts-repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        populate(db_path, args.rows, 0)
+        engine = create_engine(f"sqlite:///{db_path}")
+        with Session(engine) as db:
+            rows = db.execute(
+                select(Patient.id, Patient.name, Patient.name_key, Patient.cpf, Patient.phone)
+                .where(Patient.tenant_id == TENANT)
+            ).all()
+
+            t0 = time.perf_counter()
+            index = TenantSuggestIndex.build(rows)
+            build_ms = (time.perf_counter() - t0) * 1000
+            # Memória medida numa segunda montagem (tracemalloc deixa a montagem lenta)
+            tracemalloc.start()
+            measured = TenantSuggestIndex.build(rows)
+            memory_mb = tracemalloc.get_traced_memory()[0] / 1e6
+            tracemalloc.stop()
+            del measured
+
+            results = []
+            for word in WORDS:
+                for prefix in keystrokes(word):
+                    suggest_us = timed_us(lambda: index.search(prefix, 10), args.repeat)
+                    query, page = fts_query(prefix)
+
+                    def fts():
+                        db.execute(select(func.count()).select_from(query.subquery())).scalar_one()
+                        db.execute(page.limit(10)).all()
+
+                    results.append((prefix, suggest_us, timed_us(fts, args.fts_repeat)))
+
+            rng = random.Random(7)
+            ids = rng.sample(list(index.records), min(1000, len(index.records)))
+            t0 = time.perf_counter()
+            for patient_id in ids:
+                name, name_key, cpf, phone = index.records[patient_id]
+                index.remove(patient_id)
+                index.add(patient_id, name, name_key, cpf, phone)
+            update_us = (time.perf_counter() - t0) / len(ids) * 1e6
+        engine.dispose()
+
+    print("=" * 60)
+    print(f"{args.rows} pacientes: índice com {index.size} chaves, montado em {build_ms:.0f} ms, ~{memory_mb:.0f} MB")
+    print(f"remove + add incremental: {update_us:.1f} µs por paciente")
+    print(f"{'digitado':<16}{'suggest (µs)':>14}{'fts (µs)':>14}{'ganho':>10}")
+    for prefix, suggest_us, fts_us in results:
+        print(f"{prefix:<16}{suggest_us:>14.1f}{fts_us:>14.0f}{fts_us / suggest_us:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
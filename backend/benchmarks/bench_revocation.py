@@ -0,0 +1,87 @@
+"""
+Benchmark: checagem de revogação de tokens com milhões de jtis revogados.
+
+Grava `--revoked` jtis na tabela revoked_tokens, sobe um RevocationStore
+(carga do Bloom filter) e mede `--checks` verificações:
+
+- sqlite:  só a tabela (SELECT por jti em todo request)
+- bloom:   RevocationStore.is_revoked; tokens válidos param no filtro
+
+Uso:
+    cd backend
+    python benchmarks/bench_revocation.py --revoked 1000000 --checks 100000
+"""
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from auth.revocation import RevocationStore
+
+
+def populate(path: Path, revoked: int) -> list:
+    conn = sqlite3.connect(path)
+    conn.executescript(RevocationStore.SCHEMA)
+    expires_at = time.time() + 7 * 24 * 3600
+    jtis = [uuid.uuid4().hex for _ in range(revoked)]
+    conn.executemany("INSERT INTO revoked_tokens (jti, expires_at) VALUES (?, ?)", ((j, expires_at) for j in jtis))
+    conn.commit()
+    conn.close()
+    return jtis
+
+
+def timed(fn, items) -> float:
+    """Microssegundos por chamada."""
+    t0 = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - t0) / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--revoked", type=int, default=1_000_000)
+    parser.add_argument("--checks", type=int, default=100_000)
+    parser.add_argument("--capacity", type=int, default=1_000_000, help="capacidade do Bloom filter")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "revoked_tokens.db"
+        revoked = populate(path, args.revoked)
+        print(f"[OK] {args.revoked} jtis revogados")
+
+        t0 = time.perf_counter()
+        store = RevocationStore(str(path), capacity=args.capacity)
+        load_s = time.perf_counter() - t0
+
+        valid = [uuid.uuid4().hex for _ in range(args.checks)]
+        sample = revoked[:args.checks]
+        conn = sqlite3.connect(path)
+
+        def sqlite_only(jti):
+            return conn.execute("SELECT 1 FROM revoked_tokens WHERE jti = ?", (jti,)).fetchone() is not None
+
+        results = {
+            "sqlite": (timed(sqlite_only, valid), timed(sqlite_only, sample)),
+            "bloom": (timed(store.is_revoked, valid), timed(store.is_revoked, sample)),
+        }
+        stats = store.stats()
+
+    print("=" * 60)
+    print(f"{args.revoked} revogados, {args.checks} checagens por tipo de token")
+    print(f"{'modo':<10}{'válido (µs)':>16}{'revogado (µs)':>16}")
+    for label, (valid_us, revoked_us) in results.items():
+        print(f"{label:<10}{valid_us:>16.2f}{revoked_us:>16.2f}")
+    false_positives = stats["false_positives"]
+    print(f"carga do filtro: {load_s:.2f}s  memória: {stats['bloom_bytes'] / 1e6:.1f} MB  "
+          f"falsos positivos: {false_positives}/{args.checks} ({false_positives / args.checks:.4%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Benchmark: perfil de produção do SQLite (database/sqlite.py), pragma a pragma.
+
+Roda a mesma carga concorrente (leitores de mega_stats + listagem ordenada,
+escritores criando appointments com commit) contra:
+  - legado: configuração antiga do main.py (journal DELETE, só timeout=30)
+  - produção: todos os pragmas de DEFAULT_PRAGMAS
+  - produção sem X: um pragma de volta ao default do SQLite por vez,
+    para isolar o ganho de cada configuração
+
+Cada perfil roda em uma cópia nova do mesmo banco populado.
+
+Uso:
+    cd backend
+    python benchmarks/bench_sqlite_profile.py --rows 200000 --readers 4 --writers 2 --seconds 5
+"""
+import argparse
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from bench_mega_stats import TENANT, populate
+from database.sqlite import DEFAULT_PRAGMAS, create_db_engine
+from models.appointment import Appointment
+from routes.appointments import _count_buckets, _stats_windows
+
+# Valor default do SQLite usado na ablação de cada pragma
+SQLITE_DEFAULTS = {
+    "busy_timeout": 0,
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "cache_size": -2000,
+    "mmap_size": 0,
+    "temp_store": "DEFAULT",
+}
+
+
+def profiles():
+    result = [
+        ("legado (main.py antigo)", {"busy_timeout": 30000}),
+        ("produção", dict(DEFAULT_PRAGMAS)),
+    ]
+    for name in DEFAULT_PRAGMAS:
+        result.append((f"sem {name}", {**DEFAULT_PRAGMAS, name: SQLITE_DEFAULTS[name]}))
+    return result
+
+
+def run_workload(db_path: Path, pragmas, readers: int, writers: int, seconds: float, tz: str):
+    engine = create_db_engine(
+        f"sqlite:///{db_path}",
+        pragmas=pragmas,
+        pool={"pool_size": readers + writers, "max_overflow": 0, "pool_pre_ping": False},
+    )
+    Session = sessionmaker(bind=engine)
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {"reads": 0, "writes": 0, "read_errors": 0, "write_errors": 0}
+    read_ms, write_ms = [], []
+
+    def reader(seed: int):
+        rng = random.Random(seed)
+        db = Session()
+        try:
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                try:
+                    _count_buckets(db, TENANT, _stats_windows(datetime.now(ZoneInfo(tz))))
+                    # ORDER BY fora de índice: exercita temp_store e cache_size
+                    db.query(Appointment).filter(Appointment.tenant_id == TENANT).order_by(
+                        Appointment.duration_min, Appointment.status, Appointment.starts_at
+                    ).offset(rng.randint(0, 1000)).limit(50).all()
+                    db.rollback()
+                    elapsed = (time.perf_counter() - t0) * 1000
+                    with lock:
+                        stats["reads"] += 1
+                        read_ms.append(elapsed)
+                except OperationalError:
+                    db.rollback()
+                    with lock:
+                        stats["read_errors"] += 1
+        finally:
+            db.close()
+
+    def writer(seed: int):
+        rng = random.Random(seed)
+        db = Session()
+        try:
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                try:
+                    db.add(Appointment(
+                        tenant_id=TENANT,
+                        patient_id=1,
+                        starts_at=datetime.utcnow() + timedelta(minutes=rng.randint(0, 43_200)),
+                        duration_min=30,
+                        status="pending",
+                    ))
+                    db.commit()
+                    elapsed = (time.perf_counter() - t0) * 1000
+                    with lock:
+                        stats["writes"] += 1
+                        write_ms.append(elapsed)
+                except OperationalError:
+                    db.rollback()
+                    with lock:
+                        stats["write_errors"] += 1
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(100 + i,)) for i in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    def p95(samples):
+        return statistics.quantiles(samples, n=20)[-1] if len(samples) >= 2 else float("nan")
+
+    return {
+        "reads_s": stats["reads"] / seconds,
+        "writes_s": stats["writes"] / seconds,
+        "read_p95": p95(read_ms),
+        "write_p95": p95(write_ms),
+        "errors": stats["read_errors"] + stats["write_errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--tz", default="America/Recife")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp) / "base.db"
+        print(f"[SETUP] Populando {args.rows:,} appointments ...")
+        populate(base, args.rows, noise_tenants=3)
+        print(f"[SETUP] {args.readers} leitores, {args.writers} escritores, {args.seconds}s por perfil")
+
+        results = []
+        for label, pragmas in profiles():
+            db_path = Path(tmp) / "run.db"
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+            shutil.copy(base, db_path)
+            results.append((label, run_workload(db_path, pragmas, args.readers, args.writers, args.seconds, args.tz)))
+            print(f"[OK] {label}")
+
+    print("=" * 86)
+    print(f"{'perfil':<26}{'leituras/s':>12}{'p95 leit.(ms)':>15}{'escritas/s':>12}{'p95 escr.(ms)':>15}{'erros lock':>12}")
+    for label, r in results:
+        print(
+            f"{label:<26}{r['reads_s']:>12.1f}{r['read_p95']:>15.1f}"
+            f"{r['writes_s']:>12.1f}{r['write_p95']:>15.1f}{r['errors']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
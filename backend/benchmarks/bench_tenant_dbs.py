@@ -0,0 +1,136 @@
+"""
+Benchmark: escritas de vários tenants num banco compartilhado vs. um
+arquivo por tenant (database/tenancy.py).
+
+Cada tenant tem `--writers-per-tenant` threads criando appointments com
+commit individual (como create_appointment sem fila). No modo compartilhado
+todas disputam o mesmo lock de escrita; no modo por tenant só as do
+mesmo tenant.
+
+Uso:
+    cd backend
+    python benchmarks/bench_tenant_dbs.py --tenants 8 --writers-per-tenant 2 --ops 4000
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import models  # noqa: F401 - registra todas as tabelas no metadata
+from database.sqlite import create_db_engine
+from database.tenancy import TenantEngines, TenantSessionRouter
+from models.appointment import Appointment
+from models.patient import Patient
+from models.user import Base
+from utils.rollup import bump_rollup
+
+
+def run(open_session, tenants, writers_per_tenant: int, ops: int):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    counter = iter(range(ops))
+
+    def worker(tenant_id: str, seed: int):
+        rng = random.Random(seed)
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    return
+            starts_at = datetime.utcnow() + timedelta(minutes=rng.randint(0, 43_200))
+            t0 = time.perf_counter()
+            db = open_session(tenant_id)
+            try:
+                db.add(Appointment(tenant_id=tenant_id, patient_id=1, starts_at=starts_at, duration_min=30, status="pending"))
+                bump_rollup(db, tenant_id, starts_at, None, "pending", +1)
+                db.commit()
+                with lock:
+                    latencies.append((time.perf_counter() - t0) * 1000)
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    errors[0] += 1
+            finally:
+                db.close()
+
+    threads = [
+        threading.Thread(target=worker, args=(tenant_id, i * 100 + j))
+        for i, tenant_id in enumerate(tenants)
+        for j in range(writers_per_tenant)
+    ]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    q = statistics.quantiles(latencies, n=100)
+    return {"ops_s": len(latencies) / elapsed, "p50": q[49], "p99": q[98], "errors": errors[0]}
+
+
+def seed_patient(db, tenant_id: str):
+    db.add(Patient(id=1, tenant_id=tenant_id, name="Paciente Bench", cpf="12345678901",
+                   phone="81999999999", address="Rua Bench 1"))
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=8)
+    parser.add_argument("--writers-per-tenant", type=int, default=2)
+    parser.add_argument("--ops", type=int, default=4000)
+    args = parser.parse_args()
+    tenants = [f"tenant-{i}" for i in range(args.tenants)]
+    threads = args.tenants * args.writers_per_tenant
+    pool = {"pool_size": threads, "max_overflow": 0, "pool_pre_ping": False}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shared = create_db_engine(f"sqlite:///{tmp}/shared.db", pool=pool)
+        Base.metadata.create_all(bind=shared)
+        Shared = sessionmaker(bind=shared)
+        for tenant_id in tenants:
+            # CPF único por tenant; id distinto no banco compartilhado
+            db = Shared()
+            db.add(Patient(tenant_id=tenant_id, name="Paciente Bench", cpf="12345678901",
+                           phone="81999999999", address="Rua Bench 1"))
+            db.commit()
+            db.close()
+        shared_result = run(lambda tenant_id: Shared(), tenants, args.writers_per_tenant, args.ops)
+        shared.dispose()
+        print("[OK] compartilhado")
+
+        control = create_db_engine(f"sqlite:///{tmp}/control.db", pool=pool)
+        Base.metadata.create_all(bind=control)
+        router = TenantSessionRouter(
+            sessionmaker(bind=control), None,
+            TenantEngines(Path(tmp) / "tenants", maxsize=args.tenants, pool=pool),
+        )
+        for tenant_id in tenants:
+            db = router.open_session("POST", tenant_id)
+            seed_patient(db, tenant_id)
+            db.close()
+        tenant_result = run(lambda tenant_id: router.open_session("POST", tenant_id), tenants,
+                            args.writers_per_tenant, args.ops)
+        router.tenants.dispose_all()
+        control.dispose()
+        print("[OK] por tenant")
+
+    print("=" * 66)
+    print(f"{args.tenants} tenants x {args.writers_per_tenant} escritores, {args.ops} escritas")
+    print(f"{'modo':<16}{'escritas/s':>12}{'p50 (ms)':>10}{'p99 (ms)':>10}{'erros lock':>12}")
+    for label, r in (("compartilhado", shared_result), ("por tenant", tenant_result)):
+        print(f"{label:<16}{r['ops_s']:>12.1f}{r['p50']:>10.1f}{r['p99']:>10.1f}{r['errors']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Microbenchmark: verify_token (HS256) com e sem o cache de tokens verificados.
+
+Gera `--tokens` access tokens distintos e chama verify_token `--calls`
+vezes em rodízio: sem cache cada chamada faz jwt.decode completo
+(base64 + JSON + HMAC-SHA256 + exp); com cache só o sha256 do token e um
+lookup no LRU.
+
+Uso:
+    cd backend
+    python benchmarks/bench_verify_token.py --tokens 100 --calls 100000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from auth.utils import ALGORITHM, create_access_token, token_cache, verify_token
+
+
+def run(tokens, calls: int) -> float:
+    """Microssegundos por chamada."""
+    t0 = time.perf_counter()
+    for i in range(calls):
+        verify_token(tokens[i % len(tokens)], "access")
+    return (time.perf_counter() - t0) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--calls", type=int, default=100_000)
+    args = parser.parse_args()
+
+    tokens = [create_access_token({"sub": f"user{i}@bench.com", "user_id": i}) for i in range(args.tokens)]
+
+    maxsize = token_cache.maxsize
+    token_cache.maxsize = 0
+    without_cache = run(tokens, args.calls)
+    token_cache.maxsize = maxsize
+    token_cache.clear()
+    with_cache = run(tokens, args.calls)
+
+    print("=" * 52)
+    print(f"verify_token ({ALGORITHM}), {args.tokens} tokens, {args.calls} chamadas")
+    print(f"{'modo':<14}{'µs/chamada':>14}{'chamadas/s':>14}")
+    for label, us in (("sem cache", without_cache), ("com cache", with_cache)):
+        print(f"{label:<14}{us:>14.2f}{1e6 / us:>14.0f}")
+    print(f"ganho: {without_cache / with_cache:.1f}x  cache: {token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
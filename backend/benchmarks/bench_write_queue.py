@@ -0,0 +1,143 @@
+"""
+Benchmark: escritas concorrentes diretas vs. fila de escrita (database/writer.py).
+
+N threads (simulando o threadpool do FastAPI) criam appointments com o
+mesmo trabalho de create_appointment (insert + rollup). No modo direto cada
+thread faz seu próprio commit disputando o lock do SQLite; no modo fila a
+thread escritora aplica as unidades em lotes com um commit por lote.
+
+Uso:
+    cd backend
+    python benchmarks/bench_write_queue.py --threads 32 --ops 3000
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from bench_mega_stats import TENANT, populate
+from database.sqlite import DEFAULT_PRAGMAS, create_db_engine
+from database.writer import WriteQueue
+from models.appointment import Appointment
+from utils.rollup import bump_rollup
+
+
+def unit(rng: random.Random):
+    starts_at = datetime.utcnow() + timedelta(minutes=rng.randint(0, 43_200))
+
+    def insert(db):
+        appointment = Appointment(tenant_id=TENANT, patient_id=1, starts_at=starts_at, duration_min=30, status="pending")
+        db.add(appointment)
+        bump_rollup(db, TENANT, starts_at, None, "pending", +1)
+        return appointment
+    return insert
+
+
+def run(db_path: Path, mode: str, threads: int, ops: int, busy_timeout: int):
+    pragmas = {**DEFAULT_PRAGMAS, "busy_timeout": busy_timeout}
+    url = f"sqlite:///{db_path}"
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    counter = iter(range(ops))
+
+    if mode == "fila":
+        engine = create_db_engine(url, pragmas=pragmas, pool={"pool_size": 1, "max_overflow": 0},
+                                  begin="BEGIN IMMEDIATE")
+        write_queue = WriteQueue(sessionmaker(bind=engine))
+        write_queue.start()
+        execute = lambda fn: write_queue.run(fn)
+    else:
+        engine = create_db_engine(url, pragmas=pragmas, pool={"pool_size": threads, "max_overflow": 0})
+        Session = sessionmaker(bind=engine)
+        write_queue = None
+
+        def execute(fn):
+            db = Session()
+            try:
+                result = fn(db)
+                db.commit()
+                return result
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    return
+            t0 = time.perf_counter()
+            try:
+                execute(unit(rng))
+                with lock:
+                    latencies.append((time.perf_counter() - t0) * 1000)
+            except OperationalError:
+                with lock:
+                    errors[0] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    t0 = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    stats = write_queue.stats() if write_queue else {}
+    if write_queue:
+        write_queue.stop()
+    engine.dispose()
+
+    q = statistics.quantiles(latencies, n=100) if len(latencies) >= 2 else [float("nan")] * 99
+    return {
+        "ops_s": len(latencies) / elapsed,
+        "p50": q[49],
+        "p99": q[98],
+        "max": max(latencies) if latencies else float("nan"),
+        "errors": errors[0],
+        "avg_batch": stats.get("avg_batch"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--ops", type=int, default=3000)
+    parser.add_argument("--busy-timeout", type=int, default=DEFAULT_PRAGMAS["busy_timeout"],
+                        help="ms; valores baixos expõem os erros de lock do modo direto")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("direto", "fila"):
+            db_path = Path(tmp) / f"{mode}.db"
+            populate(db_path, 10_000, noise_tenants=0)
+            results.append((mode, run(db_path, mode, args.threads, args.ops, args.busy_timeout)))
+            print(f"[OK] {mode}")
+
+    print("=" * 78)
+    print(f"{args.threads} threads, {args.ops} escritas, busy_timeout={args.busy_timeout}ms")
+    print(f"{'modo':<10}{'escritas/s':>12}{'p50 (ms)':>10}{'p99 (ms)':>10}{'máx (ms)':>10}{'erros lock':>12}{'lote médio':>12}")
+    for mode, r in results:
+        print(
+            f"{mode:<10}{r['ops_s']:>12.1f}{r['p50']:>10.1f}{r['p99']:>10.1f}{r['max']:>10.1f}"
+            f"{r['errors']:>12}{str(r['avg_batch'] or '-'):>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
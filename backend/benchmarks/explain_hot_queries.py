@@ -0,0 +1,167 @@
+"""
+EXPLAIN QUERY PLAN das queries quentes de appointments e patients,
+antes e depois dos índices compostos (migrate_indexes.py).
+
+As queries não são reescritas aqui: as próprias rotas (async) são
+executadas com uma AsyncSession e o SQL emitido é capturado pelo evento
+before_cursor_execute do engine.
+
+Uso:
+    cd backend
+    python benchmarks/explain_hot_queries.py --rows 200000
+"""
+import argparse
+import asyncio
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fastapi import Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from bench_mega_stats import TENANT, populate
+from migrate_indexes import ensure_indexes
+from routes.appointments import _count_buckets, _stats_windows, get_summary, list_appointments
+from routes.patients import list_patients
+
+# Índices adicionados em models/appointment.py e models/patient.py
+NEW_INDEXES = [
+    "ix_appointments_tenant_starts_at",
+    "ix_appointments_tenant_status_starts_at",
+    "ix_patients_tenant_name",
+]
+
+
+def populate_patients(db_path: Path, rows: int):
+    conn = sqlite3.connect(db_path)
+    rng = random.Random(7)
+    conn.executemany(
+        "INSERT INTO patients (tenant_id, name, cpf, phone, address, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, '2024-01-01 00:00:00.000000', '2024-01-01 00:00:00.000000')",
+        (
+            (
+                TENANT if i % 4 == 0 else f"noise-{i % 4}",
+                f"Paciente {rng.randint(0, 10**9):09d}",
+                f"{20000000000 + i}",
+                "81999999999",
+                "Rua Bench 1",
+            )
+            for i in range(rows)
+        ),
+    )
+    # populate() insere appointments sem timestamps; os response models exigem
+    conn.execute("UPDATE appointments SET created_at = starts_at, updated_at = starts_at")
+    conn.commit()
+    conn.close()
+
+
+async def capture(engine, fn):
+    """Executa `await fn(db)` e retorna [(sql, params)] de todos os SELECTs emitidos."""
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        async with AsyncSession(engine) as db:
+            await fn(db)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+    return statements
+
+
+def hot_queries(now_local: datetime):
+    today = now_local.date()
+    next_week = (now_local + timedelta(days=7)).date()
+    return {
+        "mega_stats (_count_buckets)": lambda db: db.run_sync(_count_buckets, TENANT, _stats_windows(now_local)),
+        "summary": lambda db: get_summary(
+            Response(), tenantId=TENANT, from_=f"{today}T00:00:00", to=f"{today + timedelta(days=1)}T23:59:59",
+            tz=str(now_local.tzinfo), db=db,
+        ),
+        "appointments offset": lambda db: list_appointments(
+            Response(), tenantId=TENANT, from_date=f"{today}T00:00:00Z", to_date=f"{next_week}T00:00:00Z",
+            page=3, page_size=50, cursor=None, include_total=False, db=db,
+        ),
+        "appointments cursor": lambda db: list_appointments(
+            Response(), tenantId=TENANT, from_date=f"{today}T00:00:00Z", to_date=f"{next_week}T00:00:00Z",
+            page=1, page_size=50, cursor="", include_total=False, db=db,
+        ),
+        "patients offset": lambda db: list_patients(
+            Response(), tenant_id=TENANT, search=None, name_prefix=None, page=3, page_size=50, cursor=None,
+            include_total=False, db=db,
+        ),
+        "patients cursor": lambda db: list_patients(
+            Response(), tenant_id=TENANT, search=None, name_prefix=None, page=1, page_size=50, cursor="",
+            include_total=False, db=db,
+        ),
+    }
+
+
+async def explain(db_path: Path, queries, label: str):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    raw = sqlite3.connect(db_path)
+    print("=" * 60)
+    print(f"[{label}]")
+    for name, fn in queries.items():
+        t0 = time.perf_counter()
+        statements = await capture(engine, fn)
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(f"\n--- {name} ({elapsed:.1f} ms)")
+        if not statements:
+            raise RuntimeError(f"{name}: nenhum SELECT capturado")
+        for sql, params in statements:
+            for row in raw.execute(f"EXPLAIN QUERY PLAN {sql}", params):
+                print(f"    {row[3]}")
+    raw.close()
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="Appointments a inserir")
+    parser.add_argument("--patients", type=int, default=50_000)
+    parser.add_argument("--noise-tenants", type=int, default=3)
+    parser.add_argument("--tz", default="America/Recife")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "explain.db"
+        print(f"[SETUP] Populando {args.rows:,} appointments e {args.patients:,} patients ...")
+        populate(db_path, args.rows, args.noise_tenants)
+        populate_patients(db_path, args.patients)
+
+        # Estado anterior: banco criado antes dos índices compostos
+        conn = sqlite3.connect(db_path)
+        for name in NEW_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        conn.execute("ANALYZE")
+        conn.commit()
+        conn.close()
+
+        queries = hot_queries(datetime.now(ZoneInfo(args.tz)))
+        asyncio.run(explain(db_path, queries, "ANTES"))
+
+        engine = create_engine(f"sqlite:///{db_path}")
+        created = ensure_indexes(engine)
+        engine.dispose()
+        print("=" * 60)
+        print(f"[MIGRACAO] Índices criados: {', '.join(created)}")
+
+        asyncio.run(explain(db_path, queries, "DEPOIS"))
+
+
+if __name__ == "__main__":
+    main()
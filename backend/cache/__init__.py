@@ -0,0 +1,14 @@
+# Cache package
+from cache.backends import CacheBackend, MemoryBackend, SQLiteBackend
+from cache.core import COALESCED, HIT, MISS, STALE, Cache, Namespace, cache_stats, get_cache, tenant_tag
+from cache.invalidation import InvalidationMiddleware, defer_invalidation, invalidate_tenant, mark_tenant_dirty
+from cache.scheduler import PeriodicTask
+from cache.singleflight import AsyncSingleFlight, SingleFlight
+
+__all__ = [
+    "CacheBackend", "MemoryBackend", "SQLiteBackend",
+    "Cache", "Namespace", "cache_stats", "get_cache", "tenant_tag",
+    "HIT", "MISS", "COALESCED", "STALE",
+    "InvalidationMiddleware", "defer_invalidation", "invalidate_tenant", "mark_tenant_dirty",
+    "PeriodicTask", "SingleFlight", "AsyncSingleFlight",
+]
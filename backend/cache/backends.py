@@ -0,0 +1,365 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+# ============================================================================
+# BACKENDS DE CACHE
+# ============================================================================
+
+class CacheBackend(ABC):
+    """
+    Interface dos backends de cache.
+
+    As chaves já chegam com o prefixo do namespace (ver cache.core.Namespace).
+    Tags agrupam entradas para invalidação em massa (ex: "tenant:abc").
+    Cada tag tem uma versão, incrementada a cada invalidação: um `set` que
+    recebe `versions` só grava se nenhuma das tags mudou desde a leitura,
+    evitando que um cálculo iniciado antes da invalidação repopule o cache.
+
+    `blocking_io` indica backends que fazem I/O (podem esperar lock de outro
+    processo): as invalidações disparadas no event loop vão para uma thread
+    (ver cache.invalidation.defer_invalidation).
+    """
+
+    name = "base"
+    blocking_io = False
+
+    @abstractmethod
+    def get(self, key: str) -> Tuple[bool, Any]:
+        ...
+
+    @abstractmethod
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: float,
+        tags: Iterable[str] = (),
+        versions: Optional[Dict[str, int]] = None,
+    ) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def tag_versions(self, key: str, tags: Iterable[str]) -> Dict[str, int]:
+        ...
+
+    @abstractmethod
+    def invalidate_tag(self, tag: str) -> int:
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        ...
+
+
+class _Shard:
+    """Uma faixa do MemoryBackend: LRU + TTL com lock, índice de tags e versões próprios."""
+
+    def __init__(self, maxsize: int):
+        self.lock = threading.Lock()
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self.tag_index: Dict[str, set] = {}
+        self.tag_versions: Dict[str, int] = {}
+        self.evictions = 0
+        self.expirations = 0
+
+    def remove(self, key: str):
+        _, _, tags = self.entries.pop(key)
+        for tag in tags:
+            keys = self.tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tag_index[tag]
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Cache em memória do processo (LRU + TTL) com lock striping.
+
+    As chaves são distribuídas em `stripes` faixas por hash; cada faixa tem
+    seu próprio lock, então requests de tenants diferentes raramente disputam
+    o mesmo lock. A capacidade total é dividida entre as faixas.
+
+    Não é compartilhado entre workers do uvicorn: para isso use SQLiteBackend.
+    """
+
+    name = "memory"
+
+    def __init__(self, maxsize: int = 1024, stripes: int = 16, timer=time.monotonic):
+        self.timer = timer
+        per_shard = max(1, -(-maxsize // stripes))  # ceiling division
+        self.shards = [_Shard(per_shard) for _ in range(stripes)]
+
+    def _shard(self, key: str) -> _Shard:
+        return self.shards[hash(key) % len(self.shards)]
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= self.timer():
+                shard.remove(key)
+                shard.expirations += 1
+                return False, None
+            shard.entries.move_to_end(key)
+            return True, entry[1]
+
+    def set(self, key, value, ttl, tags=(), versions=None) -> bool:
+        tags = tuple(tags)
+        shard = self._shard(key)
+        with shard.lock:
+            if versions is not None and any(
+                shard.tag_versions.get(tag, 0) != version for tag, version in versions.items()
+            ):
+                return False
+            if key in shard.entries:
+                shard.remove(key)
+            shard.entries[key] = (self.timer() + ttl, value, tags)
+            for tag in tags:
+                shard.tag_index.setdefault(tag, set()).add(key)
+            while len(shard.entries) > shard.maxsize:
+                oldest = next(iter(shard.entries))
+                shard.remove(oldest)
+                shard.evictions += 1
+            return True
+
+    def delete(self, key: str) -> bool:
+        shard = self._shard(key)
+        with shard.lock:
+            if key not in shard.entries:
+                return False
+            shard.remove(key)
+            return True
+
+    def tag_versions(self, key: str, tags: Iterable[str]) -> Dict[str, int]:
+        shard = self._shard(key)
+        with shard.lock:
+            return {tag: shard.tag_versions.get(tag, 0) for tag in tags}
+
+    def invalidate_tag(self, tag: str) -> int:
+        removed = 0
+        for shard in self.shards:
+            with shard.lock:
+                shard.tag_versions[tag] = shard.tag_versions.get(tag, 0) + 1
+                for key in list(shard.tag_index.get(tag, ())):
+                    shard.remove(key)
+                    removed += 1
+        return removed
+
+    def clear(self):
+        for shard in self.shards:
+            with shard.lock:
+                shard.entries.clear()
+                shard.tag_index.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "entries": sum(len(shard.entries) for shard in self.shards),
+            "maxsize": sum(shard.maxsize for shard in self.shards),
+            "stripes": len(self.shards),
+            "evictions": sum(shard.evictions for shard in self.shards),
+            "expirations": sum(shard.expirations for shard in self.shards),
+        }
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Cache compartilhado em um arquivo SQLite local (modo WAL).
+
+    Todos os workers do uvicorn que apontam para o mesmo arquivo enxergam
+    as mesmas entradas, tags e invalidações. Valores são serializados em
+    JSON, então só resultados JSON-serializáveis podem ser cacheados.
+    Contadores de evicção/expiração são locais ao processo.
+    """
+
+    name = "sqlite"
+    blocking_io = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ix_cache_entries_expires_at ON cache_entries(expires_at);
+        CREATE TABLE IF NOT EXISTS cache_tags (
+            tag TEXT NOT NULL,
+            key TEXT NOT NULL,
+            PRIMARY KEY (tag, key)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS ix_cache_tags_key ON cache_tags(key);
+        CREATE TABLE IF NOT EXISTS cache_tag_versions (
+            tag TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str, maxsize: int = 10_000, timer=time.time):
+        # time.time (não monotonic): expires_at é comparado entre processos
+        self.path = path
+        self.maxsize = maxsize
+        self.timer = timer
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: transações explícitas com BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, field: str, amount: int):
+        if amount:
+            with self._counter_lock:
+                setattr(self, field, getattr(self, field) + amount)
+
+    def _delete_keys(self, conn: sqlite3.Connection, where: str, params: tuple) -> int:
+        keys = [(row[0],) for row in conn.execute(f"SELECT key FROM cache_entries WHERE {where}", params)]
+        conn.executemany("DELETE FROM cache_tags WHERE key = ?", keys)
+        conn.executemany("DELETE FROM cache_entries WHERE key = ?", keys)
+        return len(keys)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return False, None
+        if row[1] <= self.timer():
+            # Remoção fica para o próximo set (purge); leitura não escreve
+            return False, None
+        return True, json.loads(row[0])
+
+    def set(self, key, value, ttl, tags=(), versions=None) -> bool:
+        payload = json.dumps(value)
+        now = self.timer()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if versions:
+                for tag, version in versions.items():
+                    row = conn.execute("SELECT version FROM cache_tag_versions WHERE tag = ?", (tag,)).fetchone()
+                    if (row[0] if row else 0) != version:
+                        conn.execute("ROLLBACK")
+                        return False
+
+            conn.execute("DELETE FROM cache_tags WHERE key = ?", (key,))
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, now + ttl),
+            )
+            conn.executemany("INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)", [(t, key) for t in tags])
+
+            self._count("expirations", self._delete_keys(conn, "expires_at <= ?", (now,)))
+            overflow = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0] - self.maxsize
+            if overflow > 0:
+                # Sem registro de acesso compartilhado: remove as que expiram antes
+                self._count("evictions", self._delete_keys(
+                    conn,
+                    "key IN (SELECT key FROM cache_entries ORDER BY expires_at LIMIT ?)",
+                    (overflow,),
+                ))
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key: str) -> bool:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed = self._delete_keys(conn, "key = ?", (key,))
+            conn.execute("COMMIT")
+            return removed > 0
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def tag_versions(self, key: str, tags: Iterable[str]) -> Dict[str, int]:
+        conn = self._conn()
+        versions = {}
+        for tag in tags:
+            row = conn.execute("SELECT version FROM cache_tag_versions WHERE tag = ?", (tag,)).fetchone()
+            versions[tag] = row[0] if row else 0
+        return versions
+
+    def invalidate_tag(self, tag: str) -> int:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO cache_tag_versions (tag, version) VALUES (?, 1) "
+                "ON CONFLICT(tag) DO UPDATE SET version = version + 1",
+                (tag,),
+            )
+            removed = self._delete_keys(conn, "key IN (SELECT key FROM cache_tags WHERE tag = ?)", (tag,))
+            conn.execute("COMMIT")
+            return removed
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM cache_tags")
+        conn.execute("DELETE FROM cache_entries")
+        conn.execute("COMMIT")
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._conn().execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "entries": entries,
+            "maxsize": self.maxsize,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def backend_from_env() -> CacheBackend:
+    """
+    Cria o backend conforme variáveis de ambiente:
+
+    - CACHE_BACKEND: "memory" (default) ou "sqlite"
+    - CACHE_MAX_ENTRIES: capacidade total (default: 1024)
+    - CACHE_LOCK_STRIPES: faixas de lock do backend em memória (default: 16)
+    - CACHE_SQLITE_PATH: arquivo compartilhado do backend sqlite
+    """
+    kind = os.getenv("CACHE_BACKEND", "memory").lower()
+    maxsize = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+    if kind == "sqlite":
+        default_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache.db")
+        return SQLiteBackend(os.getenv("CACHE_SQLITE_PATH", default_path), maxsize=maxsize)
+    if kind != "memory":
+        raise ValueError(f"Unknown CACHE_BACKEND: {kind}. Use 'memory' or 'sqlite'.")
+    return MemoryBackend(maxsize=maxsize, stripes=int(os.getenv("CACHE_LOCK_STRIPES", "16")))
@@ -0,0 +1,343 @@
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from cache.backends import CacheBackend, backend_from_env
+from cache.singleflight import AsyncSingleFlight, SingleFlight
+
+# Resultado de get_or_compute, usado no header X-Cache
+HIT = "HIT"
+MISS = "MISS"
+COALESCED = "COALESCED"
+STALE = "STALE"
+
+# Threads para revalidação em background (stale-while-revalidate)
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+
+
+# ============================================================================
+# CACHE COM NAMESPACES E TAGS
+# ============================================================================
+
+def tenant_tag(tenant_id: str) -> str:
+    """Tag padrão para invalidar tudo que foi cacheado para um tenant."""
+    return f"tenant:{tenant_id}"
+
+
+class Namespace:
+    """
+    Visão de um Cache restrita a um prefixo de chave, com TTL e contadores.
+
+    Com `stale_ttl > 0`, uma entrada continua no backend por mais
+    `stale_ttl` segundos depois de deixar de ser fresca (`ttl`): nesse
+    intervalo get_or_compute devolve o valor antigo (STALE) e recalcula
+    em background.
+
+    Example:
+        stats_cache = cache.namespace("mega_stats", ttl=300, stale_ttl=3600)
+        stats_cache.set(key, value, tags=[tenant_tag(tenant_id)])
+        cache.invalidate_tag(tenant_tag(tenant_id))
+    """
+
+    def __init__(self, cache: "Cache", name: str, ttl: float, stale_ttl: float = 0):
+        self.cache = cache
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.sets = 0
+        self.rejected_sets = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self._flight = SingleFlight()
+        self._async_flight = AsyncSingleFlight()
+        self._refreshing = set()
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def _count(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def _entry(self, key: str) -> Tuple[bool, Any, bool]:
+        """Lê o envelope [valor, fresco_até] do backend: (encontrado, valor, fresco)."""
+        found, entry = self.cache.backend.get(self._key(key))
+        if not found:
+            return False, None, False
+        value, fresh_until = entry
+        return True, value, time.time() < fresh_until
+
+    def lookup(self, key: str) -> Tuple[bool, Any]:
+        """
+        Retorna (encontrado, valor); permite cachear None.
+
+        Valores stale (dentro da janela stale_ttl) também são devolvidos.
+        """
+        found, value, fresh = self._entry(key)
+        if not found:
+            self._count("misses")
+        else:
+            self._count("hits" if fresh else "stale_hits")
+        return found, value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        found, value = self.lookup(key)
+        return value if found else default
+
+    def versions(self, key: str, tags: Iterable[str]) -> Dict[str, int]:
+        """Versões atuais das tags; passe para set() para detectar invalidação no meio."""
+        return self.cache.backend.tag_versions(self._key(key), tags)
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        tags: Iterable[str] = (),
+        ttl: Optional[float] = None,
+        versions: Optional[Dict[str, int]] = None,
+    ) -> bool:
+        """
+        Grava o valor. Com `versions`, não grava (e retorna False) se alguma
+        tag foi invalidada depois que as versões foram lidas.
+        """
+        ttl = ttl if ttl is not None else self.ttl
+        # time.time (não monotonic): o envelope pode ser lido por outro processo
+        stored = self.cache.backend.set(
+            self._key(key),
+            [value, time.time() + ttl],
+            ttl + self.stale_ttl,
+            tags=tuple(tags) + (f"ns:{self.name}",),
+            versions=versions,
+        )
+        self._count("sets" if stored else "rejected_sets")
+        return stored
+
+    def delete(self, key: str) -> bool:
+        return self.cache.backend.delete(self._key(key))
+
+    def clear(self) -> int:
+        """Remove todas as entradas deste namespace."""
+        return self.cache.backend.invalidate_tag(f"ns:{self.name}")
+
+    def _revalidate(self, key: str, refresh: Callable[[], Any], tags: list, ttl: Optional[float]):
+        """Agenda o recálculo em background, no máximo um por chave."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def reload():
+            # Mesmo formato de load(): um miss concorrente pode coalescer aqui
+            versions = self.versions(key, tags)
+            value = refresh()
+            self.set(key, value, tags=tags, ttl=ttl, versions=versions)
+            return value, MISS
+
+        def run():
+            try:
+                self._flight.do(key, reload)
+                self._count("refreshes")
+            except Exception as e:
+                self._count("refresh_errors")
+                print(f"❌ Cache refresh failed: namespace={self.name}, key={key}, error={str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        _refresh_executor.submit(run)
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        tags: Iterable[str] = (),
+        ttl: Optional[float] = None,
+        refresh: Optional[Callable[[], Any]] = None,
+    ) -> Tuple[Any, str]:
+        """
+        Busca no cache; em caso de miss, calcula com single-flight por chave.
+
+        Só um chamador por chave executa `compute` neste processo; os demais
+        esperam e recebem o mesmo valor (status COALESCED).
+
+        Se a entrada estiver stale, devolve o valor antigo imediatamente
+        (status STALE) e recalcula em background com `refresh`. Use um
+        `refresh` que não dependa de recursos do request (ex: sessão do
+        banco já fechada); o default é o próprio `compute`.
+
+        Returns:
+            (valor, status) com status HIT, STALE, MISS ou COALESCED
+        """
+        tags = list(tags)
+        found, value, fresh = self._entry(key)
+        if found and fresh:
+            self._count("hits")
+            return value, HIT
+        if found:
+            self._count("stale_hits")
+            self._revalidate(key, refresh or compute, tags, ttl)
+            return value, STALE
+        self._count("misses")
+
+        def load():
+            # Outro líder pode ter gravado entre o lookup e a entrada aqui
+            found, value, fresh = self._entry(key)
+            if found and fresh:
+                return value, HIT
+            versions = self.versions(key, tags)
+            value = compute()
+            self.set(key, value, tags=tags, ttl=ttl, versions=versions)
+            return value, MISS
+
+        (value, status), shared = self._flight.do(key, load)
+        if shared:
+            self._count("coalesced")
+            return value, COALESCED
+        return value, status
+
+    async def get_or_compute_async(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        tags: Iterable[str] = (),
+        ttl: Optional[float] = None,
+        refresh: Optional[Callable[[], Any]] = None,
+    ) -> Tuple[Any, str]:
+        """
+        get_or_compute para rotas async: `compute` é uma corrotina e os
+        misses concorrentes aguardam o líder sem bloquear o event loop.
+
+        `refresh` (revalidação de entradas STALE) continua síncrono e roda
+        nas threads de background; sem ele, entradas stale são recalculadas
+        em primeiro plano.
+
+        Returns:
+            (valor, status) com status HIT, STALE, MISS ou COALESCED
+        """
+        tags = list(tags)
+        found, value, fresh = self._entry(key)
+        if found and fresh:
+            self._count("hits")
+            return value, HIT
+        if found and refresh is not None:
+            self._count("stale_hits")
+            self._revalidate(key, refresh, tags, ttl)
+            return value, STALE
+        self._count("misses")
+
+        async def load():
+            found, value, fresh = self._entry(key)
+            if found and fresh:
+                return value, HIT
+            versions = self.versions(key, tags)
+            value = await compute()
+            self.set(key, value, tags=tags, ttl=ttl, versions=versions)
+            return value, MISS
+
+        (value, status), shared = await self._async_flight.do(key, load)
+        if shared:
+            self._count("coalesced")
+            return value, COALESCED
+        return value, status
+
+    def cached(
+        self,
+        key: Callable[..., str],
+        tags: Optional[Callable[..., Iterable[str]]] = None,
+        ttl: Optional[float] = None,
+    ):
+        """
+        Decorator que cacheia o retorno de uma função (ou rota síncrona).
+
+        `key` e `tags` recebem os mesmos argumentos da função decorada.
+        Com o backend sqlite o retorno precisa ser JSON-serializável.
+
+        Example:
+            @router.get("/light")
+            @light_cache.cached(key=lambda tenant_id, **_: tenant_id,
+                                tags=lambda tenant_id, **_: [tenant_tag(tenant_id)])
+            def list_consultorios_light(tenant_id: str = Query(...), db: Session = Depends(get_db)):
+                ...
+        """
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                value, _ = self.get_or_compute(
+                    key(*args, **kwargs),
+                    lambda: fn(*args, **kwargs),
+                    tags=tags(*args, **kwargs) if tags else (),
+                    ttl=ttl,
+                )
+                return value
+            return wrapper
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+            "coalesced": self.coalesced,
+            "in_flight": self._flight.in_flight() + self._async_flight.in_flight(),
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "sets": self.sets,
+            "rejected_sets": self.rejected_sets,
+        }
+
+
+class Cache:
+    """Fachada sobre um CacheBackend, com registro de namespaces."""
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self._namespaces: Dict[str, Namespace] = {}
+        self._lock = threading.Lock()
+
+    def namespace(self, name: str, ttl: float = 30, stale_ttl: float = 0) -> Namespace:
+        with self._lock:
+            if name not in self._namespaces:
+                self._namespaces[name] = Namespace(self, name, ttl, stale_ttl)
+            return self._namespaces[name]
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Remove todas as entradas (de qualquer namespace) marcadas com a tag."""
+        return self.backend.invalidate_tag(tag)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.backend.stats(),
+            "namespaces": {name: ns.stats() for name, ns in self._namespaces.items()},
+        }
+
+
+_default_cache: Optional[Cache] = None
+_default_lock = threading.Lock()
+
+
+def get_cache() -> Cache:
+    """Cache padrão do processo, configurado por variáveis de ambiente."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = Cache(backend_from_env())
+    return _default_cache
+
+
+def cache_stats() -> Dict[str, Any]:
+    return get_cache().stats()
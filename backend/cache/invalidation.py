@@ -0,0 +1,125 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Any, Callable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from cache.core import get_cache, tenant_tag
+
+
+# ============================================================================
+# INVALIDAÇÃO DIRIGIDA POR ESCRITA
+# ============================================================================
+
+# Chave em Session.info com os tenants a invalidar quando a transação commitar
+_DIRTY_TENANTS_KEY = "cache_dirty_tenants"
+
+# Invalidações com I/O (CACHE_BACKEND=sqlite) disparadas no event loop rodam aqui
+_invalidation_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-invalidate")
+# Invalidações adiadas durante o request atual (esperadas pelo InvalidationMiddleware)
+_pending_invalidations: ContextVar[Optional[List[Future]]] = ContextVar("pending_invalidations", default=None)
+
+
+def _log_failure(future: Future):
+    if future.exception() is not None:
+        print(f"❌ Cache invalidation failed: {str(future.exception())}")
+
+
+def defer_invalidation(fn: Callable[..., Any], *args: Any):
+    """
+    Executa `fn(*args)` (invalidação no commit) sem travar o event loop.
+
+    Backend em memória, ou fora do event loop (scripts, fila de escrita):
+    roda na hora. Backend com I/O (sqlite) dentro do loop: o BEGIN IMMEDIATE
+    pode esperar o lock de outro worker, então vai para uma thread; o
+    InvalidationMiddleware segura a resposta até ela terminar, e quem fez a
+    escrita não lê o cache antigo no request seguinte.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        fn(*args)
+        return
+    if not get_cache().backend.blocking_io:
+        fn(*args)
+        return
+    future = _invalidation_executor.submit(fn, *args)
+    pending = _pending_invalidations.get()
+    if pending is None:
+        future.add_done_callback(_log_failure)
+    else:
+        pending.append(future)
+
+
+async def wait_for_invalidations(pending: List[Future]):
+    """Espera as invalidações adiadas (inclusive as agendadas enquanto espera)."""
+    while pending:
+        futures = pending[:]
+        pending.clear()
+        for future in futures:
+            try:
+                await asyncio.wrap_future(future)
+            except Exception as e:
+                print(f"❌ Cache invalidation failed: {str(e)}")
+
+
+class InvalidationMiddleware:
+    """
+    Middleware ASGI: a resposta só começa depois das invalidações adiadas
+    pelo request (defer_invalidation), sem ocupar o event loop na espera.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        pending: List[Future] = []
+        token = _pending_invalidations.set(pending)
+
+        async def send_after_invalidations(message):
+            if message["type"] == "http.response.start":
+                await wait_for_invalidations(pending)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_after_invalidations)
+        finally:
+            _pending_invalidations.reset(token)
+            # Commits depois do início da resposta (ex: background tasks) não ficam sem log
+            for future in pending:
+                future.add_done_callback(_log_failure)
+
+
+def invalidate_tenant(tenant_id: str) -> int:
+    """
+    Remove do cache todas as entradas marcadas com a tag do tenant
+    (qualquer namespace, timezone e data). Retorna quantas foram removidas.
+    """
+    return get_cache().invalidate_tag(tenant_tag(tenant_id))
+
+
+def mark_tenant_dirty(db: Session, tenant_id: str):
+    """
+    Agenda a invalidação do cache do tenant para o commit da sessão.
+
+    Se a transação for desfeita (rollback), nada é invalidado.
+    """
+    db.info.setdefault(_DIRTY_TENANTS_KEY, set()).add(tenant_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session):
+    for tenant_id in session.info.pop(_DIRTY_TENANTS_KEY, ()):
+        defer_invalidation(invalidate_tenant, tenant_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_invalidation(session: Session, previous_transaction):
+    # Rollback de SAVEPOINT não desfaz a transação externa
+    if not previous_transaction.nested:
+        session.info.pop(_DIRTY_TENANTS_KEY, None)
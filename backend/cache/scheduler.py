@@ -0,0 +1,52 @@
+import threading
+from typing import Callable
+
+
+# ============================================================================
+# TAREFAS PERIÓDICAS (PRÉ-AQUECIMENTO DE CACHE)
+# ============================================================================
+
+class PeriodicTask:
+    """
+    Executa `fn` a cada `interval` segundos em uma thread daemon.
+
+    Erros são logados e não interrompem o agendamento.
+
+    Example:
+        task = PeriodicTask("stats-prewarm", 60, lambda: prewarm(SessionLocal))
+        task.start()
+        ...
+        task.stop()
+    """
+
+    def __init__(self, name: str, interval: float, fn: Callable[[], None]):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.runs = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.fn()
+                self.runs += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"❌ Periodic task {self.name} failed: {str(e)}")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+        print(f"⏱️ Periodic task started: {self.name} (every {self.interval}s)")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+# ============================================================================
+# SINGLE-FLIGHT (COALESCÊNCIA DE CACHE MISSES)
+# ============================================================================
+
+class _Call:
+    """Execução em andamento para uma chave; seguidores esperam no event."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """
+    Garante no máximo uma execução simultânea por chave no processo.
+
+    O primeiro chamador (líder) executa `fn`; chamadores concorrentes com a
+    mesma chave bloqueiam até o líder terminar e recebem o mesmo resultado
+    (ou a mesma exceção). Quando o líder termina, a chave é liberada.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Executa `fn` como líder ou espera o líder atual.
+
+        Returns:
+            (valor, shared): shared=True quando o valor veio de outro chamador
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.value, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    Versão asyncio do SingleFlight: seguidores aguardam a task do líder sem
+    bloquear o event loop. Futures não atravessam loops: cada event loop
+    (ex: um por thread do TestClient) tem as suas chamadas em andamento.
+    """
+
+    def __init__(self):
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, asyncio.Future]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Executa `await fn()` como líder ou aguarda o líder atual.
+
+        Returns:
+            (valor, shared): shared=True quando o valor veio de outro chamador
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            calls = self._loops.setdefault(loop, {})
+        call = calls.get(key)
+        if call is not None:
+            # shield: o cancelamento de um seguidor não cancela o líder
+            return await asyncio.shield(call), True
+
+        call = loop.create_future()
+        calls[key] = call
+        try:
+            value = await fn()
+        except BaseException as e:
+            call.set_exception(e)
+            # Evita "exception was never retrieved" quando não há seguidores
+            call.exception()
+            raise
+        finally:
+            calls.pop(key, None)
+        call.set_result(value)
+        return value, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(len(calls) for calls in self._loops.values())
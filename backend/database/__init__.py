@@ -0,0 +1,16 @@
+# Database package
+from database.routing import (
+    READ_METHODS, SessionRouter, database_stats, get_async_session_router, get_session_router,
+    set_async_session_router, set_session_router,
+)
+from database.sqlite import create_db_engine, is_sqlite_url, pool_config_from_env, sqlite_pragmas_from_env, to_async_url
+from database.tenancy import TenantEngines, TenantSessionRouter, tenant_id_from_request
+from database.writer import WriteQueue, get_write_queue, run_write, set_write_queue
+
+__all__ = [
+    "READ_METHODS", "SessionRouter", "database_stats", "get_async_session_router", "get_session_router",
+    "set_async_session_router", "set_session_router",
+    "create_db_engine", "is_sqlite_url", "pool_config_from_env", "sqlite_pragmas_from_env", "to_async_url",
+    "TenantEngines", "TenantSessionRouter", "tenant_id_from_request",
+    "WriteQueue", "get_write_queue", "run_write", "set_write_queue",
+]
@@ -0,0 +1,107 @@
+import threading
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from database.writer import get_write_queue
+
+
+# ============================================================================
+# ROTEAMENTO DE SESSÕES (LEITURA / ESCRITA)
+# ============================================================================
+
+# Métodos HTTP atendidos pelo pool de leitura
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class SessionRouter:
+    """
+    Escolhe a sessão do request pelo método HTTP.
+
+    GET/HEAD/OPTIONS usam `read_factory` (pool somente leitura); os demais
+    métodos usam `write_factory`. Sem `read_factory`, tudo vai para o escritor.
+    Funciona com sessionmaker ou async_sessionmaker.
+
+    Example:
+        router = SessionRouter(SessionLocal, ReadSessionLocal)
+
+        def override_get_db(request: Request):
+            yield from router.session_for(request.method)
+    """
+
+    def __init__(self, write_factory: sessionmaker, read_factory: Optional[sessionmaker] = None):
+        self.write_factory = write_factory
+        self.read_factory = read_factory
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.writes = 0
+
+    def factory_for(self, method: str) -> sessionmaker:
+        read = self.read_factory is not None and method.upper() in READ_METHODS
+        with self._lock:
+            if read:
+                self.reads += 1
+            else:
+                self.writes += 1
+        return self.read_factory if read else self.write_factory
+
+    def open_session(self, method: str, tenant_id: Optional[str] = None) -> Session:
+        """Nova sessão para o método HTTP; `tenant_id` só importa no modo banco-por-tenant."""
+        return self.factory_for(method)()
+
+    async def open_session_async(self, method: str, tenant_id: Optional[str] = None):
+        """open_session para dependências async (ver TenantSessionRouter)."""
+        return self.open_session(method, tenant_id)
+
+    def session_for(self, method: str, tenant_id: Optional[str] = None) -> Iterator[Session]:
+        """Gerador no formato de dependência do FastAPI (fecha a sessão no fim)."""
+        db = self.open_session(method, tenant_id)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        pools = {"write": self.write_factory.kw["bind"].pool.status()}
+        if self.read_factory is not None:
+            pools["read"] = self.read_factory.kw["bind"].pool.status()
+        return {
+            "read_routing": self.read_factory is not None,
+            "read_sessions": self.reads,
+            "write_sessions": self.writes,
+            "pools": pools,
+        }
+
+
+_default_router: Optional[SessionRouter] = None
+_default_async_router: Optional[SessionRouter] = None
+
+
+def set_session_router(router: SessionRouter):
+    """Registra o roteador síncrono do processo (main.py): tarefas de fundo e scripts."""
+    global _default_router
+    _default_router = router
+
+
+def get_session_router() -> Optional[SessionRouter]:
+    return _default_router
+
+
+def set_async_session_router(router: SessionRouter):
+    """Registra o roteador de AsyncSession usado pelos requests."""
+    global _default_async_router
+    _default_async_router = router
+
+
+def get_async_session_router() -> Optional[SessionRouter]:
+    return _default_async_router
+
+
+def database_stats() -> Dict[str, Any]:
+    stats = _default_router.stats() if _default_router is not None else {}
+    if _default_async_router is not None:
+        stats["async"] = _default_async_router.stats()
+    write_queue = get_write_queue()
+    if write_queue is not None:
+        stats["write_queue"] = write_queue.stats()
+    return stats
@@ -0,0 +1,149 @@
+import os
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+
+# ============================================================================
+# PERFIL DE PRODUÇÃO DO SQLITE (PRAGMAS + POOL)
+# ============================================================================
+
+# Ordem importa: journal_mode antes do resto; busy_timeout antes de qualquer lock
+DEFAULT_PRAGMAS = {
+    "busy_timeout": 30000,          # ms esperando lock antes de "database is locked"
+    "journal_mode": "WAL",          # leitores não bloqueiam o escritor (e vice-versa)
+    "synchronous": "NORMAL",        # em WAL: fsync só no checkpoint, sem risco de corrupção
+    "cache_size": -65536,           # negativo = KiB (64 MiB por conexão)
+    "mmap_size": 268435456,         # 256 MiB de leitura via mmap
+    "temp_store": "MEMORY",         # ORDER BY / GROUP BY temporários em memória
+}
+
+
+def is_sqlite_url(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def to_async_url(url: str) -> str:
+    """sqlite:///x.db -> sqlite+aiosqlite:///x.db (drivers explícitos são mantidos)."""
+    parsed = make_url(url)
+    if parsed.drivername == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    return url
+
+
+def _is_memory_url(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+
+def sqlite_pragmas_from_env() -> Dict[str, Any]:
+    """
+    Pragmas aplicados em cada conexão nova.
+
+    Cada um pode ser sobrescrito por SQLITE_<NOME> (ex: SQLITE_JOURNAL_MODE=DELETE);
+    valor vazio desliga o pragma (fica o default do SQLite).
+    """
+    pragmas = {}
+    for name, default in DEFAULT_PRAGMAS.items():
+        value = os.getenv(f"SQLITE_{name.upper()}", str(default)).strip()
+        if value:
+            pragmas[name] = value
+    return pragmas
+
+
+def pool_config_from_env(prefix: str = "DB_POOL") -> Dict[str, Any]:
+    """
+    Argumentos de pool do create_engine, a partir de <prefix>_*.
+
+    Com prefix="DB_READ_POOL", cada valor não definido cai no DB_POOL_* equivalente.
+    """
+    def env(name: str, default: str) -> str:
+        return os.getenv(f"{prefix}_{name}", os.getenv(f"DB_POOL_{name}", default))
+
+    return {
+        "pool_size": int(env("SIZE", "10")),
+        "max_overflow": int(env("MAX_OVERFLOW", "20")),
+        "pool_timeout": float(env("TIMEOUT", "30")),
+        "pool_recycle": int(env("RECYCLE", "-1")),
+        # Arquivo SQLite local não tem conexão de servidor para ficar velha:
+        # o ping seria só um round trip a mais por checkout
+        "pool_pre_ping": env("PRE_PING", "false").lower() == "true",
+    }
+
+
+def _apply_pragmas(dbapi_connection, pragmas: Dict[str, Any]):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def create_db_engine(
+    url: str,
+    pragmas: Optional[Dict[str, Any]] = None,
+    pool: Optional[Dict[str, Any]] = None,
+    read_only: bool = False,
+    begin: Optional[str] = None,
+    asynchronous: bool = False,
+    **kwargs,
+):
+    """
+    Cria o engine com o perfil de produção.
+
+    Para SQLite, `pragmas` (default: sqlite_pragmas_from_env()) é aplicado
+    em toda conexão aberta pelo pool. `pool` (default: pool_config_from_env())
+    é ignorado em bancos :memory:, que usam pool de conexão única.
+
+    Com `read_only=True` (SQLite), as conexões recebem `query_only=ON` e cada
+    transação começa com BEGIN explícito: todas as queries de uma sessão leem
+    o mesmo snapshot do WAL, sem bloquear o escritor.
+
+    `begin` troca o BEGIN implícito do driver por um explícito em toda
+    transação (ex: "BEGIN IMMEDIATE" para pegar o lock de escrita já no
+    início); também faz SAVEPOINT funcionar corretamente no pysqlite.
+
+    Com `asynchronous=True` retorna um AsyncEngine (aiosqlite) com os mesmos
+    pragmas e pool, para AsyncSession.
+
+    Example:
+        engine = create_db_engine(DATABASE_URL)
+        read_engine = create_db_engine(DATABASE_URL, pool=pool_config_from_env("DB_READ_POOL"), read_only=True)
+    """
+    pool = pool_config_from_env() if pool is None else pool
+    factory = create_async_engine if asynchronous else create_engine
+    if not is_sqlite_url(url):
+        return factory(url, **pool, **kwargs)
+
+    pragmas = sqlite_pragmas_from_env() if pragmas is None else pragmas
+    if read_only:
+        pragmas = {**pragmas, "query_only": "ON"}
+        begin = begin or "BEGIN"
+    connect_args = kwargs.pop("connect_args", {})
+    connect_args.setdefault("check_same_thread", False)
+    # timeout do driver = busy_timeout (o driver sobrescreve o pragma se forem diferentes)
+    if "busy_timeout" in pragmas:
+        connect_args.setdefault("timeout", int(pragmas["busy_timeout"]) / 1000)
+
+    if _is_memory_url(url):
+        pool = {}
+    engine = factory(to_async_url(url) if asynchronous else url, connect_args=connect_args, **pool, **kwargs)
+    # Eventos de pool/conexão ficam no engine síncrono por baixo do AsyncEngine
+    sync_engine = engine.sync_engine if asynchronous else engine
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, pragmas)
+        if begin:
+            # O driver só abre transação antes de DML; sem isso cada SELECT
+            # veria um snapshot diferente
+            dbapi_connection.isolation_level = None
+
+    if begin:
+        @event.listens_for(sync_engine, "begin")
+        def on_begin(conn):
+            conn.exec_driver_sql(begin)
+
+    return engine
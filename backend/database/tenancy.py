@@ -0,0 +1,284 @@
+import asyncio
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from database.routing import READ_METHODS, SessionRouter
+from database.sqlite import create_db_engine
+from models.appointment import Appointment
+from models.appointment_rollup import AppointmentDailyRollup
+from models.consultorio import Consultorio
+from models.patient import Patient
+from models.user import Base
+
+
+# ============================================================================
+# BANCO POR TENANT (UM ARQUIVO SQLITE POR TENANT_ID)
+# ============================================================================
+
+# Models com tenant_id: vão para o arquivo do tenant. O resto (users) fica no
+# banco de controle compartilhado.
+TENANT_MODELS = (Patient, Consultorio, Appointment, AppointmentDailyRollup)
+TENANT_TABLES = [model.__table__ for model in TENANT_MODELS]
+
+# Onde o tenant pode vir no request, em ordem de prioridade
+TENANT_HEADER = "X-Tenant-ID"
+TENANT_PARAMS = ("tenantId", "tenant_id")
+
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_-]")
+
+
+def tenant_db_path(directory: Path, tenant_id: str) -> Path:
+    """
+    Arquivo do tenant dentro de `directory`.
+
+    Caracteres fora de [A-Za-z0-9_-] são trocados por "_" e, nesse caso, um
+    hash curto do id original evita colisão (e path traversal).
+    """
+    name = _SAFE_NAME.sub("_", tenant_id)[:64]
+    if name != tenant_id:
+        name = f"{name}-{hashlib.sha1(tenant_id.encode('utf-8')).hexdigest()[:10]}"
+    return directory / f"{name}.db"
+
+
+class TenantEngines:
+    """
+    LRU limitado de engines por tenant (escrita + leitura).
+
+    O primeiro acesso a um tenant cria o arquivo e as tabelas de
+    TENANT_TABLES. Ao passar de `maxsize`, o tenant menos usado tem os
+    engines descartados (dispose); conexões em uso no momento são fechadas
+    quando devolvidas.
+
+    Com `asynchronous=True` os engines são AsyncEngine (aiosqlite): use
+    `get_async`, que abre o tenant (create_all) numa thread e aguarda o
+    dispose dos engines removidos no próprio loop.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        maxsize: int = 64,
+        pool: Optional[Dict[str, Any]] = None,
+        asynchronous: bool = False,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.maxsize = maxsize
+        self.pool = pool or {"pool_size": 5, "max_overflow": 5, "pool_pre_ping": False}
+        self.asynchronous = asynchronous
+        self._engines: "OrderedDict[str, Tuple[Engine, Engine]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._opening: Dict[str, threading.Lock] = {}
+        # Disposes agendados por chamadas síncronas dentro do loop: a referência
+        # impede que a task seja coletada antes de rodar
+        self._disposing = set()
+        self.hits = 0
+        self.opens = 0
+        self.evictions = 0
+
+    def _open(self, tenant_id: str) -> Tuple[Engine, Engine]:
+        url = f"sqlite:///{tenant_db_path(self.directory, tenant_id)}"
+        bootstrap = create_db_engine(url, pool=self.pool)
+        Base.metadata.create_all(bind=bootstrap, tables=TENANT_TABLES)
+        if self.asynchronous:
+            bootstrap.dispose()
+            return (
+                create_db_engine(url, pool=self.pool, asynchronous=True),
+                create_db_engine(url, pool=self.pool, read_only=True, asynchronous=True),
+            )
+        return bootstrap, create_db_engine(url, pool=self.pool, read_only=True)
+
+    def _dispose(self, engine):
+        if not isinstance(engine, AsyncEngine):
+            engine.dispose()
+            return
+        # AsyncEngine.dispose é corrotina: agenda no loop atual (ou roda um)
+        try:
+            task = asyncio.get_running_loop().create_task(engine.dispose())
+        except RuntimeError:
+            asyncio.run(engine.dispose())
+            return
+        self._disposing.add(task)
+        task.add_done_callback(self._disposing.discard)
+
+    def _cached(self, tenant_id: str) -> Optional[Tuple[Engine, Engine]]:
+        with self._lock:
+            engines = self._engines.get(tenant_id)
+            if engines is not None:
+                self._engines.move_to_end(tenant_id)
+                self.hits += 1
+            return engines
+
+    def get(self, tenant_id: str) -> Tuple[Engine, Engine]:
+        """(engine de escrita, engine somente leitura) do tenant."""
+        engines = self._cached(tenant_id)
+        if engines is not None:
+            return engines
+        engines, evicted = self._open_or_wait(tenant_id)
+        for engine in evicted:
+            self._dispose(engine)
+        return engines
+
+    async def get_async(self, tenant_id: str) -> Tuple[Engine, Engine]:
+        """get para o event loop: abrir o arquivo e criar as tabelas roda numa thread."""
+        engines = self._cached(tenant_id)
+        if engines is not None:
+            return engines
+        engines, evicted = await run_in_threadpool(self._open_or_wait, tenant_id)
+        for engine in evicted:
+            if isinstance(engine, AsyncEngine):
+                await engine.dispose()
+            else:
+                engine.dispose()
+        return engines
+
+    def _open_or_wait(self, tenant_id: str) -> Tuple[Tuple[Engine, Engine], list]:
+        """Abre o tenant (ou espera quem já está abrindo): (engines, engines removidos do LRU)."""
+        with self._lock:
+            engines = self._engines.get(tenant_id)
+            if engines is not None:
+                self._engines.move_to_end(tenant_id)
+                self.hits += 1
+                return engines, []
+            opening = self._opening.setdefault(tenant_id, threading.Lock())
+
+        # Bootstrap fora do lock global: só trava quem pede o mesmo tenant
+        with opening:
+            with self._lock:
+                engines = self._engines.get(tenant_id)
+                if engines is not None:
+                    self.hits += 1
+                    return engines, []
+            engines = self._open(tenant_id)
+            evicted = []
+            with self._lock:
+                self._engines[tenant_id] = engines
+                self.opens += 1
+                self._opening.pop(tenant_id, None)
+                while len(self._engines) > self.maxsize:
+                    evicted.extend(self._engines.popitem(last=False)[1])
+                    self.evictions += 1
+        return engines, evicted
+
+    def dispose_all(self):
+        with self._lock:
+            engines = list(self._engines.values())
+            self._engines.clear()
+        for engine, read_engine in engines:
+            self._dispose(engine)
+            self._dispose(read_engine)
+
+    async def dispose_all_async(self):
+        """dispose_all aguardando os AsyncEngine (shutdown do app)."""
+        with self._lock:
+            engines = [engine for pair in self._engines.values() for engine in pair]
+            self._engines.clear()
+        for engine in engines:
+            if isinstance(engine, AsyncEngine):
+                await engine.dispose()
+            else:
+                engine.dispose()
+        # Disposes ainda pendentes de chamadas síncronas
+        if self._disposing:
+            await asyncio.gather(*self._disposing, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": str(self.directory),
+            "open_tenants": len(self._engines),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "opens": self.opens,
+            "evictions": self.evictions,
+        }
+
+
+class TenantSession(Session):
+    """Sessão que exige tenant para tocar em tabelas de TENANT_MODELS."""
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.info.get("tenant_id") is None:
+            cls = getattr(mapper, "class_", mapper)
+            tables = getattr(clause, "froms", None) or ()
+            if cls in TENANT_MODELS or any(table in TENANT_TABLES for table in tables):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Tenant required: send the {TENANT_HEADER} header or a tenantId parameter",
+                )
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+class TenantSessionRouter(SessionRouter):
+    """
+    SessionRouter do modo banco-por-tenant.
+
+    Users (e demais tabelas globais) usam os engines de controle; models de
+    TENANT_MODELS usam os engines do tenant do request. A escolha leitura /
+    escrita pelo método HTTP vale para os dois. Com async_sessionmaker (e
+    TenantEngines assíncrono) retorna AsyncSession.
+    """
+
+    def __init__(self, write_factory: sessionmaker, read_factory: Optional[sessionmaker], tenants: TenantEngines):
+        super().__init__(write_factory, read_factory)
+        self.tenants = tenants
+
+    def open_session(self, method: str, tenant_id: Optional[str] = None):
+        return self._session(method, tenant_id, self.tenants.get(tenant_id) if tenant_id else None)
+
+    async def open_session_async(self, method: str, tenant_id: Optional[str] = None):
+        """open_session sem bloquear o loop quando o banco do tenant ainda não está aberto."""
+        return self._session(method, tenant_id, await self.tenants.get_async(tenant_id) if tenant_id else None)
+
+    def _session(self, method: str, tenant_id: Optional[str], engines: Optional[Tuple[Engine, Engine]]):
+        factory = self.factory_for(method)
+        binds = {Base: factory.kw["bind"]}
+        if engines is not None:
+            engine, read_engine = engines
+            tenant_engine = read_engine if method.upper() in READ_METHODS else engine
+            binds.update({model: tenant_engine for model in TENANT_MODELS})
+            binds.update({table: tenant_engine for table in TENANT_TABLES})
+        if isinstance(factory, async_sessionmaker):
+            db = AsyncSession(binds=binds, sync_session_class=TenantSession, autoflush=False, expire_on_commit=False)
+        else:
+            db = TenantSession(binds=binds, autoflush=False)
+        db.info["tenant_id"] = tenant_id
+        return db
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "tenants": self.tenants.stats()}
+
+
+async def tenant_id_from_request(request: Request) -> Optional[str]:
+    """
+    Tenant do request: header X-Tenant-ID, query tenantId/tenant_id ou o
+    mesmo campo num corpo JSON (ex: POST de appointment/patient).
+    """
+    tenant_id = request.headers.get(TENANT_HEADER)
+    if tenant_id:
+        return tenant_id
+    for name in TENANT_PARAMS:
+        if request.query_params.get(name):
+            return request.query_params[name]
+    if request.headers.get("content-type", "").startswith("application/json"):
+        # O Starlette guarda o corpo lido; o FastAPI reaproveita para validar o body
+        body = await request.body()
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError:
+            return None
+        if isinstance(payload, dict):
+            for name in TENANT_PARAMS:
+                if isinstance(payload.get(name), str) and payload[name]:
+                    return payload[name]
+    return None
@@ -0,0 +1,247 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+
+
+# ============================================================================
+# FILA DE ESCRITA SERIALIZADA (ESCRITOR ÚNICO + GROUP COMMIT)
+# ============================================================================
+
+UnitOfWork = Callable[[Session], Any]
+
+
+class WriteQueue:
+    """
+    Uma thread dedicada aplica todas as escritas enfileiradas.
+
+    O SQLite aceita um escritor por vez; em vez de N threads disputando o
+    lock dentro do busy_timeout, cada unidade de trabalho (`fn(db)`) entra
+    numa fila e a thread escritora aplica várias por transação:
+
+    - cada unidade roda dentro de um SAVEPOINT; se ela falhar, só ela é
+      desfeita e o chamador recebe a exceção (ex: HTTPException 404)
+    - um único COMMIT cobre o lote (até `max_batch` unidades, esperando no
+      máximo `max_wait` segundos por mais unidades depois da primeira)
+    - os objetos retornados saem desanexados da sessão, já carregados
+
+    Use um engine com `begin=...` (SAVEPOINT no pysqlite) e uma conexão só.
+
+    Example:
+        write_engine = create_db_engine(DATABASE_URL, pool={"pool_size": 1, "max_overflow": 0},
+                                        begin="BEGIN IMMEDIATE")
+        write_queue = WriteQueue(sessionmaker(bind=write_engine))
+        appointment = write_queue.run(lambda db: insert_appointment(db, data))
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        max_batch: int = 64,
+        max_wait: float = 0.002,
+        timeout: float = 30,
+    ):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self._queue: "queue.Queue[Optional[Tuple[UnitOfWork, Future, float]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.committed = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+        self.commit_errors = 0
+        self.cancelled = 0
+        self.restarts = 0
+        self.wait_ms_total = 0.0
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                if self._thread.is_alive():
+                    return
+                # A thread morreu (erro fora de uma unidade): sobe outra para a fila não travar
+                self.restarts += 1
+                print("⚠️ Write queue thread died, restarting")
+            self._thread = threading.Thread(target=self._loop, name="db-writer", daemon=True)
+            self._thread.start()
+        print(f"✍️ Write queue started (max_batch={self.max_batch}, max_wait={self.max_wait}s)")
+
+    def stop(self):
+        """Aplica o que já está na fila e encerra a thread."""
+        with self._start_lock:
+            if self._thread is None:
+                return
+            self._queue.put(None)
+            self._thread.join(timeout=self.timeout)
+            self._thread = None
+
+    def submit(self, fn: UnitOfWork) -> Future:
+        """Enfileira `fn(db)`; o Future recebe o retorno depois do COMMIT."""
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        future: Future = Future()
+        with self._lock:
+            self.submitted += 1
+        self._queue.put((fn, future, time.perf_counter()))
+        return future
+
+    def run(self, fn: UnitOfWork) -> Any:
+        """Enfileira e espera o resultado (ou a exceção da unidade)."""
+        return self.submit(fn).result(timeout=self.timeout)
+
+    def _next_batch(self) -> Tuple[List[Tuple[UnitOfWork, Future, float]], bool]:
+        """Bloqueia pela primeira unidade e junta as que chegarem em até max_wait."""
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _apply(self, batch: List[Tuple[UnitOfWork, Future, float]]):
+        db = self.session_factory(expire_on_commit=False)
+        done: List[Tuple[Future, Any]] = []
+        started = time.perf_counter()
+        try:
+            for fn, future, enqueued_at in batch:
+                with self._lock:
+                    self.wait_ms_total += (started - enqueued_at) * 1000
+                # Unidade cancelada antes de começar (chamador desistiu): não aplica
+                if not future.set_running_or_notify_cancel():
+                    with self._lock:
+                        self.cancelled += 1
+                    continue
+                savepoint = db.begin_nested()
+                try:
+                    result = fn(db)
+                    db.flush()
+                    savepoint.commit()
+                    done.append((future, result))
+                except BaseException as e:
+                    savepoint.rollback()
+                    _resolve(future, error=e)
+                    with self._lock:
+                        self.failed += 1
+            db.commit()
+            db.expunge_all()
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Write queue commit failed ({len(done)} units): {str(e)}")
+            with self._lock:
+                self.commit_errors += 1
+                self.failed += len(done)
+            for future, _ in done:
+                _resolve(future, error=e)
+            return
+        finally:
+            db.close()
+
+        with self._lock:
+            self.batches += 1
+            self.committed += len(done)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        for future, result in done:
+            _resolve(future, result)
+
+    def _loop(self):
+        while True:
+            batch, stopping = self._next_batch()
+            if batch:
+                try:
+                    self._apply(batch)
+                except Exception as e:
+                    # Nunca deixa a thread morrer: as unidades do lote recebem o erro
+                    print(f"❌ Write queue batch failed: {str(e)}")
+                    for _, future, _ in batch:
+                        _resolve(future, error=e)
+            if stopping:
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        processed = self.committed + self.failed
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "queue_depth": self._queue.qsize(),
+            "submitted": self.submitted,
+            "committed": self.committed,
+            "failed": self.failed,
+            "commit_errors": self.commit_errors,
+            "cancelled": self.cancelled,
+            "restarts": self.restarts,
+            "batches": self.batches,
+            "avg_batch": round(self.committed / self.batches, 2) if self.batches else None,
+            "max_batch": self.max_batch_seen,
+            "avg_queue_wait_ms": round(self.wait_ms_total / processed, 3) if processed else None,
+        }
+
+
+def _resolve(future: Future, result: Any = None, error: Optional[BaseException] = None):
+    """Entrega o resultado sem falhar se o Future já foi resolvido ou cancelado."""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+_default_queue: Optional[WriteQueue] = None
+
+
+def set_write_queue(write_queue: Optional[WriteQueue]):
+    """Registra a fila do processo (main.py); None mantém escritas diretas."""
+    global _default_queue
+    _default_queue = write_queue
+
+
+def get_write_queue() -> Optional[WriteQueue]:
+    return _default_queue
+
+
+async def run_write(db: AsyncSession, fn: UnitOfWork) -> Any:
+    """
+    Executa uma unidade de escrita pela fila, se habilitada.
+
+    Sem fila, roda `fn` (código ORM síncrono) na sessão do request via
+    run_sync e faz o commit ali mesmo (o chamador continua responsável pelo
+    rollback em caso de erro). Com fila, espera o Future sem ocupar thread;
+    no timeout a unidade não é cancelada (shield): ela ainda pode ser
+    commitada pela thread escritora e o chamador recebe TimeoutError.
+
+    Example:
+        def insert(db):
+            db.add(patient)
+            return patient
+        patient = await run_write(db, insert)
+    """
+    if _default_queue is None:
+        result = await db.run_sync(fn)
+        await db.commit()
+        return result
+    future = asyncio.wrap_future(_default_queue.submit(fn))
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), _default_queue.timeout)
+    except asyncio.TimeoutError:
+        # Ninguém mais espera pelo resultado: consome a exceção tardia, se houver
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        raise
@@ -0,0 +1,106 @@
+"""
+Script: Importar pacientes em lote de um arquivo CSV ou NDJSON
+
+Mesmo fluxo de POST /v1/patients/import (utils/patient_import.py): leitura
+linha a linha, validação pelo PatientBase, um SELECT ... IN por chunk para
+os CPFs já cadastrados e um INSERT em lote por transação. Linhas com erro
+são listadas no fim (todas com --errors) e não interrompem a importação.
+Com DB_TENANT_MODE=per_tenant grava no arquivo do tenant em DB_TENANT_DIR.
+
+Uso:
+    cd backend
+    python import_patients.py pacientes.csv --tenant clinica-1
+    python import_patients.py pacientes.ndjson --tenant clinica-1 --errors erros.ndjson
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+# Fix encoding for Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import models  # noqa: F401 - registra todas as tabelas no metadata
+from database.tenancy import TenantEngines
+from models.user import Base
+from utils.patient_import import PATIENT_IMPORT_CHUNK_SIZE, PatientImporter, import_format, read_records
+
+load_dotenv()
+
+# Caminho do banco (mesma regra do main.py)
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATABASE_PATH = BASE_DIR / "alignwork.db"
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATABASE_PATH}")
+DB_TENANT_MODE = os.getenv("DB_TENANT_MODE", "shared").lower()
+DB_TENANT_DIR = Path(os.getenv("DB_TENANT_DIR", str(BASE_DIR / "tenants")))
+
+# Erros mostrados no terminal (todos vão para --errors)
+SHOWN_ERRORS = 20
+
+def tenant_engine(tenant_id: str):
+    """Engine de escrita onde ficam os pacientes do tenant"""
+    if DB_TENANT_MODE == "per_tenant":
+        return TenantEngines(DB_TENANT_DIR, maxsize=1).get(tenant_id)[0]
+    engine = create_engine(DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", type=Path, help="arquivo .csv (com cabeçalho) ou .ndjson")
+    parser.add_argument("--tenant", required=True, help="tenant_id que recebe os pacientes")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="default: pela extensão do arquivo")
+    parser.add_argument("--chunk-size", type=int, default=PATIENT_IMPORT_CHUNK_SIZE, help="linhas por transação")
+    parser.add_argument("--errors", type=Path, help="grava todas as linhas rejeitadas neste arquivo (NDJSON)")
+    args = parser.parse_args()
+
+    fmt = args.format or import_format(args.file.name)
+    if fmt is None:
+        print(f"[ERRO] Formato desconhecido: {args.file.name} (use --format csv|ndjson)")
+        sys.exit(1)
+
+    print(f"[IMPORT] {args.file} ({fmt}) -> tenant {args.tenant}")
+    print("=" * 60)
+
+    engine = tenant_engine(args.tenant)
+    importer = PatientImporter(args.tenant, chunk_size=args.chunk_size, max_errors=None)
+    with open(args.file, "rb") as stream:
+        for chunk in importer.chunks(read_records(stream, fmt)):
+            with Session(engine) as db:
+                importer.insert_chunk(db, chunk)
+                db.commit()
+            print(f"  {importer.created} criados, {importer.failed} rejeitados ({importer.total} linhas lidas)")
+    engine.dispose()
+
+    report = importer.report()
+    for error in report["errors"][:SHOWN_ERRORS]:
+        print(f"[ERRO] linha {error['line']} (cpf {error['cpf']}): {error['error']}")
+    if report["failed"] > SHOWN_ERRORS:
+        print(f"  ... mais {report['failed'] - SHOWN_ERRORS} linhas rejeitadas")
+    if args.errors:
+        with open(args.errors, "w", encoding="utf-8") as out:
+            for error in report["errors"]:
+                out.write(json.dumps(error, ensure_ascii=False) + "\n")
+        print(f"[OK] Linhas rejeitadas em {args.errors}")
+
+    print(f"\n[OK] {report['created']} de {report['total']} pacientes importados em {report['elapsed_ms'] / 1000:.1f}s")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\n[ERRO] Erro na importação: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
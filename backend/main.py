@@ -1,24 +1,42 @@
 from fastapi import FastAPI, Request, status
+import asyncio
+import logging
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 from dotenv import load_dotenv
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
 from models.user import Base
 from models.consultorio import Consultorio  # Importar para criar a tabela
-from routes import auth, appointments, patients, consultorios, users
+from routes import auth, appointments, patients, consultorios, users, metrics
 from auth.dependencies import get_db
+from auth.revocation import AUTH_REVOCATION_PURGE_SECONDS, AUTH_REVOCATION_SYNC_SECONDS, revocation_store
+from auth.utils import AUTH_BCRYPT_CALIBRATION_PATH, calibrate_bcrypt_rounds, password_executor
+from cache import InvalidationMiddleware, PeriodicTask
+from ratelimit import limiter
+from database import (
+    READ_METHODS, SessionRouter, TenantEngines, TenantSessionRouter, WriteQueue, create_db_engine, is_sqlite_url,
+    pool_config_from_env, set_async_session_router, set_session_router, set_write_queue,
+    tenant_id_from_request,
+)
 
 # Load environment variables
 load_dotenv()
 
+# Logs dos módulos que usam logging (ex: routes/patients.py); sem isso o INFO some
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+
 # Database setup
 # Definir caminho absoluto para o banco na raiz do projeto
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -29,26 +47,139 @@ print(f"📦 Database location: {DATABASE_PATH}")
 print(f"📦 File exists: {DATABASE_PATH.exists()}")
 print(f"📦 File size: {DATABASE_PATH.stat().st_size if DATABASE_PATH.exists() else 0} bytes")
 
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={
-        "check_same_thread": False,
-        "timeout": 30
-    }
-)
+# Perfil de produção: WAL + pragmas em cada conexão, pool configurável (SQLITE_*, DB_POOL_*)
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Pool somente leitura (query_only + snapshot do WAL) para GET/HEAD/OPTIONS;
+# dimensionado à parte por DB_READ_POOL_*. Bancos :memory: não têm como compartilhar.
+DB_READ_ROUTING_ENABLED = os.getenv("DB_READ_ROUTING_ENABLED", "true").lower() == "true"
+DB_READ_ROUTING = DB_READ_ROUTING_ENABLED and is_sqlite_url(DATABASE_URL) and ":memory:" not in DATABASE_URL
+ReadSessionLocal = None
+if DB_READ_ROUTING:
+    read_engine = create_db_engine(DATABASE_URL, pool=pool_config_from_env("DB_READ_POOL"), read_only=True)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Rotas usam AsyncSession (aiosqlite) com o mesmo perfil e o mesmo roteamento
+# leitura/escrita; os engines síncronos acima ficam para tarefas de background
+# (prewarm, refresh do cache, fila de escrita) e scripts
+async_engine = create_db_engine(DATABASE_URL, asynchronous=True)
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, bind=async_engine)
+AsyncReadSessionLocal = None
+if DB_READ_ROUTING:
+    async_read_engine = create_db_engine(
+        DATABASE_URL, pool=pool_config_from_env("DB_READ_POOL"), read_only=True, asynchronous=True
+    )
+    AsyncReadSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, bind=async_read_engine)
+
+# Fila de admissão (FIFO) na frente de cada pool async: com mais requests que
+# conexões, quem chega não fura a fila de quem já espera uma conexão
+# (sem isso o p99 dispara sob carga). Default: pool_size + max_overflow.
+def _pool_capacity(prefix: str) -> int:
+    pool = pool_config_from_env(prefix)
+    return pool["pool_size"] + pool["max_overflow"]
+
+db_session_slots = {
+    "write": asyncio.Semaphore(int(os.getenv("DB_MAX_CONCURRENT_SESSIONS", _pool_capacity("DB_POOL")))),
+    "read": asyncio.Semaphore(int(os.getenv("DB_READ_MAX_CONCURRENT_SESSIONS", _pool_capacity("DB_READ_POOL")))),
+}
+
+# Banco por tenant (opt-in): patients/appointments/consultorios/rollups de cada
+# tenant_id num arquivo próprio em DB_TENANT_DIR; users ficam em DATABASE_URL
+DB_TENANT_MODE = os.getenv("DB_TENANT_MODE", "shared").lower() == "per_tenant"
+if DB_TENANT_MODE:
+    DB_TENANT_DIR = Path(os.getenv("DB_TENANT_DIR", str(BASE_DIR / "tenants")))
+    DB_TENANT_MAX_OPEN = int(os.getenv("DB_TENANT_MAX_OPEN", "64"))
+    DB_TENANT_POOL = {
+        "pool_size": int(os.getenv("DB_TENANT_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_TENANT_POOL_MAX_OVERFLOW", "5")),
+        "pool_pre_ping": False,
+    }
+    tenant_engines = TenantEngines(DB_TENANT_DIR, maxsize=DB_TENANT_MAX_OPEN, pool=DB_TENANT_POOL)
+    async_tenant_engines = TenantEngines(DB_TENANT_DIR, maxsize=DB_TENANT_MAX_OPEN, pool=DB_TENANT_POOL,
+                                         asynchronous=True)
+    session_router = TenantSessionRouter(SessionLocal, ReadSessionLocal, tenant_engines)
+    async_session_router = TenantSessionRouter(AsyncSessionLocal, AsyncReadSessionLocal, async_tenant_engines)
+    print(f"📦 Per-tenant databases: {tenant_engines.directory}")
+else:
+    session_router = SessionRouter(SessionLocal, ReadSessionLocal)
+    async_session_router = SessionRouter(AsyncSessionLocal, AsyncReadSessionLocal)
+set_session_router(session_router)
+set_async_session_router(async_session_router)
+
+# Fila de escrita opt-in: uma thread com a única conexão de escrita aplica
+# create_appointment / create_patient / PATCH de status em lotes (group commit)
+DB_WRITE_QUEUE_ENABLED = os.getenv("DB_WRITE_QUEUE_ENABLED", "false").lower() == "true"
+write_queue = None
+if DB_WRITE_QUEUE_ENABLED and DB_TENANT_MODE:
+    # Um escritor global serializaria de novo os tenants; cada arquivo já tem o seu lock
+    print("⚠️ DB_WRITE_QUEUE_ENABLED ignored in per-tenant database mode")
+elif DB_WRITE_QUEUE_ENABLED and is_sqlite_url(DATABASE_URL) and ":memory:" not in DATABASE_URL:
+    write_queue_engine = create_db_engine(
+        DATABASE_URL,
+        pool={"pool_size": 1, "max_overflow": 0, "pool_pre_ping": False},
+        begin="BEGIN IMMEDIATE",
+    )
+    write_queue = WriteQueue(
+        sessionmaker(autocommit=False, autoflush=False, bind=write_queue_engine),
+        max_batch=int(os.getenv("DB_WRITE_QUEUE_MAX_BATCH", "64")),
+        max_wait=float(os.getenv("DB_WRITE_QUEUE_MAX_WAIT_MS", "2")) / 1000,
+        timeout=float(os.getenv("DB_WRITE_QUEUE_TIMEOUT_SECONDS", "30")),
+    )
+set_write_queue(write_queue)
+
 # Create tables
 Base.metadata.create_all(bind=engine)
 
-# Rate limiter setup
-limiter = Limiter(key_func=get_remote_address)
+# Pré-aquecimento das chaves de mega_stats antes da meia-noite local
+STATS_PREWARM_ENABLED = os.getenv("STATS_PREWARM_ENABLED", "true").lower() == "true"
+STATS_PREWARM_INTERVAL_SECONDS = int(os.getenv("STATS_PREWARM_INTERVAL_SECONDS", "60"))
+stats_prewarm_task = PeriodicTask(
+    "stats-prewarm",
+    STATS_PREWARM_INTERVAL_SECONDS,
+    lambda: appointments.prewarm_next_day_stats(lambda tenant_id: session_router.open_session("GET", tenant_id)),
+)
+
+# Revogação de tokens: revogações de outros workers entram no Bloom filter
+# local a cada sync; jtis expirados saem da tabela no purge
+revocation_sync_task = PeriodicTask("token-revocation-sync", AUTH_REVOCATION_SYNC_SECONDS, revocation_store.sync)
+revocation_purge_task = PeriodicTask("token-revocation-purge", AUTH_REVOCATION_PURGE_SECONDS, revocation_store.purge)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if STATS_PREWARM_ENABLED:
+        stats_prewarm_task.start()
+    revocation_sync_task.start()
+    revocation_purge_task.start()
+    if write_queue is not None:
+        write_queue.start()
+    # Bancos :memory: do engine async são outra conexão: garante as tabelas lá também
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    # Custo do bcrypt para este hardware, medido no próprio pool de hashing e
+    # compartilhado com os outros workers pelo arquivo da revogação
+    calibration = await password_executor.run(calibrate_bcrypt_rounds, AUTH_BCRYPT_CALIBRATION_PATH)
+    print(f"🔐 bcrypt rounds: {calibration['rounds']} ({calibration['source']}, {calibration['measured_ms']} ms)")
+    yield
+    stats_prewarm_task.stop()
+    revocation_sync_task.stop()
+    revocation_purge_task.stop()
+    if write_queue is not None:
+        write_queue.stop()
+    if DB_TENANT_MODE:
+        tenant_engines.dispose_all()
+        await async_tenant_engines.dispose_all_async()
+    password_executor.shutdown()
+    await async_engine.dispose()
+    if AsyncReadSessionLocal is not None:
+        await async_read_engine.dispose()
 
 # FastAPI app
 app = FastAPI(
     title="AlignWork API",
     description="API for AlignWork - Healthcare Management System",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Register limiter with app
@@ -90,9 +221,10 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
                 )
     
     # Default validation error response
+    # (ctx.error de validators é a exceção original: vira a mensagem)
     return JSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        content={"detail": errors}
+        content={"detail": jsonable_encoder(errors, custom_encoder={Exception: str})}
     )
 
 # CORS configuration
@@ -105,13 +237,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Dependency override for get_db
-def override_get_db():
-    try:
-        db = SessionLocal()
-        yield db
-    finally:
-        db.close()
+# Invalidações de cache adiadas no commit (CACHE_BACKEND=sqlite) terminam antes da resposta
+app.add_middleware(InvalidationMiddleware)
+
+# Dependency override for get_db: AsyncSession de leitura ou de escrita pelo
+# método HTTP. No modo banco-por-tenant o tenant pode vir no corpo JSON.
+async def override_get_db(request: Request):
+    tenant_id = await tenant_id_from_request(request) if DB_TENANT_MODE else None
+    read = DB_READ_ROUTING and request.method.upper() in READ_METHODS
+    async with db_session_slots["read" if read else "write"]:
+        db = await async_session_router.open_session_async(request.method, tenant_id)
+        try:
+            yield db
+        finally:
+            await db.close()
 
 app.dependency_overrides[get_db] = override_get_db
 
@@ -121,6 +260,7 @@ app.include_router(users.router, prefix="/api")
 app.include_router(appointments.router, prefix="/api")
 app.include_router(patients.router, prefix="/api")
 app.include_router(consultorios.router, prefix="/api")
+app.include_router(metrics.router, prefix="/api")
 
 @app.get("/")
 async def root():
@@ -0,0 +1,81 @@
+"""
+Script de migração: Criar índices declarados nos models que faltam no banco
+
+Base.metadata.create_all() só cria tabelas novas; índices adicionados a
+tabelas existentes (ex: ix_appointments_tenant_starts_at) precisam deste script.
+Idempotente: índices já existentes são ignorados. Ao final roda ANALYZE para
+o planner do SQLite escolher entre os índices compostos.
+
+Uso:
+    cd backend
+    python migrate_indexes.py
+"""
+import os
+import sys
+from pathlib import Path
+
+# Fix encoding for Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, inspect, text
+
+import models  # noqa: F401 - registra todas as tabelas no metadata
+from models.user import Base
+
+load_dotenv()
+
+# Caminho do banco (mesma regra do main.py)
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATABASE_PATH = BASE_DIR / "alignwork.db"
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATABASE_PATH}")
+
+def ensure_indexes(engine) -> list:
+    """
+    Cria tabelas e índices dos models que ainda não existem no banco.
+
+    Returns:
+        Nomes dos índices criados
+    """
+    Base.metadata.create_all(bind=engine)
+    created = []
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda ix: ix.name):
+                if index.name not in existing:
+                    index.create(conn)
+                    created.append(index.name)
+        conn.execute(text("ANALYZE"))
+    return created
+
+def migrate():
+    """Executa a migração"""
+    print(f"[MIGRACAO] Banco: {DATABASE_URL}")
+    print("=" * 60)
+
+    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    created = ensure_indexes(engine)
+
+    if created:
+        for name in created:
+            print(f"[OK] Índice criado: {name}")
+    else:
+        print("[OK] Nenhum índice pendente")
+    print("[OK] ANALYZE concluído")
+
+if __name__ == "__main__":
+    try:
+        migrate()
+    except Exception as e:
+        print(f"\n[ERRO] Erro na migracao: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,99 @@
+"""
+Script de migração: Adicionar e preencher patients.name_key (chave de busca do nome)
+
+Adiciona a coluna name_key (nome minúsculo, sem acentos, espaços colapsados;
+ver utils.text.normalize_name), preenche os pacientes existentes em lotes e
+cria o índice (tenant_id, name_key). Idempotente: só linhas com name_key
+NULL são processadas. Com DB_TENANT_MODE=per_tenant processa também cada
+arquivo em DB_TENANT_DIR (rode antes de migrate_to_tenant_dbs.py, que copia
+todas as colunas do banco compartilhado).
+
+Uso:
+    cd backend
+    python migrate_patient_name_key.py
+"""
+import os
+import sys
+from pathlib import Path
+
+# Fix encoding for Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, inspect, text
+
+import models  # noqa: F401 - registra todas as tabelas no metadata
+from models.patient import Patient
+from models.user import Base
+from utils.text import normalize_name
+
+load_dotenv()
+
+# Caminho do banco (mesma regra do main.py)
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATABASE_PATH = BASE_DIR / "alignwork.db"
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATABASE_PATH}")
+DB_TENANT_MODE = os.getenv("DB_TENANT_MODE", "shared").lower()
+DB_TENANT_DIR = Path(os.getenv("DB_TENANT_DIR", str(BASE_DIR / "tenants")))
+
+# Linhas por transação: não segura o lock de escrita do SQLite por muito tempo
+BATCH_SIZE = 5000
+
+def backfill(url: str):
+    """Adiciona a coluna (se faltar), preenche name_key e cria o índice"""
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as conn:
+        columns = {column["name"] for column in inspect(conn).get_columns("patients")}
+        if "name_key" not in columns:
+            conn.execute(text("ALTER TABLE patients ADD COLUMN name_key VARCHAR"))
+            print(f"[OK] {url}: coluna name_key adicionada")
+
+    filled = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                text("SELECT id, name FROM patients WHERE name_key IS NULL LIMIT :limit"),
+                {"limit": BATCH_SIZE},
+            ).all()
+            if not rows:
+                break
+            conn.execute(
+                text("UPDATE patients SET name_key = :name_key WHERE id = :id"),
+                [{"id": row.id, "name_key": normalize_name(row.name)} for row in rows],
+            )
+        filled += len(rows)
+
+    with engine.begin() as conn:
+        for index in Patient.__table__.indexes:
+            index.create(conn, checkfirst=True)
+        conn.execute(text("ANALYZE patients"))
+    engine.dispose()
+    print(f"[OK] {url}: {filled} pacientes preenchidos")
+
+def migrate():
+    """Executa a migração"""
+    urls = [DATABASE_URL]
+    if DB_TENANT_MODE == "per_tenant":
+        urls += [f"sqlite:///{path}" for path in sorted(DB_TENANT_DIR.glob("*.db"))]
+
+    print(f"[MIGRACAO] {len(urls)} banco(s)")
+    print("=" * 60)
+    for url in urls:
+        backfill(url)
+
+if __name__ == "__main__":
+    try:
+        migrate()
+    except Exception as e:
+        print(f"\n[ERRO] Erro na migracao: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,95 @@
+"""
+Script de migração: Copiar os dados de cada tenant do banco compartilhado
+para o seu próprio arquivo (modo DB_TENANT_MODE=per_tenant)
+
+Copia patients, consultorios, appointments e appointment_daily_rollups de
+cada tenant_id (mantendo os IDs). Users continuam no banco compartilhado,
+que passa a ser o banco de controle. Arquivos de tenant que já têm dados
+são ignorados (rode de novo sem medo).
+
+Uso:
+    cd backend
+    python migrate_to_tenant_dbs.py
+"""
+import os
+import sys
+from pathlib import Path
+
+# Fix encoding for Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+import models  # noqa: F401 - registra todas as tabelas no metadata
+from database.tenancy import TENANT_TABLES, TenantEngines, tenant_db_path
+
+load_dotenv()
+
+# Caminho do banco (mesma regra do main.py)
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATABASE_PATH = BASE_DIR / "alignwork.db"
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATABASE_PATH}")
+DB_TENANT_DIR = Path(os.getenv("DB_TENANT_DIR", str(BASE_DIR / "tenants")))
+
+def migrate():
+    """Executa a migração"""
+    print(f"[MIGRACAO] Banco compartilhado: {DATABASE_URL}")
+    print(f"[MIGRACAO] Diretório dos tenants: {DB_TENANT_DIR}")
+    print("=" * 60)
+
+    shared_path = make_url(DATABASE_URL).database
+    shared = create_engine(DATABASE_URL)
+    with shared.connect() as conn:
+        tenant_ids = sorted({
+            row[0]
+            for table in TENANT_TABLES
+            for row in conn.execute(text(f"SELECT DISTINCT tenant_id FROM {table.name}"))
+        })
+    shared.dispose()
+    print(f"[MIGRACAO] {len(tenant_ids)} tenants encontrados")
+
+    tenants = TenantEngines(DB_TENANT_DIR, maxsize=1)
+    for tenant_id in tenant_ids:
+        engine, _ = tenants.get(tenant_id)
+        with engine.connect() as conn:
+            if conn.execute(text("SELECT 1 FROM patients LIMIT 1")).first():
+                print(f"[SKIP] {tenant_id}: arquivo já tem dados")
+                continue
+            # ATTACH não pode rodar dentro de transação: fica fora do commit
+            conn.rollback()
+            conn.exec_driver_sql("ATTACH DATABASE ? AS shared", (shared_path,))
+            try:
+                # Ordem de TENANT_TABLES respeita as FKs (patients/consultorios antes de appointments)
+                for table in TENANT_TABLES:
+                    columns = ", ".join(column.name for column in table.columns)
+                    conn.execute(
+                        text(f"INSERT INTO main.{table.name} ({columns}) "
+                             f"SELECT {columns} FROM shared.{table.name} WHERE tenant_id = :tenant_id"),
+                        {"tenant_id": tenant_id},
+                    )
+                conn.commit()
+            finally:
+                conn.rollback()
+                conn.exec_driver_sql("DETACH DATABASE shared")
+                conn.commit()
+        print(f"[OK] {tenant_id} -> {tenant_db_path(DB_TENANT_DIR, tenant_id)}")
+    tenants.dispose_all()
+
+    print("\n[OK] Migração concluída. Ative com DB_TENANT_MODE=per_tenant")
+
+if __name__ == "__main__":
+    try:
+        migrate()
+    except Exception as e:
+        print(f"\n[ERRO] Erro na migracao: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
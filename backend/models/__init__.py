@@ -3,5 +3,6 @@ from models.user import User, Base
 from models.appointment import Appointment
 from models.patient import Patient
 from models.consultorio import Consultorio
+from models.appointment_rollup import AppointmentDailyRollup
 
-__all__ = ["User", "Base", "Appointment", "Patient", "Consultorio"]
+__all__ = ["User", "Base", "Appointment", "Patient", "Consultorio", "AppointmentDailyRollup"]
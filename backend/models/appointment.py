@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from models.user import Base
 from models.consultorio import Consultorio
@@ -25,4 +25,12 @@ class Appointment(Base):
     status = Column(String, default="pending")  # pending, confirmed, cancelled
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-
+    
+    # Índices compostos para as consultas quentes (tenant + intervalo de starts_at).
+    # Bancos existentes: aplicar com `python migrate_indexes.py`
+    __table_args__ = (
+        # list_appointments, get_summary, paginação por cursor (starts_at, id)
+        Index('ix_appointments_tenant_starts_at', 'tenant_id', 'starts_at'),
+        # mega_stats: status IN ('confirmed', 'pending') + intervalo
+        Index('ix_appointments_tenant_status_starts_at', 'tenant_id', 'status', 'starts_at'),
+    )
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Date, UniqueConstraint
+from models.user import Base
+
+class AppointmentDailyRollup(Base):
+    """
+    Contagem diária de appointments por tenant, consultório e status.
+    
+    Mantida incrementalmente por create_appointment/update_appointment_status
+    (mesma transação) e regenerável com `python rebuild_rollups.py`.
+    
+    local_date é o dia no timezone ROLLUP_TZ (ver utils/rollup.py).
+    consultorio_id = 0 representa appointments sem consultório, para que a
+    chave única funcione (NULLs não colidem em UNIQUE no SQLite).
+    """
+    __tablename__ = "appointment_daily_rollups"
+    
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(String, nullable=False)
+    local_date = Column(Date, nullable=False)
+    consultorio_id = Column(Integer, nullable=False, default=0)
+    status = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint('tenant_id', 'local_date', 'consultorio_id', 'status', name='uix_rollup_key'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, Text, UniqueConstraint, Index, DDL, event
 from models.user import Base
 from datetime import datetime
 
@@ -16,6 +16,10 @@ class Patient(Base):
     
     # Informações pessoais
     name = Column(String, nullable=False)
+    # Chave de busca do nome (utils.text.normalize_name): minúscula, sem acento,
+    # espaços colapsados. Nullable só para bancos antigos até o backfill
+    # (migrate_patient_name_key.py)
+    name_key = Column(String, nullable=True)
     cpf = Column(String, nullable=False, index=True)  # Remover unique=True global
     phone = Column(String, nullable=False)
     email = Column(String, nullable=True)
@@ -31,7 +35,74 @@ class Patient(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Constraint composto: CPF único POR TENANT
+    # Índice (tenant_id, name): list_patients ordenado por nome / cursor (name, id)
+    # Índice (tenant_id, name_key): busca por prefixo do nome em range scan
     __table_args__ = (
         UniqueConstraint('tenant_id', 'cpf', name='uix_tenant_cpf'),
+        Index('ix_patients_tenant_name', 'tenant_id', 'name'),
+        Index('ix_patients_tenant_name_key', 'tenant_id', 'name_key'),
     )
 
+
+# ============================================================================
+# ÍNDICE FULL-TEXT (FTS5) DA BUSCA DE PACIENTES
+# ============================================================================
+
+def _digits(column: str) -> str:
+    """Expressão SQL com só os dígitos de um telefone mascarado."""
+    expr = column
+    for char in "()-. +/":
+        expr = f"REPLACE({expr}, '{char}', '')"
+    return expr
+
+def _phone_tokens(column: str) -> str:
+    """Telefone indexado como dois tokens: com DDD e sem DDD ("81988882222 988882222")."""
+    digits = _digits(column)
+    return f"CASE WHEN length({digits}) >= 10 THEN {digits} || ' ' || substr({digits}, 3) ELSE {digits} END"
+
+def patient_search_row(prefix: str) -> str:
+    """Valores de uma linha de patients_fts (rowid, name, cpf, phone, email) a partir do alias `prefix`."""
+    return f"{prefix}.id, {prefix}.name, {prefix}.cpf, {_phone_tokens(prefix + '.phone')}, {prefix}.email"
+
+# Tabela contentless (rowid = patients.id): guarda só o índice invertido.
+# unicode61 + remove_diacritics: "joao" encontra "João"; prefix: índices
+# extras para consultas "jo"*, "joa"* (autocomplete a cada tecla).
+PATIENT_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+        name, cpf, phone, email,
+        content='',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3 4'
+    )
+    """,
+    # Ranking (bm25): nome pesa mais que CPF/telefone, que pesam mais que email
+    "INSERT INTO patients_fts(patients_fts, rank) VALUES('rank', 'bm25(10.0, 5.0, 5.0, 1.0)')",
+    # Triggers: qualquer escrita (ORM, executemany, upsert) mantém o índice.
+    # Em tabela contentless o 'delete' precisa dos mesmos valores indexados.
+    f"""
+    CREATE TRIGGER IF NOT EXISTS patients_fts_ai AFTER INSERT ON patients BEGIN
+        INSERT INTO patients_fts(rowid, name, cpf, phone, email) VALUES ({patient_search_row('new')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS patients_fts_ad AFTER DELETE ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, name, cpf, phone, email) VALUES ('delete', {patient_search_row('old')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS patients_fts_au AFTER UPDATE OF name, cpf, phone, email ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, name, cpf, phone, email) VALUES ('delete', {patient_search_row('old')});
+        INSERT INTO patients_fts(rowid, name, cpf, phone, email) VALUES ({patient_search_row('new')});
+    END
+    """,
+]
+
+# Triggers acima: rebuild_patient_search recria todos (IF NOT EXISTS não troca
+# um trigger antigo, e o 'delete' precisa gravar os mesmos valores do INSERT)
+PATIENT_SEARCH_TRIGGERS = ("patients_fts_ai", "patients_fts_ad", "patients_fts_au")
+
+# Bancos novos (inclusive os de cada tenant) já nascem com o índice; bancos
+# existentes (ou depois de mudar os valores indexados): `python rebuild_patient_search.py`
+for _statement in PATIENT_SEARCH_DDL:
+    event.listen(Patient.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
@@ -0,0 +1,5 @@
+# Rate limit package
+from ratelimit.limiter import RATE_LIMIT_STORAGE_URI, RATE_LIMIT_STRATEGY, TimedLimiter, limiter
+from ratelimit.storage import SQLiteStorage
+
+__all__ = ["RATE_LIMIT_STORAGE_URI", "RATE_LIMIT_STRATEGY", "TimedLimiter", "limiter", "SQLiteStorage"]
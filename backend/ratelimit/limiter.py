@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from slowapi import Limiter
+from slowapi.errors import RateLimitExceeded
+from slowapi.util import get_remote_address
+
+import ratelimit.storage  # noqa: F401  (registra o esquema sqlite:// no limits)
+
+
+# ============================================================================
+# LIMITER ÚNICO DA API
+# ============================================================================
+
+class TimedLimiter(Limiter):
+    """
+    Limiter do slowapi que mede o custo de cada verificação.
+
+    O tempo medido é o da checagem inteira (chave + storage), ou seja, o
+    overhead que o rate limit adiciona a cada request limitado.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checks = 0
+        self.blocked = 0
+        self.check_us_total = 0.0
+        self.check_us_max = 0.0
+
+    def _check_request_limit(self, request, endpoint_func, in_middleware: bool = True) -> None:
+        started_at = time.perf_counter()
+        blocked = False
+        try:
+            super()._check_request_limit(request, endpoint_func, in_middleware)
+        except RateLimitExceeded:
+            blocked = True
+            raise
+        finally:
+            elapsed_us = (time.perf_counter() - started_at) * 1e6
+            with self._stats_lock:
+                self.checks += 1
+                self.blocked += blocked
+                self.check_us_total += elapsed_us
+                self.check_us_max = max(self.check_us_max, elapsed_us)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = {
+                "storage": self._storage_uri.split("://", 1)[0],
+                "strategy": RATE_LIMIT_STRATEGY,
+                "checks": self.checks,
+                "blocked": self.blocked,
+                "avg_check_us": round(self.check_us_total / self.checks, 1) if self.checks else None,
+                "max_check_us": round(self.check_us_max, 1),
+            }
+        storage_stats = getattr(self._storage, "stats", None)
+        if storage_stats is not None:
+            stats.update(storage_stats())
+        return stats
+
+
+# "memory://" volta ao contador por processo (cada worker do uvicorn com o seu)
+_DEFAULT_STORAGE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ratelimit.db")
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", f"sqlite:///{_DEFAULT_STORAGE_PATH}")
+RATE_LIMIT_STRATEGY = os.getenv("RATE_LIMIT_STRATEGY", "sliding-window-counter")
+# sqlite://: espera máxima pelo lock de escrita antes de recusar o request (429)
+RATE_LIMIT_BUSY_TIMEOUT_MS = float(os.getenv("RATE_LIMIT_BUSY_TIMEOUT_MS", "50"))
+
+limiter = TimedLimiter(
+    key_func=get_remote_address,
+    strategy=RATE_LIMIT_STRATEGY,
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    storage_options={"busy_timeout_ms": RATE_LIMIT_BUSY_TIMEOUT_MS} if RATE_LIMIT_STORAGE_URI.startswith("sqlite") else {},
+)
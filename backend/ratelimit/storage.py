@@ -0,0 +1,208 @@
+import sqlite3
+import sys
+import threading
+import time
+from math import floor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+
+
+# ============================================================================
+# STORAGE SQLITE PARA O LIMITS (COMPARTILHADO ENTRE WORKERS)
+# ============================================================================
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Contadores de rate limit num arquivo SQLite local (modo WAL).
+
+    Registrado no `limits` com o esquema `sqlite://` (mesma convenção de
+    caminho do SQLAlchemy: `sqlite:///relativo.db`, `sqlite:////abs/x.db`).
+    Todos os workers que apontam para o mesmo arquivo dividem os contadores.
+
+    - uma linha (key, count, expires_at) por janela; o sliding window counter
+      usa só duas janelas fixas por chave (anterior e atual)
+    - verificar e incrementar acontecem na mesma transação BEGIN IMMEDIATE,
+      então dois workers não aprovam juntos o último request da janela
+    - linhas expiradas são removidas a cada `purge_interval` segundos, por
+      quem estiver escrevendo
+    - a checagem roda dentro do event loop (slowapi é síncrono): o lock de
+      escrita é esperado por no máximo `busy_timeout_ms`; depois disso o
+      request é recusado (fail-closed, 429, contado em `lock_timeouts`). A
+      disputa pelo lock vem dos próprios requests limitados, então liberar
+      nesse caso deixaria uma rajada passar do limite
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS rate_limits (
+            key TEXT PRIMARY KEY,
+            count INTEGER NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS ix_rate_limits_expires_at ON rate_limits(expires_at);
+    """
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, purge_interval: float = 60,
+                 busy_timeout_ms: float = 50, **options: Any):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = uri.split("://", 1)[1][1:] or ":memory:"
+        self.purge_interval = float(purge_interval)
+        self.busy_timeout_ms = float(busy_timeout_ms)
+        self.lock_timeouts = 0
+        self._local = threading.local()
+        # time.time (não monotonic): expires_at é comparado entre processos
+        self._next_purge = time.time() + self.purge_interval
+        self._conn().executescript(self.SCHEMA)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: transações explícitas com BEGIN IMMEDIATE
+            conn = sqlite3.connect(
+                self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _purge(self, conn: sqlite3.Connection, now: float):
+        """Remove janelas expiradas (chamado dentro de uma transação de escrita)."""
+        if now >= self._next_purge:
+            self._next_purge = now + self.purge_interval
+            conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+
+    def _write(self, fn: Callable[[sqlite3.Connection, float], Any], fail_closed: Any) -> Any:
+        """
+        Executa `fn(conn, now)` numa transação BEGIN IMMEDIATE.
+
+        Banco travado por outro worker além do busy timeout (OperationalError)
+        não espera nem derruba o request: retorna `fail_closed` (limite estourado).
+        """
+        now = time.time()
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            result = fn(conn, now)
+            self._purge(conn, now)
+            conn.execute("COMMIT")
+            return result
+        except sqlite3.OperationalError:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self.lock_timeouts += 1
+            return fail_closed
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    def _counts(self, conn: sqlite3.Connection, keys: Tuple[str, ...], now: float) -> Dict[str, int]:
+        placeholders = ", ".join("?" * len(keys))
+        rows = conn.execute(
+            f"SELECT key, count FROM rate_limits WHERE key IN ({placeholders}) AND expires_at > ?",
+            (*keys, now),
+        )
+        return dict(rows.fetchall())
+
+    def _window_info(self, conn: sqlite3.Connection, key: str, expiry: int, now: float):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        counts = self._counts(conn, (previous_key, current_key), now)
+        previous_count = counts.get(previous_key, 0)
+        current_count = counts.get(current_key, 0)
+        # Mesmas fórmulas do MemoryStorage do limits
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_key, current_key, previous_count, previous_ttl, current_count, current_ttl
+
+    # ------------------------------------------------------------------------
+    # Janela fixa (Storage)
+    # ------------------------------------------------------------------------
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        def increment(conn: sqlite3.Connection, now: float) -> int:
+            return conn.execute(
+                "INSERT INTO rate_limits (key, count, expires_at) VALUES (?1, ?2, ?3 + ?4) "
+                "ON CONFLICT(key) DO UPDATE SET "
+                "count = CASE WHEN expires_at <= ?3 THEN ?2 ELSE count + ?2 END, "
+                "expires_at = CASE WHEN expires_at <= ?3 THEN ?3 + ?4 ELSE expires_at END "
+                "RETURNING count",
+                (key, amount, now, expiry),
+            ).fetchone()[0]
+
+        # Fail-closed: contagem acima de qualquer limite
+        return self._write(increment, sys.maxsize)
+
+    def get(self, key: str) -> int:
+        return self._counts(self._conn(), (key,), time.time()).get(key, 0)
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        row = self._conn().execute(
+            "SELECT expires_at FROM rate_limits WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def check(self) -> bool:
+        try:
+            self._conn().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        removed = conn.execute("DELETE FROM rate_limits").rowcount
+        conn.execute("COMMIT")
+        return removed
+
+    def clear(self, key: str) -> None:
+        self._conn().execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+    # ------------------------------------------------------------------------
+    # Sliding window counter
+    # ------------------------------------------------------------------------
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+
+        def acquire(conn: sqlite3.Connection, now: float) -> bool:
+            _, current_key, previous_count, previous_ttl, current_count, _ = self._window_info(conn, key, expiry, now)
+            weighted_count = previous_count * previous_ttl / expiry + current_count
+            if floor(weighted_count) + amount > limit:
+                return False
+            # A janela atual ainda serve de "anterior" na próxima: vive 2x expiry
+            conn.execute(
+                "INSERT INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET count = count + excluded.count",
+                (current_key, amount, (int(now / expiry) + 2) * expiry),
+            )
+            return True
+
+        return self._write(acquire, False)
+
+    def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+        return self._window_info(self._conn(), key, expiry, time.time())[2:]
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self._conn().execute("DELETE FROM rate_limits WHERE key IN (?, ?)", (previous_key, current_key))
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        keys = self._conn().execute("SELECT COUNT(*) FROM rate_limits WHERE expires_at > ?", (now,)).fetchone()[0]
+        return {
+            "path": self.path,
+            "active_windows": keys,
+            "busy_timeout_ms": self.busy_timeout_ms,
+            "lock_timeouts": self.lock_timeouts,
+        }
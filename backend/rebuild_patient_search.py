@@ -0,0 +1,68 @@
+"""
+Script: Criar/regenerar o índice de busca de pacientes (patients_fts, FTS5)
+
+Bancos criados depois do índice já nascem com a tabela virtual e os
+triggers; este script cobre bancos existentes, um índice corrompido ou
+uma mudança nos valores indexados (recria os triggers e repopula).
+Com DB_TENANT_MODE=per_tenant processa também cada arquivo em DB_TENANT_DIR.
+
+Uso:
+    cd backend
+    python rebuild_patient_search.py
+"""
+import os
+import sys
+from pathlib import Path
+
+# Fix encoding for Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+
+import models  # noqa: F401 - registra todas as tabelas no metadata
+from models.user import Base
+from utils.patient_search import rebuild_patient_search
+
+load_dotenv()
+
+# Caminho do banco (mesma regra do main.py)
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATABASE_PATH = BASE_DIR / "alignwork.db"
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATABASE_PATH}")
+DB_TENANT_MODE = os.getenv("DB_TENANT_MODE", "shared").lower()
+DB_TENANT_DIR = Path(os.getenv("DB_TENANT_DIR", str(BASE_DIR / "tenants")))
+
+def rebuild(url: str):
+    """Recria o índice de um banco em uma única transação"""
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        indexed = rebuild_patient_search(conn)
+    engine.dispose()
+    print(f"[OK] {url}: {indexed} pacientes indexados")
+
+def main():
+    urls = [DATABASE_URL]
+    if DB_TENANT_MODE == "per_tenant":
+        urls += [f"sqlite:///{path}" for path in sorted(DB_TENANT_DIR.glob("*.db"))]
+
+    print(f"[FTS] {len(urls)} banco(s)")
+    print("=" * 60)
+    for url in urls:
+        rebuild(url)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\n[ERRO] Erro ao regenerar índice de busca: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,67 @@
+"""
+Script: Regenerar o rollup diário de appointments (appointment_daily_rollups)
+
+Uso:
+    cd backend
+    python rebuild_rollups.py              # todos os tenants
+    python rebuild_rollups.py <tenant_id>  # apenas um tenant
+
+Depois da primeira execução, habilite as leituras com ROLLUP_READS_ENABLED=true.
+"""
+import os
+import sys
+from pathlib import Path
+
+# Fix encoding for Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+# Adicionar backend ao path
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models  # noqa: F401 - registra todas as tabelas no metadata
+from models.user import Base
+from utils.rollup import ROLLUP_TZ, rebuild_rollups
+
+load_dotenv()
+
+# Caminho do banco (mesma regra do main.py)
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATABASE_PATH = BASE_DIR / "alignwork.db"
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATABASE_PATH}")
+
+def rebuild(tenant_id=None):
+    """Recria as linhas de rollup em uma única transação"""
+    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+
+    print(f"[ROLLUP] Banco: {DATABASE_URL}")
+    print(f"[ROLLUP] Timezone do dia local: {ROLLUP_TZ}")
+    print(f"[ROLLUP] Tenant: {tenant_id or 'todos'}")
+    print("=" * 60)
+
+    db = sessionmaker(bind=engine)()
+    try:
+        rows = rebuild_rollups(db, tenant_id)
+        db.commit()
+        print(f"[OK] {rows} linhas de rollup gravadas")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    try:
+        rebuild(sys.argv[1] if len(sys.argv) > 1 else None)
+    except Exception as e:
+        print(f"\n[ERRO] Erro ao regenerar rollup: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
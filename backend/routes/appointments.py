@@ -1,17 +1,21 @@
 from fastapi import APIRouter, Depends, Query, Response, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta, timezone, time as dt_time
 from zoneinfo import ZoneInfo
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import os
+import time
 from auth.dependencies import get_db
 from models.appointment import Appointment
 from models.patient import Patient
 from models.consultorio import Consultorio
 from schemas.appointment import AppointmentCreate, AppointmentUpdate, AppointmentResponse, AppointmentPaginatedResponse
-from sqlalchemy import and_, func, case
-from cachetools import TTLCache
-import threading
+from sqlalchemy import and_, func, case, select, tuple_
+from utils.pagination import count_rows, encode_cursor, decode_cursor
+from utils.rollup import bump_rollup, rollup_available, rollup_buckets
+from cache import get_cache, mark_tenant_dirty, tenant_tag
+from database import get_session_router, run_write
 
 router = APIRouter(prefix="/v1/appointments", tags=["appointments"])
 
@@ -19,133 +23,229 @@ router = APIRouter(prefix="/v1/appointments", tags=["appointments"])
 # CACHE - P1-003
 # ============================================================================
 
-# Cache em memória com TTL de 30 segundos
-# maxsize=100: Armazena até 100 cache keys diferentes
-# ttl=30: Cada entrada expira automaticamente após 30 segundos
-stats_cache = TTLCache(maxsize=100, ttl=30)
+# Namespace do cache compartilhado (ver backend/cache), TTL configurável
+# ttl: O TTL é só uma rede de segurança; escritas commitadas invalidam o tenant
+# stale_ttl: Depois do TTL, serve o valor antigo e recalcula em background
+STATS_CACHE_TTL_SECONDS = int(os.getenv("STATS_CACHE_TTL_SECONDS", "300"))
+STATS_CACHE_STALE_SECONDS = int(os.getenv("STATS_CACHE_STALE_SECONDS", "3600"))
+stats_cache = get_cache().namespace(
+    "mega_stats", ttl=STATS_CACHE_TTL_SECONDS, stale_ttl=STATS_CACHE_STALE_SECONDS
+)
 
-# Lock para garantir thread-safety em acesso ao cache
-cache_lock = threading.Lock()
+# Pré-aquecimento: tenants/timezones vistos no mega_stats nas últimas N horas
+# têm as chaves do dia seguinte calculadas pouco antes da meia-noite local
+STATS_PREWARM_LEAD_SECONDS = int(os.getenv("STATS_PREWARM_LEAD_SECONDS", "300"))
+STATS_PREWARM_ACTIVE_HOURS = int(os.getenv("STATS_PREWARM_ACTIVE_HOURS", "24"))
+_active_stats_keys: Dict[Tuple[str, str], float] = {}
 
-def get_cache_key(tenant_id: str, tz: str) -> str:
+def get_cache_key(tenant_id: str, tz: str, now: Optional[datetime] = None) -> str:
     """
-    Gera chave de cache única para mega_stats.
+    Gera chave de cache única para mega_stats (dentro do namespace).
     
-    Formato: mega_stats:{tenant_id}:{tz}:{date}
+    Formato: {tenant_id}:{tz}:{date}
     
     Inclui data atual para invalidação automática ao trocar de dia.
     """
-    now = datetime.now(ZoneInfo(tz))
+    now = now or datetime.now(ZoneInfo(tz))
     date_key = now.strftime('%Y-%m-%d')
-    return f"mega_stats:{tenant_id}:{tz}:{date_key}"
+    return f"{tenant_id}:{tz}:{date_key}"
 
-def _count_bucket(db: Session, tenant_id: str, start_local: datetime, end_local: datetime, TZ: ZoneInfo):
+def _stats_windows(now_local: datetime) -> Dict[str, Tuple[datetime, datetime]]:
     """
-    Conta appointments em um bucket de tempo específico usando agregação condicional.
+    Calcula as janelas locais [início, fim) usadas pelo mega_stats.
     
-    Otimização P1-002: Reduz de 2 queries para 1 query usando CASE SQL.
+    - today:     início do dia local → início do dia seguinte
+    - week:      domingo → próximo domingo (semana DOM-SÁB)
+    - month:     dia 1 do mês vigente → dia 1 do próximo mês
+    - nextMonth: dia 1 do próximo mês → dia 1 do mês seguinte
+    """
+    # Hoje (início do dia local → início do dia seguinte local)
+    today_start = now_local.replace(hour=0, minute=0, second=0, microsecond=0)
+    today_end   = today_start + timedelta(days=1)
+
+    # Semana vigente: domingo → sábado (considerando semana DOM-SÁB)
+    # weekday(): Monday=0 ... Sunday=6 ; queremos domingo=0, sábado=6 em base local.
+    # Converte para índice DOM=0:
+    dow = (now_local.weekday() + 1) % 7  # se segunda=0 => dom=6; ajustamos
+    # Melhor abordagem: obter o domingo mais recente:
+    # Se dow==0 (domingo), start é hoje; senão, retrocede dow dias.
+    sunday_start = today_start - timedelta(days=dow)
+    saturday_end = sunday_start + timedelta(days=7)  # intervalo meio-aberto [dom, próximo dom)
+
+    # Mês vigente
+    month_start = today_start.replace(day=1)
+    # início do próximo mês:
+    if month_start.month == 12:
+        next_month_start = month_start.replace(year=month_start.year+1, month=1)
+    else:
+        next_month_start = month_start.replace(month=month_start.month+1)
+
+    # Próximo mês: [início do próximo mês, início do mês seguinte]
+    if next_month_start.month == 12:
+        after_next_month_start = next_month_start.replace(year=next_month_start.year+1, month=1)
+    else:
+        after_next_month_start = next_month_start.replace(month=next_month_start.month+1)
+
+    return {
+        "today":     (today_start, today_end),
+        "week":      (sunday_start, saturday_end),
+        "month":     (month_start, next_month_start),
+        "nextMonth": (next_month_start, after_next_month_start),
+    }
+
+def _count_buckets(db: Session, tenant_id: str, windows: Dict[str, Tuple[datetime, datetime]]):
+    """
+    Conta appointments de todas as janelas em uma única varredura.
+    
+    Filtra a união [min(início), max(fim)) uma vez e usa agregação condicional
+    por janela (duas colunas SUM(CASE ...) por bucket: confirmed e pending).
     
     Args:
         db: SQLAlchemy session
         tenant_id: ID do tenant (isolamento multi-tenant)
-        start_local: Data/hora início no timezone local
-        end_local: Data/hora fim no timezone local
-        TZ: Timezone para conversão
+        windows: {"nome": (início_local, fim_local)} com datetimes tz-aware
     
     Returns:
-        Dict com contagem de confirmed e pending:
-        {"confirmed": 5, "pending": 3}
+        Dict por janela com contagem de confirmed e pending:
+        {"today": {"confirmed": 5, "pending": 3}, ...}
     
     Performance:
-        - Antes: 2 queries (confirmed + pending separados)
-        - Depois: 1 query (agregação condicional com CASE)
-        - Ganho: ~75% redução em queries ao banco
+        - Antes: 1 query por janela (4 range scans, com week/month sobrepostos)
+        - Depois: 1 query para todas as janelas (1 range scan)
     """
+    UTC = ZoneInfo("UTC")
     # Converte limites locais -> UTC para filtrar starts_at (UTC)
-    start_utc = start_local.astimezone(ZoneInfo("UTC"))
-    end_utc = end_local.astimezone(ZoneInfo("UTC"))
-
-    # Query única com agregação condicional
-    # SUM(CASE WHEN status='confirmed' THEN 1 ELSE 0 END) AS confirmed
-    # SUM(CASE WHEN status='pending' THEN 1 ELSE 0 END) AS pending
-    result = db.query(
-        func.sum(
-            case((Appointment.status == "confirmed", 1), else_=0)
-        ).label("confirmed"),
-        func.sum(
-            case((Appointment.status == "pending", 1), else_=0)
-        ).label("pending")
-    ).filter(
+    windows_utc = {
+        name: (start.astimezone(UTC), end.astimezone(UTC))
+        for name, (start, end) in windows.items()
+    }
+    union_start = min(start for start, _ in windows_utc.values())
+    union_end = max(end for _, end in windows_utc.values())
+
+    columns = []
+    for name, (start_utc, end_utc) in windows_utc.items():
+        in_window = and_(Appointment.starts_at >= start_utc, Appointment.starts_at < end_utc)
+        for status_name in ("confirmed", "pending"):
+            columns.append(
+                func.sum(
+                    case((and_(in_window, Appointment.status == status_name), 1), else_=0)
+                ).label(f"{name}_{status_name}")
+            )
+
+    result = db.query(*columns).filter(
         Appointment.tenant_id == tenant_id,
-        Appointment.starts_at >= start_utc,
-        Appointment.starts_at < end_utc,
+        Appointment.starts_at >= union_start,
+        Appointment.starts_at < union_end,
         Appointment.status.in_(["confirmed", "pending"])
     ).first()
 
-    # Resultado é uma tupla (confirmed, pending) ou None
-    # Usar 'or 0' para tratar None quando não há registros
+    # Sem registros, SUM retorna NULL: usar 'or 0'
+    row = result._mapping
     return {
-        "confirmed": result.confirmed or 0,
-        "pending": result.pending or 0
+        name: {
+            "confirmed": row[f"{name}_confirmed"] or 0,
+            "pending": row[f"{name}_pending"] or 0,
+        }
+        for name in windows_utc
     }
 
 @router.get("/summary")
-def get_summary(
+async def get_summary(
     response: Response,
     tenantId: str = Query(..., alias="tenantId"),
     from_: str = Query(..., alias="from"),
     to: str = Query(...),
     tz: str = Query("America/Recife"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
+    """
+    Resumo de hoje e amanhã (timezone local) dentro do intervalo [from, to).
+    
+    Os dias locais são convertidos em limites UTC e a contagem é feita no
+    banco com GROUP BY por bucket: retornam no máximo 2 linhas agregadas,
+    independente do tamanho do intervalo.
+    """
     response.headers["Cache-Control"] = "no-store"
     
-    from_dt = datetime.fromisoformat(from_.replace('Z', '+00:00'))
-    to_dt = datetime.fromisoformat(to.replace('Z', '+00:00'))
+    UTC = ZoneInfo("UTC")
     
-    appts = (
-        db.query(Appointment)
-          .filter(Appointment.tenant_id == tenantId)
-          .filter(Appointment.starts_at >= from_dt)
-          .filter(Appointment.starts_at < to_dt)
-          .all()
-    )
+    def _to_naive_utc(dt: datetime) -> datetime:
+        # starts_at é armazenado como UTC naive
+        return dt.astimezone(UTC).replace(tzinfo=None) if dt.tzinfo else dt
+    
+    from_dt = _to_naive_utc(datetime.fromisoformat(from_.replace('Z', '+00:00')))
+    to_dt = _to_naive_utc(datetime.fromisoformat(to.replace('Z', '+00:00')))
 
     TZ = ZoneInfo(tz)
-    today_local = datetime.now(TZ).date()
-    tomorrow_local = today_local + timedelta(days=1)
+    today_start = datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+    tomorrow_start = today_start + timedelta(days=1)
+    after_tomorrow_start = today_start + timedelta(days=2)
+
+    # Limites dos dias locais em UTC
+    today_utc = _to_naive_utc(today_start)
+    tomorrow_utc = _to_naive_utc(tomorrow_start)
+    after_tomorrow_utc = _to_naive_utc(after_tomorrow_start)
 
     summary = {
         "today": {"total": 0, "confirmed": 0, "pending": 0},
         "tomorrow": {"total": 0, "confirmed": 0, "pending": 0},
     }
 
-    for a in appts:
-        # Convert UTC to local timezone
-        local_dt = a.starts_at.replace(tzinfo=ZoneInfo('UTC')).astimezone(TZ)
-        local_date = local_dt.date()
-        
-        if   local_date == today_local:    bucket = "today"
-        elif local_date == tomorrow_local: bucket = "tomorrow"
-        else: continue
+    # Intervalo cobre os dois dias inteiros: ler do rollup diário
+    if rollup_available(tz) and from_dt <= today_utc and to_dt >= after_tomorrow_utc:
+        buckets = await db.run_sync(lambda sync_db: rollup_buckets(sync_db, tenantId, {
+            "today": (today_start.date(), tomorrow_start.date()),
+            "tomorrow": (tomorrow_start.date(), after_tomorrow_start.date()),
+        }))
+        for name, counts in buckets.items():
+            summary[name] = {
+                "total": counts["total"],
+                "confirmed": counts["confirmed"],
+                "pending": counts["total"] - counts["confirmed"],
+            }
+        return summary
 
-        summary[bucket]["total"] += 1
-        if a.status == "confirmed":
-            summary[bucket]["confirmed"] += 1
-        else:
-            summary[bucket]["pending"] += 1
+    # Interseção de [from, to) com [hoje, depois de amanhã)
+    range_start = max(from_dt, today_utc)
+    range_end = min(to_dt, after_tomorrow_utc)
+    if range_start >= range_end:
+        return summary
+
+    bucket = case((Appointment.starts_at < tomorrow_utc, "today"), else_="tomorrow").label("bucket")
+    rows = (await db.execute(
+        select(
+            bucket,
+            func.count(Appointment.id).label("total"),
+            func.sum(case((Appointment.status == "confirmed", 1), else_=0)).label("confirmed"),
+        )
+        .where(Appointment.tenant_id == tenantId)
+        .where(Appointment.starts_at >= range_start)
+        .where(Appointment.starts_at < range_end)
+        .group_by(bucket)
+    )).all()
+
+    # Tudo que não é "confirmed" conta como pendente (mesma regra de antes)
+    for row in rows:
+        confirmed = row.confirmed or 0
+        summary[row.bucket] = {
+            "total": row.total,
+            "confirmed": confirmed,
+            "pending": row.total - confirmed,
+        }
 
     return summary
 
 @router.get("/", response_model=AppointmentPaginatedResponse)
-def list_appointments(
+async def list_appointments(
     response: Response,
     tenantId: str = Query(..., description="ID do tenant"),
     from_date: Optional[str] = Query(None, alias="from", description="Data início (ISO)"),
     to_date: Optional[str] = Query(None, alias="to", description="Data fim (ISO)"),
     page: int = Query(1, ge=1, description="Número da página (1-indexed)"),
     page_size: int = Query(50, ge=1, le=100, description="Itens por página"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor opaco (modo keyset); vazio para a primeira página"),
+    include_total: bool = Query(False, description="Calcular total no modo cursor"),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Lista agendamentos com paginação.
@@ -155,6 +255,9 @@ def list_appointments(
     - **to**: Data fim (ISO 8601) - filtro opcional
     - **page**: Número da página (default: 1)
     - **page_size**: Itens por página (default: 50, max: 100)
+    - **cursor**: Ativa o modo cursor; envie `cursor=` na primeira página e
+      depois o `next_cursor` da resposta anterior. Ignora `page`.
+    - **include_total**: No modo cursor, o `COUNT(*)` só roda se `true`
     
     Returns:
         PaginatedResponse com appointments da página solicitada
@@ -162,13 +265,13 @@ def list_appointments(
     response.headers["Cache-Control"] = "no-store"
     
     # Build base query
-    query = db.query(Appointment).filter(Appointment.tenant_id == tenantId)
+    query = select(Appointment).where(Appointment.tenant_id == tenantId)
     
     # Aplicar filtros de data
     if from_date:
         try:
             from_dt = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-            query = query.filter(Appointment.starts_at >= from_dt)
+            query = query.where(Appointment.starts_at >= from_dt)
         except ValueError:
             raise HTTPException(
                 status_code=400,
@@ -178,15 +281,44 @@ def list_appointments(
     if to_date:
         try:
             to_dt = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-            query = query.filter(Appointment.starts_at < to_dt)
+            query = query.where(Appointment.starts_at < to_dt)
         except ValueError:
             raise HTTPException(
                 status_code=400,
                 detail=f"Invalid 'to' date format: {to_date}. Use ISO 8601."
             )
     
+    # Modo cursor: keyset em (starts_at, id), sem OFFSET e sem COUNT por padrão
+    if cursor is not None:
+        total = await count_rows(db, query) if include_total else None
+        
+        if cursor:
+            last_starts_at, last_id = decode_cursor(cursor, datetime, int)
+            query = query.where(
+                tuple_(Appointment.starts_at, Appointment.id) > (last_starts_at, last_id)
+            )
+        
+        # Busca 1 item extra para saber se existe próxima página
+        rows = (await db.execute(
+            query
+            .order_by(Appointment.starts_at, Appointment.id)
+            .limit(page_size + 1)
+        )).scalars().all()
+        appointments = rows[:page_size]
+        next_cursor = None
+        if len(rows) > page_size:
+            last = appointments[-1]
+            next_cursor = encode_cursor(last.starts_at, last.id)
+        
+        return AppointmentPaginatedResponse(
+            data=appointments,
+            total=total,
+            page_size=page_size,
+            next_cursor=next_cursor
+        )
+    
     # Contar total (antes de aplicar paginação)
-    total = query.count()
+    total = await count_rows(db, query)
     
     # Calcular total de páginas
     total_pages = (total + page_size - 1) // page_size  # Ceiling division
@@ -199,13 +331,12 @@ def list_appointments(
         )
     
     # Aplicar paginação
-    appointments = (
+    appointments = (await db.execute(
         query
         .order_by(Appointment.starts_at)
         .offset((page - 1) * page_size)
         .limit(page_size)
-        .all()
-    )
+    )).scalars().all()
     
     # Retornar resposta paginada
     return AppointmentPaginatedResponse(
@@ -216,91 +347,130 @@ def list_appointments(
         total_pages=total_pages
     )
 
+def _compute_mega_stats(db: Session, tenant_id: str, tz: str, now_local: Optional[datetime] = None):
+    """Calcula o payload do mega_stats (sem cache), por default para o dia atual."""
+    now_local = now_local or datetime.now(ZoneInfo(tz))
+
+    # Uma única varredura cobre today, week, month e nextMonth
+    windows = _stats_windows(now_local)
+    if rollup_available(tz):
+        # Todas as janelas são dias locais inteiros: somar o rollup diário
+        buckets = rollup_buckets(db, tenant_id, {
+            name: (start.date(), end.date()) for name, (start, end) in windows.items()
+        })
+        return {
+            name: {"confirmed": counts["confirmed"], "pending": counts["pending"]}
+            for name, counts in buckets.items()
+        }
+    return _count_buckets(db, tenant_id, windows)
+
+def _compute_mega_stats_detached(tenant_id: str, tz: str, now_local: Optional[datetime] = None):
+    """Como _compute_mega_stats, com sessão síncrona própria (para threads de background)."""
+    db = get_session_router().open_session("GET", tenant_id)
+    try:
+        return _compute_mega_stats(db, tenant_id, tz, now_local)
+    finally:
+        db.close()
+
+def prewarm_next_day_stats(session_factory) -> int:
+    """
+    Calcula as chaves de mega_stats do dia seguinte para tenants ativos
+    cuja meia-noite local está a menos de STATS_PREWARM_LEAD_SECONDS.
+    
+    `session_factory(tenant_id)` abre a sessão do tenant (no modo
+    banco-por-tenant cada tenant tem o seu arquivo).
+    
+    Escritas até a meia-noite invalidam o tenant normalmente (a entrada
+    pré-aquecida é removida e recalculada sob demanda).
+    
+    Returns:
+        Quantidade de chaves pré-aquecidas
+    """
+    now_ts = time.time()
+    warmed = 0
+    for (tenant_id, tz), last_seen in list(_active_stats_keys.items()):
+        if now_ts - last_seen > STATS_PREWARM_ACTIVE_HOURS * 3600:
+            _active_stats_keys.pop((tenant_id, tz), None)
+            continue
+        
+        TZ = ZoneInfo(tz)
+        now_local = datetime.now(TZ)
+        next_midnight = datetime.combine(now_local.date() + timedelta(days=1), dt_time.min, tzinfo=TZ)
+        seconds_left = (next_midnight - now_local).total_seconds()
+        if seconds_left > STATS_PREWARM_LEAD_SECONDS:
+            continue
+        
+        cache_key = get_cache_key(tenant_id, tz, now=next_midnight)
+        if stats_cache.lookup(cache_key)[0]:
+            continue
+        
+        tags = [tenant_tag(tenant_id)]
+        versions = stats_cache.versions(cache_key, tags)
+        db = session_factory(tenant_id)
+        try:
+            stats = _compute_mega_stats(db, tenant_id, tz, now_local=next_midnight)
+        finally:
+            db.close()
+        # Vale a partir da meia-noite: TTL conta o tempo até lá
+        stats_cache.set(cache_key, stats, tags=tags, ttl=seconds_left + STATS_CACHE_TTL_SECONDS, versions=versions)
+        warmed += 1
+    
+    if warmed:
+        print(f"🔥 Prewarmed {warmed} mega_stats keys for the next day")
+    return warmed
+
 @router.get("/mega-stats")
-def mega_stats(
+async def mega_stats(
     response: Response,
     tenantId: str = Query(...),
     tz: str = Query("America/Recife"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Retorna estatísticas agregadas de appointments.
     
-    Cache: TTL 30s (otimização P1-003)
+    Cache: TTL STATS_CACHE_TTL_SECONDS (otimização P1-003), invalidado
+    por tenant quando create/update de appointment commita.
     - Cache HIT: < 1ms de resposta
     - Cache MISS: ~100ms (calcula e salva no cache)
+    - Cache COALESCED: miss concorrente; espera o cálculo em andamento
+      para a mesma chave em vez de repetir a agregação
+    - Cache STALE: entrada além do TTL (dentro de STATS_CACHE_STALE_SECONDS);
+      responde na hora e recalcula em background
     """
     cache_key = get_cache_key(tenantId, tz)
+    _active_stats_keys[(tenantId, tz)] = time.time()
     
-    # Tentar buscar do cache (thread-safe)
-    with cache_lock:
-        cached = stats_cache.get(cache_key)
-        if cached is not None:
-            response.headers["Cache-Control"] = "no-store"
-            response.headers["X-Cache"] = "HIT"
-            return cached
+    # HIT, STALE, MISS ou COALESCED (miss concorrente que esperou o cálculo de outro request)
+    # O refresh em background usa sessão síncrona própria: a do request fecha ao responder
+    stats, cache_status = await stats_cache.get_or_compute_async(
+        cache_key,
+        lambda: db.run_sync(lambda sync_db: _compute_mega_stats(sync_db, tenantId, tz)),
+        tags=[tenant_tag(tenantId)],
+        refresh=lambda: _compute_mega_stats_detached(tenantId, tz),
+    )
     
-    # Cache miss - calcular stats
     response.headers["Cache-Control"] = "no-store"
-    response.headers["X-Cache"] = "MISS"
-
-    TZ = ZoneInfo(tz)
-    now_local = datetime.now(TZ)
-
-    # Hoje (início do dia local → início do dia seguinte local)
-    today_start = now_local.replace(hour=0, minute=0, second=0, microsecond=0)
-    today_end   = today_start + timedelta(days=1)
-
-    # Semana vigente: domingo → sábado (considerando semana DOM-SÁB)
-    # weekday(): Monday=0 ... Sunday=6 ; queremos domingo=0, sábado=6 em base local.
-    # Converte para índice DOM=0:
-    dow = (now_local.weekday() + 1) % 7  # se segunda=0 => dom=6; ajustamos
-    # Melhor abordagem: obter o domingo mais recente:
-    # Se dow==0 (domingo), start é hoje; senão, retrocede dow dias.
-    sunday_start = today_start - timedelta(days=dow)
-    saturday_end = sunday_start + timedelta(days=7)  # intervalo meio-aberto [dom, próximo dom)
-
-    # Mês vigente
-    month_start = today_start.replace(day=1)
-    # início do próximo mês:
-    if month_start.month == 12:
-        next_month_start = month_start.replace(year=month_start.year+1, month=1)
-    else:
-        next_month_start = month_start.replace(month=month_start.month+1)
-
-    # Próximo mês: [início do próximo mês, início do mês seguinte]
-    if next_month_start.month == 12:
-        after_next_month_start = next_month_start.replace(year=next_month_start.year+1, month=1)
-    else:
-        after_next_month_start = next_month_start.replace(month=next_month_start.month+1)
-
-    stats = {
-        "today":     _count_bucket(db, tenantId, today_start, today_end, TZ),
-        "week":      _count_bucket(db, tenantId, sunday_start, saturday_end, TZ),
-        "month":     _count_bucket(db, tenantId, month_start, next_month_start, TZ),
-        "nextMonth": _count_bucket(db, tenantId, next_month_start, after_next_month_start, TZ),
-    }
-    
-    # Salvar no cache (thread-safe)
-    with cache_lock:
-        stats_cache[cache_key] = stats
+    response.headers["X-Cache"] = cache_status
     
     return stats
 
 @router.post("/", response_model=AppointmentResponse)
-def create_appointment(
+async def create_appointment(
     appointment: AppointmentCreate,
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     response.headers["Cache-Control"] = "no-store"
     
     try:
         # Verificar se paciente existe (Foreign Key validation)
-        patient = db.query(Patient).filter(
-            Patient.id == appointment.patientId,
-            Patient.tenant_id == appointment.tenantId
-        ).first()
+        patient = (await db.execute(
+            select(Patient).where(
+                Patient.id == appointment.patientId,
+                Patient.tenant_id == appointment.tenantId
+            )
+        )).scalars().first()
         
         if not patient:
             raise HTTPException(
@@ -311,10 +481,12 @@ def create_appointment(
         # Validar consultório se fornecido
         consultorio_id = None
         if appointment.consultorioId is not None:
-            consultorio = db.query(Consultorio).filter(
-                Consultorio.id == appointment.consultorioId,
-                Consultorio.tenant_id == appointment.tenantId
-            ).first()
+            consultorio = (await db.execute(
+                select(Consultorio).where(
+                    Consultorio.id == appointment.consultorioId,
+                    Consultorio.tenant_id == appointment.tenantId
+                )
+            )).scalars().first()
             
             if not consultorio:
                 raise HTTPException(
@@ -377,17 +549,30 @@ def create_appointment(
         else:
             print(f"ℹ️ No consultorio provided (optional)")
         
-        db_appointment = Appointment(
-            tenant_id=appointment.tenantId,
-            patient_id=appointment.patientId,  # Já é int (convertido pelo validador)
-            consultorio_id=consultorio_id,
-            starts_at=starts_at_utc,  # Save in UTC
-            duration_min=appointment.durationMin,
-            status=appointment.status or "pending"
-        )
-        db.add(db_appointment)
-        db.commit()
-        db.refresh(db_appointment)
+        def insert(db: Session) -> Appointment:
+            db_appointment = Appointment(
+                tenant_id=appointment.tenantId,
+                patient_id=appointment.patientId,  # Já é int (convertido pelo validador)
+                consultorio_id=consultorio_id,
+                starts_at=starts_at_utc,  # Save in UTC
+                duration_min=appointment.durationMin,
+                status=appointment.status or "pending"
+            )
+            db.add(db_appointment)
+            # Rollup diário na mesma transação
+            bump_rollup(db, db_appointment.tenant_id, starts_at_utc, consultorio_id, db_appointment.status, +1)
+            mark_tenant_dirty(db, db_appointment.tenant_id)
+            return db_appointment
+        
+        # Fila de escrita (DB_WRITE_QUEUE_ENABLED) ou commit direto na sessão do request
+        db_appointment = await run_write(db, insert)
+        # Relê do banco (o refresh do fluxo antigo): starts_at/ends_at voltam
+        # naive, no mesmo formato de GET/PATCH, com ou sem a fila de escrita
+        db_appointment = (await db.execute(
+            select(Appointment)
+            .where(Appointment.id == db_appointment.id)
+            .execution_options(populate_existing=True)
+        )).scalars().one()
         
         print(f"✅ Appointment created: ID={db_appointment.id}, patient={patient.name}, consultorio_id={db_appointment.consultorio_id}, tenant={appointment.tenantId}")
         return db_appointment
@@ -395,7 +580,7 @@ def create_appointment(
     except HTTPException:
         raise
     except ValueError as e:
-        db.rollback()
+        await db.rollback()
         print(f"❌ Validation error: {str(e)}")
         
         # Check if this is a PAST_START error with structured context
@@ -424,7 +609,7 @@ def create_appointment(
             detail=f"Invalid data: {str(e)}"
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         import traceback
         print(f"❌ Failed to create appointment: {str(e)}")
         print(f"❌ Traceback: {traceback.format_exc()}")
@@ -435,31 +620,40 @@ def create_appointment(
         )
 
 @router.patch("/{appointment_id}", response_model=AppointmentResponse)
-def update_appointment_status(
+async def update_appointment_status(
     appointment_id: int,
     appointment: AppointmentUpdate,
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     response.headers["Cache-Control"] = "no-store"
     
-    try:
+    def update(db: Session) -> Appointment:
         db_appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
         if not db_appointment:
-            db.rollback()
             raise HTTPException(status_code=404, detail=f"Appointment {appointment_id} not found")
         
+        previous_status = db_appointment.status
         db_appointment.status = appointment.status
-        db.commit()
-        db.refresh(db_appointment)
+        if previous_status != appointment.status:
+            # Move a contagem entre status no rollup (mesma transação)
+            bump_rollup(db, db_appointment.tenant_id, db_appointment.starts_at, db_appointment.consultorio_id, previous_status, -1)
+            bump_rollup(db, db_appointment.tenant_id, db_appointment.starts_at, db_appointment.consultorio_id, appointment.status, +1)
+            mark_tenant_dirty(db, db_appointment.tenant_id)
+        return db_appointment
+    
+    try:
+        # Leitura + escrita na mesma unidade: a fila serializa o read-modify-write
+        db_appointment = await run_write(db, update)
         
         print(f"✅ Appointment updated: ID={appointment_id}, new_status={appointment.status}")
         return db_appointment
         
     except HTTPException:
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"❌ Failed to update appointment {appointment_id}: {str(e)}")
         raise HTTPException(
             status_code=500,
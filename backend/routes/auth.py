@@ -1,36 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Response, Cookie, Request
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 from typing import Optional
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from models.user import User
 from schemas.auth import UserRegister, UserLogin, Token, RefreshToken
 from schemas.user import UserResponse
 from auth.utils import (
-    verify_password, 
-    get_password_hash, 
+    verify_password_async,
+    get_password_hash_async,
+    password_needs_rehash,
+    rehash_password_async,
     create_access_token, 
     create_refresh_token,
     verify_token,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 from auth.dependencies import get_db, get_current_user
+from auth.revocation import is_token_revoked, revoke_token_async
+from ratelimit import limiter
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
-# Rate limiter instance
-limiter = Limiter(key_func=get_remote_address)
-
 @router.post("/register", response_model=Token)
 @limiter.limit("3/hour")
-async def register(request: Request, user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(request: Request, user_data: UserRegister, db: AsyncSession = Depends(get_db)):
     """Register a new user. Rate limit: 3 registrations per hour per IP."""
-    existing_user = db.query(User).filter(
-        User.email == user_data.email
-    ).first()
+    existing_user = (await db.execute(
+        select(User).where(User.email == user_data.email)
+    )).scalars().first()
     
     if existing_user:
         raise HTTPException(
@@ -38,7 +38,7 @@ async def register(request: Request, user_data: UserRegister, db: Session = Depe
             detail="Email already registered"
         )
     
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     # TODO: Remover username após migração de banco de dados
     # Usando email como username temporário até a coluna ser removida
     temp_username = user_data.email.split('@')[0]  # Parte antes do @
@@ -50,8 +50,8 @@ async def register(request: Request, user_data: UserRegister, db: Session = Depe
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     access_token = create_access_token(
         data={"sub": db_user.email, "user_id": db_user.id}
@@ -68,23 +68,25 @@ async def register(request: Request, user_data: UserRegister, db: Session = Depe
 
 @router.post("/login", response_model=Token)
 @limiter.limit("5/minute")
-async def login(request: Request, user_credentials: UserLogin, response: Response, db: Session = Depends(get_db)):
+async def login(request: Request, user_credentials: UserLogin, response: Response, db: AsyncSession = Depends(get_db)):
     """Login user and return tokens. Rate limit: 5 attempts per minute per IP."""
     print(f"Login attempt: {user_credentials.email}")
     
-    user = db.query(User).filter(User.email == user_credentials.email).first()
+    user = (await db.execute(select(User).where(User.email == user_credentials.email))).scalars().first()
     print(f"User found: {user is not None}")
     
+    password_valid = False
     if user:
         print(f"User email: {user.email}")
         # print(f"User password hash: {user.hashed_password}")  # REMOVIDO: exposição de dados sensíveis (P0-001)
         print(f"User active: {user.is_active}")
         print(f"User verified: {user.is_verified}")
         
-        password_valid = verify_password(user_credentials.password, user.hashed_password)
+        # Uma única verificação bcrypt, fora do event loop
+        password_valid = await verify_password_async(user_credentials.password, user.hashed_password)
         print(f"Password valid: {password_valid}")
     
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    if not user or not password_valid:
         print("Login failed: user not found or invalid password")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -105,6 +107,18 @@ async def login(request: Request, user_credentials: UserLogin, response: Respons
         data={"sub": user.email, "user_id": user.id}
     )
     
+    # Hash legado (SHA256) ou com custo diferente do calibrado: regrava com a
+    # senha que acabou de ser verificada. Falha aqui não impede o login.
+    if password_needs_rehash(user.hashed_password):
+        user_id = user.id
+        try:
+            user.hashed_password = await rehash_password_async(user_credentials.password, user.hashed_password)
+            await db.commit()
+            print(f"Password rehashed for user {user_id}")
+        except Exception as e:
+            await db.rollback()
+            print(f"Password rehash failed for user {user_id}: {e}")
+    
     response.set_cookie(
         key="access_token",
         value=access_token,
@@ -133,7 +147,7 @@ async def login(request: Request, user_credentials: UserLogin, response: Respons
 async def refresh_token(
     refresh_token: Optional[str] = Cookie(None),
     response: Response = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Refresh access token using refresh token from cookie."""
     if not refresh_token:
@@ -144,7 +158,12 @@ async def refresh_token(
     
     try:
         token_data = verify_token(refresh_token, "refresh")
-        user = db.query(User).filter(User.email == token_data["email"]).first()
+        if is_token_revoked(token_data):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token"
+            )
+        user = (await db.execute(select(User).where(User.email == token_data["email"]))).scalars().first()
         
         if not user or not user.is_active:
             raise HTTPException(
@@ -152,6 +171,14 @@ async def refresh_token(
                 detail="Invalid refresh token"
             )
         
+        # Rotação: o refresh token usado deixa de valer. Se dois requests
+        # chegarem com o mesmo token, só o primeiro que revogar ganha
+        if token_data["jti"] and not await revoke_token_async(token_data):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token"
+            )
+        
         access_token = create_access_token(
             data={"sub": user.email, "user_id": user.id}
         )
@@ -190,8 +217,20 @@ async def refresh_token(
         )
 
 @router.post("/logout")
-async def logout(response: Response):
-    """Logout user by clearing cookies."""
+async def logout(
+    response: Response,
+    access_token: Optional[str] = Cookie(None),
+    refresh_token: Optional[str] = Cookie(None),
+):
+    """Logout user by revoking both tokens and clearing cookies."""
+    for token, token_type in ((access_token, "access"), (refresh_token, "refresh")):
+        if not token:
+            continue
+        try:
+            token_data = verify_token(token, token_type)
+        except HTTPException:
+            continue  # Token inválido ou expirado: nada a revogar
+        await revoke_token_async(token_data)
     response.delete_cookie(key="access_token")
     response.delete_cookie(key="refresh_token")
     return {"message": "Successfully logged out"}
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, Query, Response, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from auth.dependencies import get_db
 from models.consultorio import Consultorio
@@ -8,10 +9,10 @@ from schemas.consultorio import ConsultorioCreate, ConsultorioUpdate, Consultori
 router = APIRouter(prefix="/v1/consultorios", tags=["consultorios"])
 
 @router.post("/", response_model=ConsultorioResponse, status_code=201)
-def create_consultorio(
+async def create_consultorio(
     consultorio: ConsultorioCreate,
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Cria um novo consultório
@@ -41,14 +42,14 @@ def create_consultorio(
             informacoes_adicionais=consultorio.informacoes_adicionais
         )
         db.add(db_consultorio)
-        db.commit()
-        db.refresh(db_consultorio)
+        await db.commit()
+        await db.refresh(db_consultorio)
         
         print(f"✅ Consultorio created: ID={db_consultorio.id}, nome={consultorio.nome}, tenant={consultorio.tenant_id}")
         return db_consultorio
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"❌ Failed to create consultorio: {str(e)}")
         raise HTTPException(
             status_code=500,
@@ -56,10 +57,10 @@ def create_consultorio(
         )
 
 @router.get("/", response_model=list[ConsultorioResponse])
-def list_consultorios(
+async def list_consultorios(
     response: Response,
     tenant_id: str = Query(..., alias="tenant_id", description="ID do tenant"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Lista consultórios de um tenant
@@ -68,20 +69,19 @@ def list_consultorios(
     """
     response.headers["Cache-Control"] = "no-store"
     
-    consultorios = (
-        db.query(Consultorio)
-        .filter(Consultorio.tenant_id == tenant_id)
+    consultorios = (await db.execute(
+        select(Consultorio)
+        .where(Consultorio.tenant_id == tenant_id)
         .order_by(Consultorio.nome)
-        .all()
-    )
+    )).scalars().all()
     
     return consultorios
 
 @router.get("/light")
-def list_consultorios_light(
+async def list_consultorios_light(
     response: Response,
     tenant_id: str = Query(..., alias="tenant_id", description="ID do tenant"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Lista consultórios em formato leve para select/combobox
@@ -92,12 +92,11 @@ def list_consultorios_light(
     """
     response.headers["Cache-Control"] = "no-store"
     
-    consultorios = (
-        db.query(Consultorio)
-        .filter(Consultorio.tenant_id == tenant_id)
+    consultorios = (await db.execute(
+        select(Consultorio)
+        .where(Consultorio.tenant_id == tenant_id)
         .order_by(Consultorio.nome)
-        .all()
-    )
+    )).scalars().all()
     
     # Construir label: "<nome> – <rua> <número> – <bairro>"
     result = []
@@ -124,11 +123,11 @@ def list_consultorios_light(
     return result
 
 @router.get("/{consultorio_id}", response_model=ConsultorioResponse)
-def get_consultorio(
+async def get_consultorio(
     consultorio_id: int,
     tenant_id: str = Query(..., alias="tenant_id"),
     response: Response = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Busca um consultório específico por ID
@@ -139,10 +138,12 @@ def get_consultorio(
     if response:
         response.headers["Cache-Control"] = "no-store"
     
-    consultorio = db.query(Consultorio).filter(
-        Consultorio.id == consultorio_id,
-        Consultorio.tenant_id == tenant_id
-    ).first()
+    consultorio = (await db.execute(
+        select(Consultorio).where(
+            Consultorio.id == consultorio_id,
+            Consultorio.tenant_id == tenant_id
+        )
+    )).scalars().first()
     
     if not consultorio:
         raise HTTPException(
@@ -153,12 +154,12 @@ def get_consultorio(
     return consultorio
 
 @router.put("/{consultorio_id}", response_model=ConsultorioResponse)
-def update_consultorio(
+async def update_consultorio(
     consultorio_id: int,
     consultorio_update: ConsultorioUpdate,
     tenant_id: str = Query(..., alias="tenant_id"),
     response: Response = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Atualiza informações de um consultório
@@ -169,10 +170,12 @@ def update_consultorio(
     if response:
         response.headers["Cache-Control"] = "no-store"
     
-    consultorio = db.query(Consultorio).filter(
-        Consultorio.id == consultorio_id,
-        Consultorio.tenant_id == tenant_id
-    ).first()
+    consultorio = (await db.execute(
+        select(Consultorio).where(
+            Consultorio.id == consultorio_id,
+            Consultorio.tenant_id == tenant_id
+        )
+    )).scalars().first()
     
     if not consultorio:
         raise HTTPException(
@@ -186,12 +189,12 @@ def update_consultorio(
         setattr(consultorio, field, value)
     
     try:
-        db.commit()
-        db.refresh(consultorio)
+        await db.commit()
+        await db.refresh(consultorio)
         print(f"✅ Consultorio updated: ID={consultorio_id}, tenant={tenant_id}")
         return consultorio
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"❌ Failed to update consultorio: {str(e)}")
         raise HTTPException(
             status_code=500,
@@ -199,10 +202,10 @@ def update_consultorio(
         )
 
 @router.delete("/{consultorio_id}", status_code=204)
-def delete_consultorio(
+async def delete_consultorio(
     consultorio_id: int,
     tenant_id: str = Query(..., alias="tenant_id"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Remove um consultório
@@ -210,10 +213,12 @@ def delete_consultorio(
     - **consultorio_id**: ID do consultório
     - **tenant_id**: ID do tenant (isolamento multi-tenant)
     """
-    consultorio = db.query(Consultorio).filter(
-        Consultorio.id == consultorio_id,
-        Consultorio.tenant_id == tenant_id
-    ).first()
+    consultorio = (await db.execute(
+        select(Consultorio).where(
+            Consultorio.id == consultorio_id,
+            Consultorio.tenant_id == tenant_id
+        )
+    )).scalars().first()
     
     if not consultorio:
         raise HTTPException(
@@ -222,12 +227,12 @@ def delete_consultorio(
         )
     
     try:
-        db.delete(consultorio)
-        db.commit()
+        await db.delete(consultorio)
+        await db.commit()
         print(f"✅ Consultorio deleted: ID={consultorio_id}, tenant={tenant_id}")
         return None
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"❌ Failed to delete consultorio: {str(e)}")
         raise HTTPException(
             status_code=500,
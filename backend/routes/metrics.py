@@ -0,0 +1,60 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+
+from auth.dependencies import get_current_user
+from auth.revocation import revocation_store
+from auth.utils import bcrypt_stats, password_executor, token_cache
+from cache import cache_stats
+from database import database_stats
+from ratelimit import limiter
+from models.user import User
+from utils.patient_suggest import patient_suggest
+
+# Emails com acesso às métricas (separados por vírgula); vazio = endpoint fechado para todos
+METRICS_ADMIN_EMAILS = {
+    email.strip().lower() for email in os.getenv("METRICS_ADMIN_EMAILS", "").split(",") if email.strip()
+}
+
+
+async def require_metrics_admin(current_user: User = Depends(get_current_user)) -> User:
+    """Métricas expõem dados de todos os tenants: só usuários listados em METRICS_ADMIN_EMAILS."""
+    if current_user.email.lower() not in METRICS_ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to read metrics"
+        )
+    return current_user
+
+
+router = APIRouter(prefix="/v1/metrics", tags=["metrics"], dependencies=[Depends(require_metrics_admin)])
+
+@router.get("/")
+def get_metrics(response: Response):
+    """
+    Contadores internos do processo (observabilidade)
+    
+    Requer login com um email listado em METRICS_ADMIN_EMAILS.
+    
+    - **cache**: backend, entradas, evicções/expirações e hit/miss por namespace
+    - **database**: sessões de leitura/escrita e estado dos pools
+    - **auth**: pool de hashing de senha (fila, execução, rejeições), calibração do bcrypt
+      (custo, tempo medido, rehashes no login), cache de tokens verificados e revogação
+      (Bloom filter, consultas ao SQLite, falsos positivos)
+    - **rate_limit**: storage/estratégia, verificações, bloqueios e custo médio/máximo de cada verificação
+    - **patient_suggest**: índices de autocomplete em memória (tenants, chaves, builds, evicções, tempo de busca)
+    """
+    response.headers["Cache-Control"] = "no-store"
+    
+    return {
+        "cache": cache_stats(),
+        "database": database_stats(),
+        "auth": {
+            "password_executor": password_executor.stats(),
+            "bcrypt": bcrypt_stats(),
+            "token_cache": token_cache.stats(),
+            "revocation": revocation_store.stats(),
+        },
+        "rate_limit": limiter.stats(),
+        "patient_suggest": patient_suggest.stats(),
+    }
@@ -1,18 +1,34 @@
-from fastapi import APIRouter, Depends, Query, Response, HTTPException
+from fastapi import APIRouter, Depends, File, Query, Response, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy import func, select, tuple_
 from typing import Optional
+import logging
 import re
 from auth.dependencies import get_db
 from models.patient import Patient
-from schemas.patient import PatientCreate, PatientUpdate, PatientResponse, PatientPaginatedResponse
+from schemas.patient import (
+    PatientCreate, PatientUpdate, PatientResponse, PatientPaginatedResponse, PatientSuggestion, PatientImportReport,
+    PatientUpsertResult, PatientUpsertBatch, PatientUpsertBatchResponse,
+)
+from utils.pagination import count_rows, encode_cursor, decode_cursor
+from utils.patient_import import PatientImporter, import_format, read_records
+from utils.patient_search import build_match_query, digits_search, fts_available, matching_ids, name_prefix_filter, ranked_hits
+from utils.patient_suggest import patient_suggest
+from utils.patient_upsert import upsert_patients
+from utils.text import normalize_name
+from database import run_write
 
 router = APIRouter(prefix="/v1/patients", tags=["patients"])
+logger = logging.getLogger(__name__)
+
 
 @router.post("/", response_model=PatientResponse, status_code=201)
-def create_patient(
+async def create_patient(
     patient: PatientCreate,
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Cria um novo paciente
@@ -27,22 +43,23 @@ def create_patient(
     """
     response.headers["Cache-Control"] = "no-store"
     
-    # CPF já está normalizado pelo schema (somente dígitos)
-    # Verificar se CPF já existe no mesmo tenant (isolamento multi-tenant)
-    existing_patient = db.query(Patient).filter(
-        Patient.cpf == patient.cpf,
-        Patient.tenant_id == patient.tenant_id
-    ).first()
-    if existing_patient:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Patient with CPF {patient.cpf} already exists"
-        )
-    
-    try:
+    def insert(db: Session) -> Patient:
+        # CPF já está normalizado pelo schema (somente dígitos)
+        # Verificar se CPF já existe no mesmo tenant (isolamento multi-tenant)
+        existing_patient = db.query(Patient).filter(
+            Patient.cpf == patient.cpf,
+            Patient.tenant_id == patient.tenant_id
+        ).first()
+        if existing_patient:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Patient with CPF {patient.cpf} already exists"
+            )
+        
         db_patient = Patient(
             tenant_id=patient.tenant_id,
             name=patient.name,
+            name_key=normalize_name(patient.name),
             cpf=patient.cpf,
             phone=patient.phone,
             email=patient.email,
@@ -50,61 +67,236 @@ def create_patient(
             notes=patient.notes
         )
         db.add(db_patient)
-        db.commit()
-        db.refresh(db_patient)
-        
-        # DEBUG: Verificar se o paciente foi realmente salvo
-        verify = db.query(Patient).filter(Patient.id == db_patient.id).first()
-        if verify:
-            print(f"✅ Patient created: ID={db_patient.id}, name={patient.name}, tenant={patient.tenant_id}")
-            print(f"✅ VERIFICATION: Patient ID={db_patient.id} confirmed in database")
-        else:
-            print(f"❌ WARNING: Patient ID={db_patient.id} NOT found after commit!")
-        
+        return db_patient
+    
+    try:
+        # Fila de escrita (DB_WRITE_QUEUE_ENABLED) ou commit direto na sessão do request
+        db_patient = await run_write(db, insert)
+        logger.info("Patient created: id=%s, tenant=%s", db_patient.id, patient.tenant_id)
         return db_patient
         
-    except Exception as e:
-        db.rollback()
-        print(f"❌ Failed to create patient: {str(e)}")
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception:
+        await db.rollback()
+        logger.exception("Failed to create patient: tenant=%s", patient.tenant_id)
         raise HTTPException(
             status_code=500,
             detail="Failed to create patient. Please try again later."
         )
 
+@router.put("/upsert", response_model=PatientUpsertResult)
+async def upsert_patient(
+    patient: PatientCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Cria ou atualiza um paciente pelo CPF (idempotente)
+    
+    Uma única instrução `INSERT ... ON CONFLICT(tenant_id, cpf) DO UPDATE`:
+    sem corrida entre checagem e insert. Se o CPF já existe no tenant, os
+    demais campos são substituídos (email/notes ausentes viram null).
+    
+    - **201** + `created: true`: paciente novo
+    - **200** + `updated: true`: algum campo mudou
+    - **200** com os dois `false`: já estava igual (nada foi gravado)
+    """
+    response.headers["Cache-Control"] = "no-store"
+    
+    values = patient.model_dump(exclude={"tenant_id"})
+    try:
+        [result] = await run_write(db, lambda session: upsert_patients(session, patient.tenant_id, [values]))
+    except Exception:
+        await db.rollback()
+        logger.exception("Failed to upsert patient: tenant=%s", patient.tenant_id)
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to upsert patient. Please try again later."
+        )
+    
+    if result["created"]:
+        response.status_code = 201
+    return result
+
+@router.put("/upsert/batch", response_model=PatientUpsertBatchResponse)
+async def upsert_patients_batch(
+    batch: PatientUpsertBatch,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Cria ou atualiza até 1000 pacientes pelo CPF numa transação (sincronização)
+    
+    Mesma semântica de PUT /upsert, com um único INSERT ... ON CONFLICT em
+    lote. `results` vem na ordem de `patients`; CPFs repetidos no lote são
+    rejeitados (422).
+    """
+    response.headers["Cache-Control"] = "no-store"
+    
+    values = [patient.model_dump() for patient in batch.patients]
+    try:
+        results = await run_write(db, lambda session: upsert_patients(session, batch.tenant_id, values))
+    except Exception:
+        await db.rollback()
+        logger.exception("Failed to upsert patients: tenant=%s", batch.tenant_id)
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to upsert patients. Please try again later."
+        )
+    
+    created = sum(result["created"] for result in results)
+    updated = sum(result["updated"] for result in results)
+    logger.info("Patients upserted: tenant=%s, created=%s, updated=%s", batch.tenant_id, created, updated)
+    return PatientUpsertBatchResponse(
+        created=created,
+        updated=updated,
+        unchanged=len(results) - created - updated,
+        results=results,
+    )
+
+@router.post("/import", response_model=PatientImportReport)
+async def import_patients(
+    response: Response,
+    file: UploadFile = File(..., description="Arquivo CSV (com cabeçalho) ou NDJSON"),
+    tenant_id: str = Query(..., alias="tenantId", description="ID do tenant"),
+    file_format: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$",
+                                       description="csv ou ndjson (default: pela extensão)"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Importa pacientes em lote (migração de clínicas)
+    
+    - **file**: CSV com cabeçalho ou NDJSON (um objeto por linha) com os
+      campos name, cpf, phone, email, address, notes
+    - **tenantId**: ID do tenant que recebe os pacientes
+    - **format**: `csv` ou `ndjson`; sem ele, vem da extensão do arquivo
+    
+    O arquivo é lido linha a linha e gravado em chunks (um SELECT ... IN para
+    os CPFs e um INSERT em lote por transação). Linhas inválidas ou com CPF
+    já cadastrado entram em `errors` sem interromper a importação; chunks
+    já gravados continuam gravados se algo falhar no meio.
+    """
+    response.headers["Cache-Control"] = "no-store"
+    
+    fmt = file_format or import_format(file.filename)
+    if fmt is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Unknown file format: use a .csv/.ndjson file or the format parameter"
+        )
+    
+    importer = PatientImporter(tenant_id)
+    chunks = importer.chunks(read_records(file.file, fmt))
+    try:
+        # Leitura, decodificação e validação de cada chunk numa thread: um
+        # arquivo grande não trava o event loop (os chunks saem em sequência)
+        while (chunk := await run_in_threadpool(next, chunks, None)) is not None:
+            # Uma transação por chunk (fila de escrita, se habilitada)
+            await run_write(db, lambda session, chunk=chunk: importer.insert_chunk(session, chunk))
+    except UnicodeDecodeError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    except Exception:
+        await db.rollback()
+        logger.exception("Failed to import patients: tenant=%s, created=%s", tenant_id, importer.created)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Import failed after {importer.created} patients were created. Please try again later."
+        )
+    
+    report = importer.report()
+    logger.info("Patients imported: tenant=%s, created=%s, failed=%s", tenant_id, report["created"], report["failed"])
+    return report
+
 @router.get("/", response_model=PatientPaginatedResponse)
-def list_patients(
+async def list_patients(
     response: Response,
     tenant_id: str = Query(..., alias="tenantId", description="ID do tenant"),
     search: Optional[str] = Query(None, description="Buscar por nome ou CPF"),
+    name_prefix: Optional[str] = Query(None, alias="namePrefix", description="Nome começando com (sem acento/maiúsculas)"),
     page: int = Query(1, ge=1, description="Número da página (1-indexed)"),
     page_size: int = Query(50, ge=1, le=100, description="Itens por página"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor opaco (modo keyset); vazio para a primeira página"),
+    include_total: bool = Query(False, description="Calcular total no modo cursor"),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Lista pacientes com paginação e busca
     
     - **tenantId**: ID do tenant (obrigatório)
-    - **search**: Buscar por nome ou CPF (opcional)
+    - **search**: Buscar por nome, CPF, telefone ou email (opcional); cada
+      termo casa por prefixo, sem acento/maiúsculas (índice FTS5). No modo
+      página os resultados vêm por relevância
+    - **namePrefix**: Nome completo começando com o texto, sem
+      acento/maiúsculas (range scan em (tenant_id, name_key))
     - **page**: Número da página (default: 1)
     - **page_size**: Itens por página (default: 50, max: 100)
+    - **cursor**: Ativa o modo cursor em (name, id); envie `cursor=` na
+      primeira página e depois o `next_cursor` da resposta anterior
+    - **include_total**: No modo cursor, o `COUNT(*)` só roda se `true`
     """
     response.headers["Cache-Control"] = "no-store"
     
     # Build base query
-    query = db.query(Patient).filter(Patient.tenant_id == tenant_id)
+    query = select(Patient).where(Patient.tenant_id == tenant_id)
+    # Prefixo do nome: range scan em (tenant_id, name_key)
+    prefix_filter = name_prefix_filter(name_prefix) if name_prefix else None
+    if prefix_filter is not None:
+        query = query.where(prefix_filter)
+    tenant_query = query
     
-    # Aplicar filtro de busca
-    if search:
-        search_term = f"%{search}%"
+    # Aplicar filtro de busca: índice FTS5 quando existe no banco
+    match_query = build_match_query(search) if search else None
+    fts = bool(match_query) and await db.run_sync(fts_available)
+    # O FTS só casa pelo começo do token: dígitos do meio do CPF continuam
+    # no LIKE (varre só o índice (tenant_id, cpf))
+    digits = digits_search(search) if fts else None
+    cpf_filter = Patient.cpf.like(f"%{digits}%") if digits else None
+    if fts:
+        search_filter = Patient.id.in_(matching_ids(match_query))
+        if cpf_filter is not None:
+            search_filter = search_filter | cpf_filter
+        query = query.where(search_filter)
+    elif search:
         # Normalizar termo de busca (remover máscara) para buscar CPF
         search_normalized = re.sub(r'\D', '', search)
-        query = query.filter(
-            (Patient.name.ilike(search_term)) | 
-            (Patient.cpf.like(f"%{search_normalized}%"))
+        # name_key já é minúsculo e sem acento: "joao" encontra "João"
+        search_filter = Patient.name_key.like(f"%{normalize_name(search)}%")
+        if search_normalized:
+            # Sem dígitos, LIKE '%%' casaria com todos os pacientes
+            search_filter = search_filter | Patient.cpf.like(f"%{search_normalized}%")
+        query = query.where(search_filter)
+    
+    # Modo cursor: keyset em (name, id), sem OFFSET e sem COUNT por padrão
+    if cursor is not None:
+        total = await count_rows(db, query) if include_total else None
+        
+        if cursor:
+            last_name, last_id = decode_cursor(cursor, str, int)
+            query = query.where(tuple_(Patient.name, Patient.id) > (last_name, last_id))
+        
+        rows = (await db.execute(
+            query
+            .order_by(Patient.name, Patient.id)
+            .limit(page_size + 1)
+        )).scalars().all()
+        patients = rows[:page_size]
+        next_cursor = None
+        if len(rows) > page_size:
+            last = patients[-1]
+            next_cursor = encode_cursor(last.name, last.id)
+        
+        return PatientPaginatedResponse(
+            data=patients,
+            total=total,
+            page_size=page_size,
+            next_cursor=next_cursor
         )
     
     # Contar total (antes de aplicar paginação)
-    total = query.count()
+    total = await count_rows(db, query)
     
     # Calcular total de páginas
     total_pages = (total + page_size - 1) // page_size if total > 0 else 0
@@ -116,14 +308,25 @@ def list_patients(
             detail=f"Page {page} does not exist. Total pages: {total_pages}"
         )
     
-    # Aplicar paginação e ordenar por nome
-    patients = (
+    # Aplicar paginação e ordenar por relevância (bm25) na busca, senão por nome
+    order_by = [Patient.name]
+    if fts and cpf_filter is not None:
+        # Casos só do LIKE (sem rank) vêm depois dos do FTS (bm25 < 0)
+        hits = ranked_hits(match_query)
+        query = tenant_query.outerjoin(hits, hits.c.rowid == Patient.id).where(
+            hits.c.rowid.is_not(None) | cpf_filter
+        )
+        order_by.insert(0, func.coalesce(hits.c.rank, 0))
+    elif fts:
+        hits = ranked_hits(match_query)
+        query = tenant_query.join(hits, hits.c.rowid == Patient.id)
+        order_by.insert(0, hits.c.rank)
+    patients = (await db.execute(
         query
-        .order_by(Patient.name)
+        .order_by(*order_by)
         .offset((page - 1) * page_size)
         .limit(page_size)
-        .all()
-    )
+    )).scalars().all()
     
     # Retornar resposta paginada
     return PatientPaginatedResponse(
@@ -134,12 +337,35 @@ def list_patients(
         total_pages=total_pages
     )
 
+@router.get("/suggest", response_model=list[PatientSuggestion])
+async def suggest_patients(
+    response: Response,
+    tenant_id: str = Query(..., alias="tenantId", description="ID do tenant"),
+    q: str = Query(..., min_length=1, max_length=100, description="Início de um nome ou CPF"),
+    limit: int = Query(10, ge=1, le=50, description="Máximo de sugestões"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Autocomplete de pacientes (diálogo de novo agendamento)
+    
+    - **tenantId**: ID do tenant (obrigatório)
+    - **q**: Prefixo de qualquer palavra do nome (sem acento/maiúsculas) ou,
+      se só tiver dígitos/máscara, do CPF
+    - **limit**: Máximo de sugestões (default: 10, max: 50)
+    
+    Servido por um índice de prefixos em memória do tenant
+    (utils/patient_suggest.py), sem COUNT nem scan: o primeiro request
+    monta o índice, os seguintes respondem em microssegundos.
+    """
+    response.headers["Cache-Control"] = "no-store"
+    return await patient_suggest.suggest(db, tenant_id, q, limit)
+
 @router.get("/{patient_id}", response_model=PatientResponse)
-def get_patient(
+async def get_patient(
     patient_id: int,
     tenant_id: str = Query(..., alias="tenantId"),
     response: Response = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Busca um paciente específico por ID
@@ -150,10 +376,12 @@ def get_patient(
     if response:
         response.headers["Cache-Control"] = "no-store"
     
-    patient = db.query(Patient).filter(
-        Patient.id == patient_id,
-        Patient.tenant_id == tenant_id
-    ).first()
+    patient = (await db.execute(
+        select(Patient).where(
+            Patient.id == patient_id,
+            Patient.tenant_id == tenant_id
+        )
+    )).scalars().first()
     
     if not patient:
         raise HTTPException(
@@ -164,12 +392,12 @@ def get_patient(
     return patient
 
 @router.patch("/{patient_id}", response_model=PatientResponse)
-def update_patient(
+async def update_patient(
     patient_id: int,
     patient_update: PatientUpdate,
     tenant_id: str = Query(..., alias="tenantId"),
     response: Response = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Atualiza informações de um paciente
@@ -180,10 +408,12 @@ def update_patient(
     if response:
         response.headers["Cache-Control"] = "no-store"
     
-    patient = db.query(Patient).filter(
-        Patient.id == patient_id,
-        Patient.tenant_id == tenant_id
-    ).first()
+    patient = (await db.execute(
+        select(Patient).where(
+            Patient.id == patient_id,
+            Patient.tenant_id == tenant_id
+        )
+    )).scalars().first()
     
     if not patient:
         raise HTTPException(
@@ -195,14 +425,16 @@ def update_patient(
     update_data = patient_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(patient, field, value)
+    if "name" in update_data:
+        patient.name_key = normalize_name(patient.name)
     
     try:
-        db.commit()
-        db.refresh(patient)
+        await db.commit()
+        await db.refresh(patient)
         print(f"✅ Patient updated: ID={patient_id}, tenant={tenant_id}")
         return patient
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"❌ Failed to update patient: {str(e)}")
         raise HTTPException(
             status_code=500,
@@ -210,10 +442,10 @@ def update_patient(
         )
 
 @router.delete("/{patient_id}", status_code=204)
-def delete_patient(
+async def delete_patient(
     patient_id: int,
     tenant_id: str = Query(..., alias="tenantId"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Remove um paciente
@@ -221,10 +453,12 @@ def delete_patient(
     - **patient_id**: ID do paciente
     - **tenantId**: ID do tenant (isolamento multi-tenant)
     """
-    patient = db.query(Patient).filter(
-        Patient.id == patient_id,
-        Patient.tenant_id == tenant_id
-    ).first()
+    patient = (await db.execute(
+        select(Patient).where(
+            Patient.id == patient_id,
+            Patient.tenant_id == tenant_id
+        )
+    )).scalars().first()
     
     if not patient:
         raise HTTPException(
@@ -233,12 +467,12 @@ def delete_patient(
         )
     
     try:
-        db.delete(patient)
-        db.commit()
+        await db.delete(patient)
+        await db.commit()
         print(f"✅ Patient deleted: ID={patient_id}, tenant={tenant_id}")
         return None
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"❌ Failed to delete patient: {str(e)}")
         raise HTTPException(
             status_code=500,
@@ -246,10 +480,10 @@ def delete_patient(
         )
 
 @router.get("/count", response_model=dict)
-def count_patients(
+async def count_patients(
     tenant_id: str = Query(..., alias="tenantId"),
     response: Response = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Conta total de pacientes de um tenant
@@ -259,7 +493,7 @@ def count_patients(
     if response:
         response.headers["Cache-Control"] = "no-store"
     
-    count = db.query(Patient).filter(Patient.tenant_id == tenant_id).count()
+    count = await count_rows(db, select(Patient).where(Patient.tenant_id == tenant_id))
     
     return {"count": count}
 
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Response
 from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pathlib import Path
 import uuid
 import os
@@ -23,7 +24,7 @@ ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png"}
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_profile(
+async def get_current_user_profile(
     current_user: User = Depends(get_current_user),
     response: Response = None
 ):
@@ -36,9 +37,9 @@ def get_current_user_profile(
 
 
 @router.patch("/me", response_model=UserResponse)
-def update_current_user_profile(
+async def update_current_user_profile(
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
     response: Response = None
 ):
@@ -54,10 +55,12 @@ def update_current_user_profile(
         
         # Validar email único se fornecido
         if "email" in update_data and update_data["email"] != current_user.email:
-            existing_user = db.query(User).filter(
-                User.email == update_data["email"],
-                User.id != current_user.id
-            ).first()
+            existing_user = (await db.execute(
+                select(User).where(
+                    User.email == update_data["email"],
+                    User.id != current_user.id
+                )
+            )).scalars().first()
             
             if existing_user:
                 raise HTTPException(
@@ -72,8 +75,8 @@ def update_current_user_profile(
                 setattr(current_user, field, value)
                 changed_fields.append(field)
         
-        db.commit()
-        db.refresh(current_user)
+        await db.commit()
+        await db.refresh(current_user)
         
         print(f"✏️ User profile updated: user_id={current_user.id}, fields={changed_fields}")
         return current_user
@@ -81,7 +84,7 @@ def update_current_user_profile(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"❌ Failed to update user profile: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -92,7 +95,7 @@ def update_current_user_profile(
 @router.post("/me/profile-photo")
 async def upload_profile_photo(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Upload de foto de perfil"""
@@ -136,7 +139,7 @@ async def upload_profile_photo(
         # Atualizar URL no banco
         photo_url = f"/api/v1/uploads/profile_photos/{unique_filename}"
         current_user.profile_photo_url = photo_url
-        db.commit()
+        await db.commit()
         
         file_size_mb = file_size / (1024 * 1024)
         print(f"📷 Profile photo uploaded: user_id={current_user.id}, filename={unique_filename}, size={file_size_mb:.2f}MB")
@@ -157,8 +160,8 @@ async def upload_profile_photo(
 
 
 @router.delete("/me/profile-photo")
-def delete_profile_photo(
-    db: Session = Depends(get_db),
+async def delete_profile_photo(
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Remove a foto de perfil"""
@@ -180,7 +183,7 @@ def delete_profile_photo(
         
         # Atualizar banco
         current_user.profile_photo_url = None
-        db.commit()
+        await db.commit()
         
         print(f"🗑️ Profile photo removed: user_id={current_user.id}")
         
@@ -189,7 +192,7 @@ def delete_profile_photo(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"❌ Failed to delete photo: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -144,6 +144,10 @@ class PaginatedResponse(BaseModel, Generic[T]):
         page: Número da página atual (1-indexed)
         page_size: Quantidade de itens por página
         total_pages: Total de páginas disponíveis
+        next_cursor: Cursor opaco para a próxima página (modo cursor)
+    
+    No modo cursor (`?cursor=`), `page` e `total_pages` vêm nulos e `total`
+    só é calculado quando solicitado com `include_total=true`.
     
     Example:
         {
@@ -155,10 +159,11 @@ class PaginatedResponse(BaseModel, Generic[T]):
         }
     """
     data: List[T]
-    total: int = Field(..., description="Total de registros")
-    page: int = Field(..., ge=1, description="Página atual (1-indexed)")
+    total: Optional[int] = Field(None, description="Total de registros")
+    page: Optional[int] = Field(None, ge=1, description="Página atual (1-indexed)")
     page_size: int = Field(..., ge=1, le=100, description="Itens por página")
-    total_pages: int = Field(..., ge=0, description="Total de páginas")
+    total_pages: Optional[int] = Field(None, ge=0, description="Total de páginas")
+    next_cursor: Optional[str] = Field(None, description="Cursor da próxima página (null na última)")
     
     class Config:
         json_schema_extra = {
@@ -167,7 +172,8 @@ class PaginatedResponse(BaseModel, Generic[T]):
                 "total": 250,
                 "page": 1,
                 "page_size": 50,
-                "total_pages": 5
+                "total_pages": 5,
+                "next_cursor": None
             }
         }
 
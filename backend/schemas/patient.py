@@ -88,11 +88,72 @@ class PatientResponse(PatientBase):
     class Config:
         from_attributes = True
 
+class PatientSuggestion(BaseModel):
+    """Item do autocomplete (GET /v1/patients/suggest)"""
+    id: int
+    name: str
+    cpf: str
+    phone: str
+
 class PatientPaginatedResponse(BaseModel):
-    """Resposta paginada de patients"""
+    """Resposta paginada de patients (modo cursor: ver PaginatedResponse)"""
     data: list[PatientResponse]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+class PatientImportError(BaseModel):
+    """Linha rejeitada na importação em lote"""
+    line: int
+    cpf: Optional[str] = None
+    error: str
+
+class PatientImportReport(BaseModel):
+    """Resultado de POST /v1/patients/import"""
+    total: int
+    created: int
+    failed: int
+    errors: list[PatientImportError]
+    errors_truncated: bool
+    elapsed_ms: float
+
+# Pacientes por chamada de PUT /v1/patients/upsert/batch
+MAX_UPSERT_BATCH = 1000
+
+class PatientUpsertResult(BaseModel):
+    """Resultado do upsert de um paciente (created/updated: ambos false = nada mudou)"""
+    id: int
+    cpf: str
+    created: bool
+    updated: bool
+
+class PatientUpsertBatch(BaseModel):
+    """Lote de pacientes para upsert por CPF"""
+    tenant_id: str
+    patients: list[PatientBase]
+    
+    @validator('tenant_id')
+    def validate_tenant_id(cls, v):
+        if not v or not v.strip():
+            raise ValueError('tenant_id is required and cannot be empty')
+        return v
+    
+    @validator('patients')
+    def validate_patients(cls, v):
+        if not v:
+            raise ValueError('patients cannot be empty')
+        if len(v) > MAX_UPSERT_BATCH:
+            raise ValueError(f'patients cannot exceed {MAX_UPSERT_BATCH} items')
+        cpfs = [patient.cpf for patient in v]
+        if len(set(cpfs)) != len(cpfs):
+            raise ValueError('patients cannot repeat a cpf')
+        return v
 
+class PatientUpsertBatchResponse(BaseModel):
+    """Resultado de PUT /v1/patients/upsert/batch"""
+    created: int
+    updated: int
+    unchanged: int
+    results: list[PatientUpsertResult]
@@ -0,0 +1,64 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# ============================================================================
+# PAGINAÇÃO POR CURSOR (KEYSET)
+# ============================================================================
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Gera um cursor opaco a partir da chave de ordenação do último item.
+
+    Datetimes são serializados em ISO 8601; o restante vai direto para JSON.
+    O resultado é base64 url-safe, sem padding, para trafegar em query string.
+
+    Example:
+        encode_cursor(appt.starts_at, appt.id)  -> "WyIyMDI1LTEwLTE1VDE0OjMwOjAwIiwgNDJd"
+    """
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> Tuple[Any, ...]:
+    """
+    Decodifica um cursor gerado por encode_cursor.
+
+    Args:
+        cursor: Valor recebido na query string
+        types: Tipo esperado de cada posição (datetime, str, int)
+
+    Raises:
+        HTTPException 400 se o cursor estiver malformado
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError("unexpected cursor shape")
+
+        values = []
+        for value, expected in zip(payload, types):
+            if expected is datetime:
+                value = datetime.fromisoformat(value)
+            elif not isinstance(value, expected) or isinstance(value, bool):
+                raise ValueError("unexpected cursor value")
+            values.append(value)
+        return tuple(values)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid cursor. Use the next_cursor value returned by the previous page."
+        )
+
+
+async def count_rows(db: AsyncSession, stmt: Select) -> int:
+    """COUNT(*) de um SELECT, equivalente ao Query.count() (modo paginado e include_total)."""
+    return (await db.execute(select(func.count()).select_from(stmt.subquery()))).scalar_one()
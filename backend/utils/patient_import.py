@@ -0,0 +1,194 @@
+import csv
+import io
+import json
+import os
+import time
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models.patient import Patient
+from schemas.patient import PatientBase
+from utils.patient_suggest import mark_tenant_changed
+from utils.text import normalize_name
+
+
+# ============================================================================
+# IMPORTAÇÃO EM LOTE DE PACIENTES (CSV / NDJSON)
+# ============================================================================
+
+# Linhas por transação: um SELECT ... IN para os CPFs e um INSERT em lote por chunk
+PATIENT_IMPORT_CHUNK_SIZE = int(os.getenv("PATIENT_IMPORT_CHUNK_SIZE", "1000"))
+# Erros listados no relatório da API (os demais só entram na contagem)
+PATIENT_IMPORT_MAX_ERRORS = int(os.getenv("PATIENT_IMPORT_MAX_ERRORS", "1000"))
+
+IMPORT_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+_FIELDS = ("name", "cpf", "phone", "email", "address", "notes")
+_OPTIONAL_FIELDS = ("email", "notes")
+
+
+def import_format(filename: Optional[str]) -> Optional[str]:
+    """Formato pela extensão do arquivo ("csv", "ndjson") ou None."""
+    return IMPORT_FORMATS.get(os.path.splitext(filename or "")[1].lower())
+
+
+def dialect_insert(db: Session):
+    """`insert` do dialeto do banco de Patient (ON CONFLICT só existe nos dialetos)."""
+    name = db.get_bind(Patient).dialect.name
+    return postgresql.insert if name == "postgresql" else sqlite.insert
+
+
+def read_records(stream: BinaryIO, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Lê o arquivo linha a linha: (nº da linha, dict do registro).
+
+    No NDJSON, uma linha que não é um objeto JSON vem como (linha, mensagem
+    de erro) para entrar no relatório sem interromper a importação.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"invalid JSON: {e}"
+            continue
+        yield line_number, record if isinstance(record, dict) else "expected a JSON object"
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}" for item in error.errors()
+    )
+
+
+class PatientImporter:
+    """
+    Importa pacientes de um tenant em chunks, acumulando o relatório.
+
+    - cada registro passa pelas regras do PatientBase (CPF normalizado etc.)
+    - CPFs repetidos no próprio arquivo: vale a primeira linha
+    - por chunk, um único `SELECT cpf ... IN (...)` descarta os CPFs que já
+      existem no tenant, e um INSERT em lote (executemany) grava o resto
+    - `ON CONFLICT DO NOTHING RETURNING cpf`: um CPF criado por outro request
+      entre o SELECT e o INSERT vira erro da linha, não falha do chunk
+
+    Erros de uma linha nunca interrompem a importação.
+
+    Example:
+        importer = PatientImporter(tenant_id)
+        for chunk in importer.chunks(read_records(stream, "csv")):
+            with SessionLocal() as db:
+                importer.insert_chunk(db, chunk)
+                db.commit()
+        print(importer.report())
+    """
+
+    def __init__(self, tenant_id: str, chunk_size: int = PATIENT_IMPORT_CHUNK_SIZE,
+                 max_errors: Optional[int] = PATIENT_IMPORT_MAX_ERRORS):
+        self.tenant_id = tenant_id
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.total = 0
+        self.created = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self._lines: Dict[str, int] = {}
+        self._started = time.perf_counter()
+
+    def _error(self, line: int, cpf: Optional[str], message: str):
+        self.failed += 1
+        if self.max_errors is None or len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "cpf": cpf, "error": message})
+
+    def _validate(self, line: int, record: Any) -> Optional[Dict[str, Any]]:
+        if isinstance(record, str):
+            self._error(line, None, record)
+            return None
+        values = {field: record.get(field) for field in _FIELDS}
+        for field in _OPTIONAL_FIELDS:
+            # Coluna vazia no CSV = campo ausente
+            if isinstance(values[field], str) and not values[field].strip():
+                values[field] = None
+        try:
+            patient = PatientBase(**values)
+        except ValidationError as e:
+            self._error(line, record.get("cpf"), _validation_message(e))
+            return None
+        first_line = self._lines.setdefault(patient.cpf, line)
+        if first_line != line:
+            self._error(line, patient.cpf, f"duplicate cpf (line {first_line})")
+            return None
+        return {**patient.model_dump(), "tenant_id": self.tenant_id, "name_key": normalize_name(patient.name)}
+
+    def chunks(self, records: Iterator[Tuple[int, Any]]) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+        """Registros válidos agrupados em chunks de `chunk_size` (linha, valores)."""
+        chunk = []
+        for line, record in records:
+            self.total += 1
+            values = self._validate(line, record)
+            if values is None:
+                continue
+            chunk.append((line, values))
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def insert_chunk(self, db: Session, chunk: List[Tuple[int, Dict[str, Any]]]) -> int:
+        """Grava um chunk na transação de `db` (sem commit). Retorna quantos foram criados."""
+        existing = set(db.execute(
+            select(Patient.cpf).where(
+                Patient.tenant_id == self.tenant_id,
+                Patient.cpf.in_([values["cpf"] for _, values in chunk]),
+            )
+        ).scalars())
+        rows = []
+        for line, values in chunk:
+            if values["cpf"] in existing:
+                self._error(line, values["cpf"], "patient with this cpf already exists")
+            else:
+                rows.append((line, values))
+        if not rows:
+            return 0
+
+        # Core (não ORM): com RETURNING o SQLAlchemy agrupa as linhas em
+        # INSERT ... VALUES (...), (...) ("insertmanyvalues"); o bulk do ORM
+        # emitiria um INSERT por linha
+        table = Patient.__table__
+        insert = dialect_insert(db)
+        created = set(db.execute(
+            insert(table)
+            .on_conflict_do_nothing(index_elements=[table.c.tenant_id, table.c.cpf])
+            .returning(table.c.cpf),
+            [values for _, values in rows],
+            bind_arguments={"mapper": Patient},
+        ).scalars())
+        for line, values in rows:
+            if values["cpf"] not in created:
+                self._error(line, values["cpf"], "patient with this cpf already exists")
+        self.created += len(created)
+        # INSERT em lote não passa pelos eventos do ORM: o autocomplete é refeito
+        mark_tenant_changed(db, self.tenant_id)
+        return len(created)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "created": self.created,
+            "failed": self.failed,
+            # CPFs já cadastrados só são descobertos no insert do chunk
+            "errors": sorted(self.errors, key=lambda error: error["line"]),
+            "errors_truncated": len(self.errors) < self.failed,
+            "elapsed_ms": round((time.perf_counter() - self._started) * 1000, 1),
+        }
@@ -0,0 +1,140 @@
+import os
+import re
+from typing import Optional
+
+from sqlalchemy import CTE, Select, column, select, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from models.patient import PATIENT_SEARCH_DDL, PATIENT_SEARCH_TRIGGERS, Patient, patient_search_row
+from utils.text import normalize_name
+
+
+# ============================================================================
+# BUSCA DE PACIENTES (FTS5)
+# ============================================================================
+
+# Desligar volta ao LIKE '%termo%' (scan dos pacientes do tenant)
+PATIENT_SEARCH_FTS_ENABLED = os.getenv("PATIENT_SEARCH_FTS_ENABLED", "true").lower() == "true"
+
+# Tabela virtual criada por PATIENT_SEARCH_DDL (models/patient.py); rowid = patients.id
+patients_fts = table("patients_fts", column("rowid"), column("rank"), column("patients_fts"))
+
+# Bancos onde o índice já foi encontrado (só o positivo é guardado: depois
+# de um rebuild o índice passa a ser usado sem reiniciar o servidor)
+_fts_ready = set()
+
+_DIGITS_TERM = re.compile(r"^[\d\s.()/+-]+$")
+_WORD = re.compile(r"\w+")
+
+
+def digits_search(search: str) -> Optional[str]:
+    """Dígitos do termo se ele for só um CPF/telefone digitado (com ou sem máscara)."""
+    if not _DIGITS_TERM.match(search):
+        return None
+    return re.sub(r"\D", "", search) or None
+
+
+def build_match_query(search: str) -> Optional[str]:
+    """
+    Converte o texto digitado numa consulta FTS5 por prefixo.
+
+    Cada termo vira `"termo"*` e todos precisam casar (AND). Uma busca só com
+    dígitos e máscara (CPF "123.456.789-00", telefone "(81) 98888-2222",
+    espaços inclusive) vira um único token de dígitos, como no índice; junto
+    com palavras, cada termo com máscara vira o seu token de dígitos.
+    Retorna None se não sobrar nenhum termo.
+    """
+    digits = digits_search(search)
+    if digits:
+        tokens = [digits]
+    else:
+        tokens = []
+        for term in search.split():
+            if _DIGITS_TERM.match(term):
+                term_digits = re.sub(r"\D", "", term)
+                if term_digits:
+                    tokens.append(term_digits)
+            else:
+                tokens.extend(_WORD.findall(term))
+    if not tokens:
+        return None
+    return " AND ".join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+
+
+def _match(match_query: str):
+    return patients_fts.c.patients_fts.op("MATCH")(match_query)
+
+
+# Nunca um JOIN direto com patients_fts: o planner pode escolher percorrer os
+# pacientes do tenant e reavaliar o MATCH inteiro para cada rowid. IN (lista)
+# e CTE MATERIALIZED garantem que o MATCH rode uma vez só.
+
+def matching_ids(match_query: str) -> Select:
+    """Subquery com os ids que casam, para `Patient.id.in_(...)` (filtro/COUNT, sem ranking)."""
+    return select(patients_fts.c.rowid).where(_match(match_query))
+
+
+def ranked_hits(match_query: str) -> CTE:
+    """CTE (rowid, rank) dos ids que casam, para JOIN + ORDER BY rank (bm25)."""
+    return (
+        select(patients_fts.c.rowid, patients_fts.c.rank)
+        .where(_match(match_query))
+        .cte("patient_search_hits")
+        .prefix_with("MATERIALIZED")
+    )
+
+
+def name_prefix_filter(prefix: str):
+    """
+    Filtro "nome começa com `prefix`" sobre Patient.name_key.
+
+    Intervalo `[chave, chave + U+10FFFF)` em vez de LIKE 'chave%': o SQLite
+    só usa índice em LIKE com collation NOCASE, o intervalo vira range scan
+    em (tenant_id, name_key). Retorna None se o prefixo normalizado for vazio.
+    """
+    key = normalize_name(prefix)
+    if not key:
+        return None
+    return (Patient.name_key >= key) & (Patient.name_key < key + "\U0010ffff")
+
+
+def fts_available(db: Session) -> bool:
+    """Indica se o banco dos pacientes desta sessão tem o índice patients_fts."""
+    if not PATIENT_SEARCH_FTS_ENABLED:
+        return False
+    bind = db.get_bind(Patient)
+    if bind.dialect.name != "sqlite":
+        return False
+    key = str(bind.url)
+    if key not in _fts_ready:
+        found = db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'patients_fts'"),
+            bind_arguments={"mapper": Patient},
+        ).first()
+        if found is None:
+            return False
+        _fts_ready.add(key)
+    return True
+
+
+def rebuild_patient_search(conn: Connection) -> int:
+    """
+    Cria (se faltar) e repopula o índice a partir da tabela patients.
+
+    Os triggers são recriados e mantêm o índice daí em diante. Não faz commit.
+
+    Returns:
+        Quantidade de pacientes indexados
+    """
+    for trigger in PATIENT_SEARCH_TRIGGERS:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    for statement in PATIENT_SEARCH_DDL:
+        conn.execute(text(statement))
+    conn.execute(text("INSERT INTO patients_fts(patients_fts) VALUES('delete-all')"))
+    # Mesmos valores que o trigger de INSERT grava
+    conn.execute(text(
+        f"INSERT INTO patients_fts(rowid, name, cpf, phone, email) SELECT {patient_search_row('p')} FROM patients p"
+    ))
+    conn.execute(text("INSERT INTO patients_fts(patients_fts) VALUES('optimize')"))
+    return conn.execute(text("SELECT COUNT(*) FROM patients")).scalar_one()
@@ -0,0 +1,373 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from sortedcontainers import SortedList
+
+from cache import AsyncSingleFlight, defer_invalidation, get_cache
+from models.patient import Patient
+from utils.text import normalize_name
+
+
+# ============================================================================
+# AUTOCOMPLETE DE PACIENTES (ÍNDICE DE PREFIXOS EM MEMÓRIA POR TENANT)
+# ============================================================================
+
+# Orçamento de chaves indexadas no processo (~4 por paciente: um sufixo por
+# palavra do nome + CPF). Ao passar do limite, os tenants menos usados saem.
+PATIENT_SUGGEST_MAX_ENTRIES = int(os.getenv("PATIENT_SUGGEST_MAX_ENTRIES", "1000000"))
+# Idade máxima de um índice: escritas deste processo entram na hora; as de
+# outros workers descartam o índice pela tag compartilhada (patients_tag) e
+# as feitas fora da aplicação aparecem após o rebuild. 0 = nunca expira
+PATIENT_SUGGEST_TTL_SECONDS = float(os.getenv("PATIENT_SUGGEST_TTL_SECONDS", "300"))
+
+# Chave em Session.info com as alterações a aplicar quando a transação commitar
+_PENDING_KEY = "patient_suggest_pending"
+# Acima disso, uma escrita em lote descarta o índice em vez de aplicar linha a linha
+_INCREMENTAL_LIMIT = 100
+
+_DIGITS_QUERY = re.compile(r"^[\d\s.()/+-]+$")
+
+# Só as versões de tag são usadas (nada é gravado no namespace). Com
+# CACHE_BACKEND=sqlite a versão é a mesma para todos os workers
+_shared_versions = get_cache().namespace("patient_suggest")
+
+
+def patients_tag(tenant_id: str) -> str:
+    """Tag incrementada a cada commit que grava pacientes do tenant."""
+    return f"patients:{tenant_id}"
+
+
+def _shared_version(tenant_id: str) -> int:
+    tag = patients_tag(tenant_id)
+    return _shared_versions.versions(tenant_id, [tag])[tag]
+
+
+def _name_keys(name_key: str) -> List[str]:
+    """Um sufixo por palavra: "joao da silva" casa com "jo", "da s" e "silva"."""
+    words = name_key.split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+class TenantSuggestIndex:
+    """
+    Chaves (chave, id) ordenadas de um tenant: busca por prefixo com bisect.
+
+    Nomes e CPFs ficam em SortedLists separadas (lista de blocos: inserir e
+    remover custam O(log n), sem o memmove de uma lista plana de centenas de
+    milhares de chaves). Não é thread-safe: o PatientSuggestIndex serializa.
+    """
+
+    def __init__(self, names=(), cpfs=()):
+        self.names = SortedList(names)
+        self.cpfs = SortedList(cpfs)
+        self.records: Dict[int, Tuple[str, str, str, str]] = {}
+        self.built_at = time.monotonic()
+        # Versão de patients_tag que o índice reflete (lida antes do SELECT)
+        self.version = 0
+
+    @classmethod
+    def build(cls, rows) -> "TenantSuggestIndex":
+        """Monta a partir de linhas (id, name, name_key, cpf, phone)."""
+        records, names, cpfs = {}, [], []
+        for patient_id, name, name_key, cpf, phone in rows:
+            name_key = name_key or normalize_name(name)
+            records[patient_id] = (name, name_key, cpf, phone)
+            names.extend((key, patient_id) for key in _name_keys(name_key))
+            cpfs.append((cpf, patient_id))
+        index = cls(names, cpfs)
+        index.records = records
+        return index
+
+    @property
+    def size(self) -> int:
+        return len(self.names) + len(self.cpfs)
+
+    def add(self, patient_id: int, name: str, name_key: Optional[str], cpf: str, phone: str):
+        self.remove(patient_id)
+        name_key = name_key or normalize_name(name)
+        self.records[patient_id] = (name, name_key, cpf, phone)
+        for key in _name_keys(name_key):
+            self.names.add((key, patient_id))
+        self.cpfs.add((cpf, patient_id))
+
+    def remove(self, patient_id: int):
+        record = self.records.pop(patient_id, None)
+        if record is None:
+            return
+        _, name_key, cpf, _ = record
+        for key in _name_keys(name_key):
+            self.names.discard((key, patient_id))
+        self.cpfs.discard((cpf, patient_id))
+
+    def search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Pacientes com alguma palavra do nome (ou o CPF) começando com `query`."""
+        if _DIGITS_QUERY.match(query):
+            keys, prefix = self.cpfs, re.sub(r"\D", "", query)
+        else:
+            keys, prefix = self.names, normalize_name(query)
+        if not prefix:
+            return []
+        found: Dict[int, None] = {}
+        # (prefix,) vem antes de qualquer (prefix..., id)
+        for key, patient_id in keys.islice(keys.bisect_left((prefix,))):
+            if len(found) >= limit or not key.startswith(prefix):
+                break
+            found[patient_id] = None
+        results = []
+        for patient_id in found:
+            name, _, cpf, phone = self.records[patient_id]
+            results.append({"id": patient_id, "name": name, "cpf": cpf, "phone": phone})
+        return results
+
+
+class PatientSuggestIndex:
+    """
+    LRU de TenantSuggestIndex limitado por `max_entries` chaves no total.
+
+    Índices são montados sob demanda (primeiro /suggest do tenant) e
+    atualizados pelas escritas de Patient via ORM commitadas neste processo.
+    Cada tenant tem uma geração, incrementada a cada escrita: um índice cuja
+    leitura começou antes de uma escrita não é instalado (como os `versions`
+    do cache), o próximo request monta de novo.
+
+    Entre processos: todo commit incrementa a tag patients_tag(tenant) do
+    cache; um índice cuja versão ficou para trás (escrita de outro worker)
+    é descartado antes de responder.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, timer=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.timer = timer
+        self._indexes: "OrderedDict[str, TenantSuggestIndex]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._entries = 0
+        self._lock = threading.Lock()
+        self._flight = AsyncSingleFlight()
+        self.lookups = 0
+        self.builds = 0
+        self.rejected_builds = 0
+        self.build_ms = 0.0
+        self.updates = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.remote_invalidations = 0
+        self.search_us = 0.0
+        self.max_search_us = 0.0
+
+    def _drop(self, tenant_id: str) -> Optional[TenantSuggestIndex]:
+        index = self._indexes.pop(tenant_id, None)
+        if index is not None:
+            self._entries -= index.size
+        return index
+
+    def _get(self, tenant_id: str) -> Optional[TenantSuggestIndex]:
+        with self._lock:
+            index = self._indexes.get(tenant_id)
+            if index is None:
+                return None
+            if self.ttl > 0 and self.timer() - index.built_at > self.ttl:
+                self._drop(tenant_id)
+                self.expirations += 1
+                return None
+        # Fora do lock: no backend sqlite é uma leitura no cache.db
+        version = _shared_version(tenant_id)
+        with self._lock:
+            if self._indexes.get(tenant_id) is not index:
+                return None
+            if index.version != version:
+                self._drop(tenant_id)
+                self.remote_invalidations += 1
+                return None
+            self._indexes.move_to_end(tenant_id)
+            return index
+
+    def _install(self, tenant_id: str, index: TenantSuggestIndex, generation: int) -> bool:
+        with self._lock:
+            if self._generations.get(tenant_id, 0) != generation:
+                self.rejected_builds += 1
+                return False
+            self._drop(tenant_id)
+            self._indexes[tenant_id] = index
+            self._entries += index.size
+            # Mantém pelo menos o índice recém-montado
+            while self._entries > self.max_entries and len(self._indexes) > 1:
+                self._drop(next(iter(self._indexes)))
+                self.evictions += 1
+            return True
+
+    async def _load(self, db: AsyncSession, tenant_id: str) -> TenantSuggestIndex:
+        with self._lock:
+            generation = self._generations.get(tenant_id, 0)
+        version = _shared_version(tenant_id)
+        t0 = time.perf_counter()
+        rows = (await db.execute(
+            select(Patient.id, Patient.name, Patient.name_key, Patient.cpf, Patient.phone)
+            .where(Patient.tenant_id == tenant_id)
+        )).all()
+        index = TenantSuggestIndex.build(rows)
+        index.version = version
+        self.build_ms = (time.perf_counter() - t0) * 1000
+        self.builds += 1
+        self._install(tenant_id, index, generation)
+        return index
+
+    async def suggest(self, db: AsyncSession, tenant_id: str, query: str, limit: int) -> List[Dict[str, Any]]:
+        index = self._get(tenant_id)
+        if index is None:
+            # Primeiro request do tenant: uma única leitura para os concorrentes
+            index, _ = await self._flight.do(tenant_id, lambda: self._load(db, tenant_id))
+        t0 = time.perf_counter()
+        with self._lock:
+            results = index.search(query, limit)
+        elapsed_us = (time.perf_counter() - t0) * 1e6
+        self.lookups += 1
+        # Média móvel exponencial: barata e sem guardar amostras
+        self.search_us += (elapsed_us - self.search_us) * 0.05
+        self.max_search_us = max(self.max_search_us, elapsed_us)
+        return results
+
+    def apply(self, changes: List[Tuple[str, Optional[int], Optional[tuple]]]):
+        """
+        Aplica (tenant_id, id, valores ou None para remoção) de um commit.
+
+        id None descarta o índice do tenant inteiro (escrita em lote).
+        Depois publica a escrita para os outros workers (publish), fora do
+        event loop quando o cache é sqlite (ver defer_invalidation).
+        """
+        with self._lock:
+            for tenant_id, patient_id, values in changes:
+                self._generations[tenant_id] = self._generations.get(tenant_id, 0) + 1
+                index = self._indexes.get(tenant_id)
+                if index is None:
+                    continue
+                if patient_id is None:
+                    self._drop(tenant_id)
+                    continue
+                self._entries -= index.size
+                if values is None:
+                    index.remove(patient_id)
+                else:
+                    index.add(patient_id, *values)
+                self._entries += index.size
+                self.updates += 1
+        for tenant_id in dict.fromkeys(tenant_id for tenant_id, _, _ in changes):
+            defer_invalidation(self.publish, tenant_id)
+
+    def publish(self, tenant_id: str):
+        """
+        Incrementa patients_tag(tenant_id) (os outros workers descartam o índice).
+
+        O índice local já tem a escrita: continua válido se a tag passou
+        exatamente de `version` para `version + 1`; se outro worker escreveu
+        no meio, é descartado.
+        """
+        before = _shared_version(tenant_id)
+        get_cache().invalidate_tag(patients_tag(tenant_id))
+        after = _shared_version(tenant_id)
+        with self._lock:
+            index = self._indexes.get(tenant_id)
+            if index is None:
+                return
+            if index.version == before and after == before + 1:
+                index.version = after
+            else:
+                self._drop(tenant_id)
+
+    def invalidate(self, tenant_id: str):
+        """Descarta o índice do tenant na hora, em todos os workers (escritas já commitadas fora do ORM)."""
+        with self._lock:
+            self._generations[tenant_id] = self._generations.get(tenant_id, 0) + 1
+            self._drop(tenant_id)
+        defer_invalidation(get_cache().invalidate_tag, patients_tag(tenant_id))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tenants": len(self._indexes),
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "lookups": self.lookups,
+            "avg_search_us": round(self.search_us, 2),
+            "max_search_us": round(self.max_search_us, 2),
+            "builds": self.builds,
+            "last_build_ms": round(self.build_ms, 2),
+            "rejected_builds": self.rejected_builds,
+            "updates": self.updates,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "remote_invalidations": self.remote_invalidations,
+        }
+
+
+patient_suggest = PatientSuggestIndex(PATIENT_SUGGEST_MAX_ENTRIES, PATIENT_SUGGEST_TTL_SECONDS)
+
+
+# ============================================================================
+# ATUALIZAÇÃO INCREMENTAL PELAS ESCRITAS DO ORM (NO COMMIT)
+# ============================================================================
+
+def _pending(target: Patient) -> Optional[list]:
+    session = object_session(target)
+    if session is None:
+        return None
+    return session.info.setdefault(_PENDING_KEY, [])
+
+
+def mark_tenant_changed(db: Session, tenant_id: str):
+    """
+    Agenda o descarte do índice do tenant para o commit da sessão.
+
+    Para escritas que não passam pelos eventos do ORM (INSERT em lote,
+    upsert): reconstruir sob demanda sai mais barato que milhares de add().
+    """
+    db.info.setdefault(_PENDING_KEY, []).append((tenant_id, None, None))
+
+
+def record_patient_changes(db: Session, tenant_id: str, changes: List[Tuple[int, tuple]]):
+    """
+    Agenda (id, (name, name_key, cpf, phone)) gravados fora do ORM (upsert)
+    para o commit da sessão; lotes grandes descartam o índice do tenant.
+    """
+    if len(changes) > _INCREMENTAL_LIMIT:
+        mark_tenant_changed(db, tenant_id)
+        return
+    db.info.setdefault(_PENDING_KEY, []).extend(
+        (tenant_id, patient_id, values) for patient_id, values in changes
+    )
+
+
+@event.listens_for(Patient, "after_insert")
+@event.listens_for(Patient, "after_update")
+def _record_write(mapper, connection, target: Patient):
+    pending = _pending(target)
+    if pending is not None:
+        pending.append((target.tenant_id, target.id, (target.name, target.name_key, target.cpf, target.phone)))
+
+
+@event.listens_for(Patient, "after_delete")
+def _record_delete(mapper, connection, target: Patient):
+    pending = _pending(target)
+    if pending is not None:
+        pending.append((target.tenant_id, target.id, None))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session: Session):
+    changes = session.info.pop(_PENDING_KEY, None)
+    if changes:
+        patient_suggest.apply(changes)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session: Session, previous_transaction):
+    # Rollback de SAVEPOINT não desfaz a transação externa
+    if not previous_transaction.nested:
+        session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,71 @@
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from models.patient import Patient
+from utils.patient_import import dialect_insert
+from utils.patient_suggest import record_patient_changes
+from utils.text import normalize_name
+
+
+# ============================================================================
+# UPSERT DE PACIENTES POR (TENANT_ID, CPF)
+# ============================================================================
+
+# Colunas sobrescritas quando o CPF já existe no tenant (tenant_id, cpf e
+# created_at nunca mudam)
+UPSERT_COLUMNS = ("name", "phone", "email", "address", "notes")
+
+
+def upsert_patients(db: Session, tenant_id: str, patients: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Cria ou atualiza pacientes do tenant numa única instrução (sem commit).
+
+    `INSERT ... ON CONFLICT(tenant_id, cpf) DO UPDATE ... RETURNING`, com os
+    dados já validados (PatientBase; CPFs únicos no lote):
+
+    - o UPDATE só acontece se algum campo mudou (`WHERE ... IS NOT`): reenviar
+      o mesmo paciente não mexe em updated_at nem reindexa o FTS
+    - criado x atualizado: o UPDATE não toca em created_at, então só uma
+      linha inserida agora volta com created_at == `now` deste lote
+    - linhas sem mudança não voltam no RETURNING: um SELECT ... IN busca
+      os ids delas (só se houver alguma)
+
+    Returns:
+        Um dict (id, cpf, created, updated) por paciente, na ordem da entrada
+    """
+    table = Patient.__table__
+    now = datetime.utcnow()
+    rows = [
+        {**patient, "tenant_id": tenant_id, "name_key": normalize_name(patient["name"]),
+         "created_at": now, "updated_at": now}
+        for patient in patients
+    ]
+
+    stmt = dialect_insert(db)(table)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.tenant_id, table.c.cpf],
+        set_={column: excluded[column] for column in UPSERT_COLUMNS + ("name_key", "updated_at")},
+        where=or_(*(table.c[column].is_distinct_from(excluded[column]) for column in UPSERT_COLUMNS)),
+    ).returning(table.c.id, table.c.cpf, table.c.created_at)
+    written = {
+        row.cpf: {"id": row.id, "cpf": row.cpf, "created": row.created_at == now, "updated": row.created_at != now}
+        for row in db.execute(stmt, rows, bind_arguments={"mapper": Patient})
+    }
+
+    unchanged = [row["cpf"] for row in rows if row["cpf"] not in written]
+    if unchanged:
+        for patient_id, cpf in db.execute(
+            select(Patient.id, Patient.cpf).where(Patient.tenant_id == tenant_id, Patient.cpf.in_(unchanged))
+        ):
+            written[cpf] = {"id": patient_id, "cpf": cpf, "created": False, "updated": False}
+
+    by_cpf = {row["cpf"]: row for row in rows}
+    record_patient_changes(db, tenant_id, [
+        (result["id"], tuple(by_cpf[cpf][field] for field in ("name", "name_key", "cpf", "phone")))
+        for cpf, result in written.items() if result["created"] or result["updated"]
+    ])
+    return [written[row["cpf"]] for row in rows]
@@ -0,0 +1,149 @@
+import os
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_, case, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from models.appointment import Appointment
+from models.appointment_rollup import AppointmentDailyRollup
+
+
+# ============================================================================
+# ROLLUP DIÁRIO DE APPOINTMENTS
+# ============================================================================
+
+# Timezone usado para definir o "dia local" das linhas do rollup
+ROLLUP_TZ = os.getenv("ROLLUP_TZ", "America/Recife")
+
+# Leituras (mega_stats, summary) só usam o rollup quando habilitado,
+# ou seja, depois de rodar `python rebuild_rollups.py` ao menos uma vez
+ROLLUP_READS_ENABLED = os.getenv("ROLLUP_READS_ENABLED", "false").lower() == "true"
+
+NO_CONSULTORIO = 0
+
+
+def rollup_available(tz: str) -> bool:
+    """Indica se uma leitura no timezone `tz` pode ser servida pelo rollup."""
+    return ROLLUP_READS_ENABLED and tz == ROLLUP_TZ
+
+
+def local_date_of(starts_at: datetime) -> date:
+    """Converte starts_at (UTC, naive ou aware) para o dia local do rollup."""
+    if starts_at.tzinfo is None:
+        starts_at = starts_at.replace(tzinfo=ZoneInfo("UTC"))
+    return starts_at.astimezone(ZoneInfo(ROLLUP_TZ)).date()
+
+
+def bump_rollup(
+    db: Session,
+    tenant_id: str,
+    starts_at: datetime,
+    consultorio_id: Optional[int],
+    status: Optional[str],
+    delta: int,
+):
+    """
+    Soma `delta` ao contador da chave (tenant, dia local, consultório, status).
+
+    Executa um upsert na sessão atual, sem commit: o chamador faz o commit
+    junto com a escrita do appointment (mesma transação).
+    """
+    stmt = insert(AppointmentDailyRollup).values(
+        tenant_id=tenant_id,
+        local_date=local_date_of(starts_at),
+        consultorio_id=consultorio_id or NO_CONSULTORIO,
+        status=status or "pending",
+        count=delta,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "local_date", "consultorio_id", "status"],
+        set_={"count": AppointmentDailyRollup.count + stmt.excluded.count},
+    )
+    db.execute(stmt)
+
+
+def rebuild_rollups(db: Session, tenant_id: Optional[str] = None) -> int:
+    """
+    Regenera o rollup a partir da tabela appointments.
+
+    O agrupamento por dia local é feito em Python (SQLite não converte
+    timezones), lendo apenas 4 colunas em streaming. Não faz commit.
+
+    Returns:
+        Quantidade de linhas de rollup gravadas
+    """
+    query = db.query(
+        Appointment.tenant_id,
+        Appointment.starts_at,
+        Appointment.consultorio_id,
+        Appointment.status,
+    )
+    delete = db.query(AppointmentDailyRollup)
+    if tenant_id is not None:
+        query = query.filter(Appointment.tenant_id == tenant_id)
+        delete = delete.filter(AppointmentDailyRollup.tenant_id == tenant_id)
+
+    counts = Counter()
+    for tenant, starts_at, consultorio_id, status in query.yield_per(10_000):
+        counts[(tenant, local_date_of(starts_at), consultorio_id or NO_CONSULTORIO, status or "pending")] += 1
+
+    delete.delete(synchronize_session=False)
+    if counts:
+        db.execute(
+            AppointmentDailyRollup.__table__.insert(),
+            [
+                {"tenant_id": t, "local_date": d, "consultorio_id": c, "status": s, "count": n}
+                for (t, d, c, s), n in counts.items()
+            ],
+        )
+    return len(counts)
+
+
+def rollup_buckets(
+    db: Session,
+    tenant_id: str,
+    windows: Dict[str, Tuple[date, date]],
+) -> Dict[str, Dict[str, int]]:
+    """
+    Soma o rollup por janela de dias locais [início, fim).
+
+    Mesma forma de retorno de _count_buckets, por janela:
+    {"total": ..., "confirmed": ..., "pending": ...}, onde `pending` conta
+    apenas status "pending" e `total` inclui todos os status.
+    """
+    union_start = min(start for start, _ in windows.values())
+    union_end = max(end for _, end in windows.values())
+
+    columns = []
+    for name, (start, end) in windows.items():
+        in_window = and_(
+            AppointmentDailyRollup.local_date >= start,
+            AppointmentDailyRollup.local_date < end,
+        )
+        columns.append(func.sum(case((in_window, AppointmentDailyRollup.count), else_=0)).label(f"{name}_total"))
+        for status_name in ("confirmed", "pending"):
+            columns.append(
+                func.sum(
+                    case((and_(in_window, AppointmentDailyRollup.status == status_name), AppointmentDailyRollup.count), else_=0)
+                ).label(f"{name}_{status_name}")
+            )
+
+    row = db.query(*columns).filter(
+        AppointmentDailyRollup.tenant_id == tenant_id,
+        AppointmentDailyRollup.local_date >= union_start,
+        AppointmentDailyRollup.local_date < union_end,
+    ).first()._mapping
+
+    return {
+        name: {
+            "total": row[f"{name}_total"] or 0,
+            "confirmed": row[f"{name}_confirmed"] or 0,
+            "pending": row[f"{name}_pending"] or 0,
+        }
+        for name in windows
+    }
+
@@ -0,0 +1,17 @@
+import unicodedata
+
+
+# ============================================================================
+# NORMALIZAÇÃO DE TEXTO PARA BUSCA
+# ============================================================================
+
+def normalize_name(value: str) -> str:
+    """
+    Chave de busca de um nome: minúsculo, sem acentos e com espaços colapsados.
+
+    "  Conceição   ALBUQUERQUE " -> "conceicao albuquerque"
+    """
+    # NFKD separa a letra do acento ("ã" -> "a" + "~"); os combining são descartados
+    decomposed = unicodedata.normalize("NFKD", value)
+    unaccented = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(unaccented.casefold().split())
@@ -57,7 +57,7 @@ export function useUpdateAppointmentStatus(tenantId: string) {
         mutationFn: async (payload: UpdateStatusInput) => {
             const { data } = await api.patch(`/api/v1/appointments/${payload.appointmentId}`, {
                 status: payload.status
-            }, { headers: { 'Cache-Control': 'no-cache' } })
+            }, { headers: { 'Cache-Control': 'no-cache', 'X-Tenant-ID': tenantId } })
             return data
         },
         onSuccess: async (_data, vars) => {
@@ -30,10 +30,12 @@ export interface AppointmentUpdate {
  */
 export interface PaginatedResponse<T> {
     data: T[];
-    total: number;
-    page: number;
+    // null no modo cursor (total só com include_total=true)
+    total: number | null;
+    page: number | null;
     page_size: number;
-    total_pages: number;
+    total_pages: number | null;
+    next_cursor?: string | null;
 }
 
 /**
@@ -31,10 +31,12 @@ export interface PatientUpdate {
 
 export interface PatientPaginatedResponse {
     data: Patient[];
-    total: number;
-    page: number;
+    // null no modo cursor (total só com include_total=true)
+    total: number | null;
+    page: number | null;
     page_size: number;
-    total_pages: number;
+    total_pages: number | null;
+    next_cursor?: string | null;
 }
 
 export interface FetchPatientsParams {
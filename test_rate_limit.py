@@ -2,13 +2,31 @@
 """
 Script de teste para validar rate limiting nos endpoints de autenticação.
 Teste da Correção #11 (P0-011).
+
+Com --workers N o script sobe o próprio servidor (uvicorn com N workers, porta
+8001, storage de rate limit num arquivo temporário) e verifica que o limite de
+login vale para o conjunto dos workers, não para cada um.
+
+Uso:
+    python test_rate_limit.py               # servidor já rodando na porta 8000
+    python test_rate_limit.py --workers 4   # sobe uvicorn --workers 4 e testa o limite compartilhado
+    python test_rate_limit.py --workers 4 --attempts 300   # rajada maior, todas disparadas juntas
 """
 
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Dict, Any
 
 API_BASE_URL = "http://localhost:8000/api/auth"
+BACKEND_DIR = Path(__file__).resolve().parent / "backend"
 
 def test_login_rate_limit():
     """Testa rate limiting de login (5 tentativas/minuto)."""
@@ -111,10 +129,69 @@ def test_register_rate_limit():
         print("\n❌ Rate limiting NÃO funcionou (não bloqueou após 3 tentativas)")
 
 
-def check_server():
+def test_login_rate_limit_multi_worker(api_base_url: str, attempts: int = 20):
+    """Testa que o limite de login (5/minuto) é único entre os workers."""
+    print("\n" + "="*60)
+    print(f"🧪 TESTE 3: Rate Limiting de Login com vários workers ({attempts} tentativas simultâneas)")
+    print("="*60)
+    
+    login_url = f"{api_base_url}/login"
+    test_credentials = {
+        "email": "test@example.com",
+        "password": "wrongpassword123"
+    }
+    
+    # Todas as threads esperam na barreira e disparam juntas: a rajada é simultânea,
+    # não sequencial, e os workers disputam o lock do storage ao mesmo tempo
+    barrier = threading.Barrier(attempts)
+    
+    def attempt(_):
+        session = requests.Session()
+        barrier.wait()
+        # Uma conexão por tentativa: o kernel distribui entre os workers
+        return session.post(login_url, json=test_credentials, headers={"Connection": "close"}, timeout=60).status_code
+    
+    with ThreadPoolExecutor(max_workers=attempts) as pool:
+        statuses = list(pool.map(attempt, range(attempts)))
+    
+    allowed = statuses.count(401)
+    blocked = statuses.count(429)
+    print(f"   Permitidas (401): {allowed}")
+    print(f"   Bloqueadas (429): {blocked}")
+    print(f"   Outros status: {[s for s in statuses if s not in (401, 429)]}")
+    
+    # Lock do storage ocupado além do busy timeout recusa o request (429): menos de 5 é aceitável
+    if 0 < allowed <= 5 and blocked == attempts - allowed:
+        print("\n✅ Limite compartilhado entre os workers!")
+        return True
+    print("\n❌ Limite NÃO compartilhado (esperado: no máximo 5 permitidas no total)")
+    return False
+
+
+def start_server(workers: int, port: int, storage_dir: str) -> subprocess.Popen:
+    """Sobe `uvicorn main:app --workers N` com storage de rate limit limpo."""
+    env = dict(os.environ)
+    env["RATE_LIMIT_STORAGE_URI"] = f"sqlite:///{Path(storage_dir) / 'ratelimit.db'}"
+    env["STATS_PREWARM_ENABLED"] = "false"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers)],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        if check_server(f"http://localhost:{port}", quiet=True):
+            return server
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn não respondeu em /health")
+
+
+def check_server(base_url: str = "http://localhost:8000", quiet: bool = False):
     """Verifica se o servidor está rodando."""
     try:
-        response = requests.get("http://localhost:8000/health", timeout=2)
+        response = requests.get(f"{base_url}/health", timeout=2)
         if response.status_code == 200:
             print("✅ Servidor está rodando!")
             return True
@@ -122,6 +199,8 @@ def check_server():
             print(f"⚠️ Servidor respondeu com status {response.status_code}")
             return False
     except requests.exceptions.ConnectionError:
+        if quiet:
+            return False
         print("❌ Servidor não está rodando!")
         print("\n💡 Para iniciar o servidor:")
         print("   cd backend")
@@ -133,7 +212,26 @@ def check_server():
         return False
 
 
+def run_multi_worker(workers: int, attempts: int, port: int = 8001):
+    print(f"\n🚀 Subindo uvicorn com {workers} workers na porta {port}...")
+    with tempfile.TemporaryDirectory() as storage_dir:
+        server = start_server(workers, port, storage_dir)
+        try:
+            ok = test_login_rate_limit_multi_worker(f"http://localhost:{port}/api/auth", attempts)
+        finally:
+            server.terminate()
+            server.wait()
+    exit(0 if ok else 1)
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=0, help="sobe o próprio uvicorn com N workers")
+    parser.add_argument("--attempts", type=int, default=100, help="tentativas simultâneas de login com --workers")
+    args = parser.parse_args()
+    if args.workers:
+        run_multi_worker(args.workers, args.attempts)
+    
     print("\n" + "="*60)
     print("🔒 TESTE DE RATE LIMITING - Correção #11 (P0-011)")
     print("="*60)
@@ -157,6 +255,7 @@ if __name__ == "__main__":
     print("\n📝 Observações:")
     print("   - Login: Máximo 5 tentativas/minuto por IP")
     print("   - Register: Máximo 3 registros/hora por IP")
+    print("   - Contadores compartilhados entre workers (RATE_LIMIT_STORAGE_URI)")
     print("   - Headers X-RateLimit-* presentes nas respostas")
     print("   - HTTP 429 retornado quando limite excedido")
     print("\n🎉 Correção #11 implementada com sucesso!")